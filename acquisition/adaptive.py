@@ -0,0 +1,131 @@
+import time
+from time import perf_counter
+
+import numpy as np
+
+
+def interval_loss(angles, values, min_step, curvature_weight=1.0):
+    """
+    Refinement priority of each interval between neighbouring (sorted) angles: its length in the
+    plane of angle and value, both scaled to their range, plus the curvature at its two ends.
+    Intervals shorter than 2 * min_step get a loss of 0 and are never split.
+    """
+    angles = np.asarray(angles, dtype=float)
+    values = np.asarray(values, dtype=float)
+    x_range = np.ptp(angles) or 1.0
+    y_range = np.ptp(values) or 1.0
+    dx = np.diff(angles) / x_range
+    dy = np.diff(values) / y_range
+    loss = np.hypot(dx, dy)
+
+    # slope change at every interior point, shared by the two intervals next to it
+    slopes = dy / np.where(dx > 0, dx, np.inf)
+    curvature = np.zeros(len(angles))
+    curvature[1:-1] = np.abs(np.diff(slopes)) * (dx[:-1] + dx[1:]) / 2
+    loss += curvature_weight * (curvature[:-1] + curvature[1:]) * dx
+
+    loss[np.diff(angles) < 2 * min_step] = 0.0
+    return loss
+
+
+def order_by_travel(targets, current_angle):
+    """Visit the targets in one pass, starting at the end nearer to the current angle."""
+    targets = np.sort(np.asarray(targets, dtype=float))
+    if abs(targets[-1] - current_angle) < abs(targets[0] - current_angle):
+        targets = targets[::-1]
+    return targets
+
+
+class AdaptiveScan:
+    """
+    Sweep that first measures a coarse grid and then keeps adding points in the middle of the
+    intervals where RA, RB or RA/RB changes fastest, until a point or time budget is used up.
+    The coarse grid is np.arange(start_angle, stop_angle, coarse_step) like the angles of a step sweep,
+    stop_angle itself is not measured.
+    """
+    def __init__(self, Rmount, lockin, start_angle, stop_angle, coarse_step, max_points=None, time_budget=None,
+                 min_step=0.01, quantity='RA', batch_size=None, on_point=None, writer=None, settle_time=None,
+                 channels='IN1, IN2'):
+        """
+        :param max_points: Total number of points, defaults to four times the coarse grid.
+        :param time_budget: Seconds after which no further refinement pass is started.
+        :param min_step: Intervals are not split below this angle (°).
+        :param quantity: 'RA', 'RB' or 'ratio' (RA/RB), the curve whose features are refined.
+        :param batch_size: New points per refinement pass, defaults to a quarter of the points so far.
+        """
+        self.Rmount = Rmount
+        self.lockin = lockin
+        self.coarse_angles = np.arange(start_angle, stop_angle, coarse_step)
+        self.max_points = max_points if max_points is not None else 4 * len(self.coarse_angles)
+        self.time_budget = time_budget
+        self.min_step = min_step
+        self.quantity = quantity
+        self.batch_size = batch_size
+        self.on_point = on_point
+        self.writer = writer
+        self.settle_time = settle_time
+        self.channels = channels
+        self.is_running = True
+        self.angles = []
+        self.RA = []
+        self.RB = []
+        self.current_angle = None
+
+    def values(self):
+        RA, RB = np.array(self.RA), np.array(self.RB)
+        if self.quantity == 'RB':
+            return RB
+        if self.quantity == 'ratio':
+            return RA / np.where(RB != 0, RB, np.nan)
+        return RA
+
+    def measure(self, angle):
+        self.Rmount.move_absolute(angle)
+        self.current_angle = angle
+        time.sleep(self.settle_time)
+        if self.lockin is not None:
+            RA, RB = self.lockin.get_multiple_channel_data(self.channels)[:2]
+        else:
+            RA, RB = 1, 1
+        self.angles.append(angle)
+        self.RA.append(RA)
+        self.RB.append(RB)
+        if self.writer is not None:
+            self.writer.append(angle, RA, RB)
+        if self.on_point is not None:
+            self.on_point(angle, RA, RB)
+
+    def next_batch(self):
+        order = np.argsort(self.angles)
+        angles = np.array(self.angles)[order]
+        values = np.nan_to_num(self.values()[order])
+        loss = interval_loss(angles, values, self.min_step)
+        batch_size = self.batch_size or max(1, len(angles) // 4)
+        batch_size = min(batch_size, self.max_points - len(angles), np.count_nonzero(loss))
+        if batch_size <= 0:
+            return []
+        worst = np.argsort(loss)[::-1][:batch_size]
+        return order_by_travel((angles[worst] + angles[worst + 1]) / 2, self.current_angle)
+
+    def run(self):
+        t_start = perf_counter()
+        if self.settle_time is None:
+            self.settle_time = self.lockin.get_settle_time() if self.lockin is not None else 0.0
+        for angle in self.coarse_angles:
+            if not self.is_running:
+                return len(self.angles)
+            self.measure(angle)
+        while self.is_running and len(self.angles) < self.max_points:
+            if self.time_budget is not None and perf_counter() - t_start > self.time_budget:
+                break
+            batch = self.next_batch()
+            if not len(batch):
+                break
+            for angle in batch:
+                if not self.is_running:
+                    break
+                self.measure(angle)
+        return len(self.angles)
+
+    def stop(self):
+        self.is_running = False
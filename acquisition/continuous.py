@@ -0,0 +1,72 @@
+import time
+from time import perf_counter
+
+from storage.capture_store import CaptureWriter
+
+
+class ContinuousCapture:
+    """
+    Continuous lock-in capture (CAPTURESTART CONT) streamed to disk: a CaptureStream downloads
+    the frames captured since the last poll and a CaptureWriter appends them to a memory-mapped
+    file with its min/max pyramid, so nothing of the capture is held in memory. Runs until stop()
+    is called or for duration seconds.
+    """
+    def __init__(self, lockin, base_path, channels='XY', duration=None, poll_interval=0.05,
+                 buffer_kbytes=4096, on_start=None, on_chunk=None, metadata=None):
+        """
+        :param base_path: Path of the capture files without extension, see storage.capture_store.
+        :param duration: Seconds to capture, None captures until stop().
+        :param buffer_kbytes: Size of the circular capture buffer of the lock-in, a large buffer
+            rides out slow polls without losing frames.
+        :param on_start: Called as on_start(base_path) once the files exist, e.g. to open a viewer.
+        :param on_chunk: Called as on_chunk(frames) with every downloaded chunk, the frames are
+            overwritten by the next chunk.
+        """
+        self.lockin = lockin
+        self.base_path = base_path
+        self.channels = channels
+        self.duration = duration
+        self.poll_interval = poll_interval
+        self.buffer_kbytes = buffer_kbytes
+        self.on_start = on_start
+        self.on_chunk = on_chunk
+        self.metadata = metadata or {}
+        self.writer = None
+        self.stream = None
+        self.frames_lost = 0
+        self.is_running = True
+
+    def run(self):
+        lockin = self.lockin
+        lockin.set_capturelen_kbytes(self.buffer_kbytes)
+        rate = float(lockin.get_capturerate())
+        self.writer = CaptureWriter(self.base_path, channels=self.channels, rate=rate,
+                                    metadata=dict(self.metadata, lockin=lockin.get_metadata()))
+        if self.on_start is not None:
+            self.on_start(self.base_path)
+        lockin.capture_data_continuous(channels=self.channels, print_status=False)
+        self.stream = lockin.stream_capture(channels=self.channels)
+        t_start = perf_counter()
+
+        def stop():
+            return not self.is_running or (self.duration is not None and perf_counter() - t_start >= self.duration)
+        try:
+            self.stream.run(self.add_chunk, poll_interval=self.poll_interval, stop=stop)
+        finally:
+            lockin.stop_capture()
+            self.writer.update_metadata(frames_lost=self.frames_lost, capture_restarts=self.stream.restarts, duration=perf_counter() - t_start,
+                                        finished=time.strftime('%Y-%m-%dT%H:%M:%S'))
+            self.writer.close()
+        return self.base_path
+
+    def add_chunk(self, frames):
+        if self.stream.frames_lost > self.frames_lost:
+            # frames overwritten in the lock-in before they were read, keep the time axis right
+            self.writer.append_gap(self.stream.frames_lost - self.frames_lost)
+            self.frames_lost = self.stream.frames_lost
+        self.writer.append(frames)
+        if self.on_chunk is not None:
+            self.on_chunk(frames)
+
+    def stop(self):
+        self.is_running = False
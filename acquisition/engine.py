@@ -0,0 +1,326 @@
+"""
+Headless acquisition engine: runs a sweep recipe without Qt, for unattended batches.
+
+    python -m acquisition.engine recipes/example.ini
+    python -m acquisition.engine recipes/example.ini --simulate
+
+A recipe is an ini file, see recipes/example.ini:
+
+    [sweep]       mode (step, pipelined, fly, adaptive or grid), start, stop, step or an explicit angles list
+    [lockin]      settings (a lockin_params.ini style file) and address
+    [stage]       serial of the rotation mount, home before the sweep
+    [mounts]      further mounts by name (name = serial), connected next to the rotation mount
+    [grid]        axes of a grid sweep, slowest first: mount name = start, stop, step (rotation or a [mounts] name)
+    [acquisition] channels read as RA, RB, burst_samples averaged per angle (step mode), settle_time in s,
+                  closed_loop positioning with backlash and tolerance in degrees (step mode)
+                  channels, burst_samples and settle_time default to the [TUNING] section that
+                  acquisition.filter_tuner writes into the lock-in settings file
+    [output]      directory, name of the sweep files, sample name for the catalog, optional text export path
+"""
+import argparse
+import configparser
+import os
+import time
+
+import numpy as np
+
+from acquisition.adaptive import AdaptiveScan
+from acquisition.flyscan import FlyScan
+from acquisition.gridscan import GridScan, grid_points
+from acquisition.stepscan import PipelinedStepScan, StepScan, capture_channels, step_columns
+from storage.catalog import CATALOG_NAME
+from storage.sweep_writer import SweepWriter
+
+LOCKIN_ADDRESS = 'USB0::0xB506::0x2000::005180::INSTR'
+LOCKIN_SETTINGS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'instruments', 'Lockin', 'lockin_params.ini')
+MODES = ('step', 'pipelined', 'fly', 'adaptive', 'grid')
+
+
+def read_tuning(settings_path):
+    """
+    The channels, burst_samples and settle_time of the [TUNING] section that acquisition.filter_tuner
+    writes into a lock-in settings file, an empty dict if the file has none.
+    """
+    config = configparser.ConfigParser()
+    config.read(settings_path)
+    if not config.has_section('TUNING'):
+        return {}
+    tuning = config['TUNING']
+    return {
+        'channels': tuning.get('channels', 'X, Y'),
+        'burst_samples': tuning.getint('burst_samples', 0),
+        'settle_time': tuning.getfloat('settle_time', None),
+    }
+
+
+def load_recipe(path):
+    """
+    Read a recipe file into a dict of plain values. Paths in the recipe are relative to the recipe file,
+    without an output directory the sweep goes to data/ in the working directory like in the GUI.
+    """
+    config = configparser.ConfigParser()
+    if not config.read(path):
+        raise FileNotFoundError(f"Recipe {path} not found")
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    def resolve(value):
+        return value if os.path.isabs(value) else os.path.normpath(os.path.join(base_dir, value))
+
+    sweep = config['sweep']
+    mode = sweep.get('mode', 'step').strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown sweep mode {mode}, use one of {', '.join(MODES)}")
+    mounts = {'rotation': config.get('stage', 'serial', fallback='27257179')}
+    if config.has_section('mounts'):
+        mounts.update(config['mounts'])
+    axes = None
+    if mode == 'grid':
+        if not config.has_section('grid'):
+            raise ValueError("A grid recipe needs a [grid] section with start, stop, step of every axis")
+        axes = {}
+        for name, value in config['grid'].items():
+            if name not in mounts:
+                raise ValueError(f"Grid axis {name} is not a mount, add it to [mounts] as {name} = <serial>")
+            start, stop, step = (float(v) for v in value.replace(',', ' ').split())
+            axes[name] = [float(p) for p in np.arange(start, stop, step)]
+    lockin_settings = resolve(config.get('lockin', 'settings', fallback=LOCKIN_SETTINGS))
+    tuning = read_tuning(lockin_settings)
+    channels = config.get('acquisition', 'channels', fallback=tuning.get('channels', 'IN1, IN2'))
+    if tuning and capture_channels(channels) != capture_channels(tuning['channels']):
+        # the tuned burst and settle time were measured on other outputs
+        tuning = {}
+    angles = None
+    if 'angles' in sweep:
+        angles = [float(a) for a in sweep['angles'].replace(',', ' ').split()]
+    recipe = {
+        'path': os.path.abspath(path),
+        'mode': mode,
+        'start': sweep.getfloat('start', angles[0] if angles else None),
+        'stop': sweep.getfloat('stop', angles[-1] if angles else None),
+        'step': sweep.getfloat('step', None),
+        'angles': angles,
+        'lockin_settings': lockin_settings,
+        'lockin_address': config.get('lockin', 'address', fallback=LOCKIN_ADDRESS),
+        'serial': mounts['rotation'],
+        'mounts': mounts,
+        'axes': axes,
+        'home': config.getboolean('stage', 'home', fallback=True),
+        'channels': channels,
+        'burst_samples': config.getint('acquisition', 'burst_samples', fallback=tuning.get('burst_samples', 0)),
+        'settle_time': config.getfloat('acquisition', 'settle_time', fallback=tuning.get('settle_time')),
+        'closed_loop': config.getboolean('acquisition', 'closed_loop', fallback=False),
+        'backlash': config.getfloat('acquisition', 'backlash', fallback=0.0),
+        'tolerance': config.getfloat('acquisition', 'tolerance', fallback=0.005),
+        'directory': resolve(config['output']['directory']) if config.has_option('output', 'directory') else 'data',
+        'name': config.get('output', 'name', fallback=''),
+        'sample': config.get('output', 'sample', fallback=''),
+        'text': config.get('output', 'text', fallback=''),
+    }
+    if recipe['step'] is None and (angles is None or mode != 'step') and mode != 'grid':
+        raise ValueError("The recipe needs start, stop and step in [sweep], or an angles list in step mode")
+    if mode == 'step' and recipe['burst_samples'] > 0 and capture_channels(recipe['channels']) is None:
+        raise ValueError(f"Capture bursts cannot record {recipe['channels']}, set channels to X, Y or R, THETA "
+                         f"or burst_samples to 0")
+    if recipe['text']:
+        recipe['text'] = resolve(recipe['text'])
+    return recipe
+
+
+def connect_instruments(recipe, simulate=False):
+    """
+    Connect, home and configure the rotation mount and the lock-in of a recipe, returns (Rmount, lockin).
+    """
+    from instruments.Lockin.SRS865A import LockInAmplifier
+
+    resource_manager = None
+    lib = None
+    if simulate:
+        from instruments.Simulated.SimKDC101 import SimulatedKinesisLib
+        from instruments.Simulated.SimSRS865A import SimulatedResourceManager
+        # one library for all mounts, the simulated lock-in follows the first, the rotation mount
+        lib = SimulatedKinesisLib(serials=tuple(recipe['mounts'].values()))
+        resource_manager = SimulatedResourceManager(angle_source=lib.real_position)
+
+    Rmount = connect_mount(recipe['serial'], recipe['home'], lib=lib)
+
+    lockin = LockInAmplifier(inifile=recipe['lockin_settings'])
+    lockin.open_instrument(instrument_address=recipe['lockin_address'], resource_manager=resource_manager)
+    lockin.initialize_lockin()
+    return Rmount, lockin
+
+
+def connect_mount(serial, home=True, lib=None):
+    from instruments.KDC101.KDC101Controller import KDC101_Rotation
+
+    mount = KDC101_Rotation(serial, lib=lib)
+    mount.connect()
+    if home:
+        mount.home()
+    mount.set_motor_params()
+    return mount
+
+
+def connect_mounts(recipe, mounts):
+    """
+    Connect the [mounts] of a recipe and add them to mounts, {name: mount} holding the connected
+    rotation mount, whose library they share.
+    """
+    for name, serial in recipe['mounts'].items():
+        if name not in mounts:
+            mounts[name] = connect_mount(serial, recipe['home'], lib=mounts['rotation'].lib)
+    return mounts
+
+
+def create_sweep_writer(directory, mode, start, stop, step, lockin=None, mounts=None,
+                        columns=('angle', 'RA', 'RB'), name='', catalog=True, **metadata):
+    """
+    SweepWriter for <directory>/<name or sweep_timestamp>.bin/.json with the sweep parameters
+    and the instrument settings as metadata. With catalog the sweep is added to
+    <directory>/catalog.sqlite when the writer closes, see storage.catalog.
+    """
+    metadata.update({'mode': mode, 'start_angle': start, 'stop_angle': stop, 'step_angle': step})
+    if lockin is not None:
+        metadata['lockin'] = lockin.get_metadata()
+    if mounts:
+        metadata['stages'] = {mount_name: mount.get_metadata() for mount_name, mount in mounts.items()}
+    base_path = os.path.join(directory, name or time.strftime('sweep_%Y%m%d_%H%M%S'))
+    if not name:
+        # sweeps started within the same second get a counter
+        stem, count = base_path, 1
+        while os.path.exists(base_path + '.json'):
+            count += 1
+            base_path = f'{stem}_{count}'
+    catalog_path = os.path.join(directory, CATALOG_NAME) if catalog else None
+    return SweepWriter(base_path, columns=columns, metadata=metadata, catalog_path=catalog_path)
+
+
+class ProgressReporter:
+    """
+    on_point callback that prints the progress at most every interval seconds instead of per point.
+    """
+    def __init__(self, total=None, interval=5.0):
+        self.total = total
+        self.interval = interval
+        self.count = 0
+        self.t_start = time.perf_counter()
+        self.t_last = self.t_start
+
+    def __call__(self, angle, RA, RB):
+        self.count += 1
+        now = time.perf_counter()
+        if now - self.t_last >= self.interval:
+            self.t_last = now
+            rate = self.count / (now - self.t_start)
+            of_total = f"/{self.total}" if self.total else ""
+            print(f"{self.count}{of_total} points, {rate:.1f} points/s, at {angle:.3f} \u00b0")
+
+
+def run_recipe(recipe, Rmount, lockin, on_point=None, quiet=False, mounts=None):
+    """
+    Run the sweep of a recipe with connected instruments and return the base path of the stored sweep.
+    :param mounts: {name: mount} of all connected mounts (see connect_mounts), needed by grid sweeps.
+    """
+    mode = recipe['mode']
+    start, stop, step = recipe['start'], recipe['stop'], recipe['step']
+    mounts = mounts or {'rotation': Rmount}
+    points = None
+    if mode == 'grid':
+        missing = [name for name in recipe['axes'] if name not in mounts]
+        if missing:
+            raise ValueError(f"Grid axes {', '.join(missing)} have no connected mount")
+        points = grid_points(recipe['axes'])
+        columns = (*recipe['axes'], 'RA', 'RB')
+    else:
+        burst = mode == 'step' and recipe['burst_samples'] > 0
+        columns = step_columns(burst, mode == 'step' and recipe['closed_loop'])
+    writer = create_sweep_writer(recipe['directory'], mode, start, stop, step, lockin=lockin,
+                                 mounts=mounts, columns=columns, name=recipe['name'], axes=recipe['axes'],
+                                 recipe=recipe['path'], sample=recipe['sample'],
+                                 channels='X, Y' if mode == 'fly' else recipe['channels'],
+                                 burst_samples=recipe['burst_samples'], angles=recipe['angles'],
+                                 reversed=recipe.get('reversed', False),
+                                 closed_loop=recipe['closed_loop'], backlash=recipe['backlash'],
+                                 tolerance=recipe['tolerance'])
+    if on_point is None and not quiet:
+        if points is not None:
+            total = len(points)
+        else:
+            total = len(recipe['angles']) if recipe['angles'] else len(np.arange(start, stop, step)) if step else None
+        on_point = ProgressReporter(total)
+
+    t_start = time.perf_counter()
+    try:
+        if mode == 'step':
+            scan = StepScan(Rmount, lockin, start, stop, step, on_point=on_point, writer=writer,
+                            burst_samples=recipe['burst_samples'], settle_time=recipe['settle_time'],
+                            angles=recipe['angles'], closed_loop=recipe['closed_loop'],
+                            backlash=recipe['backlash'], tolerance=recipe['tolerance'],
+                            channels=recipe['channels'])
+            num_points = scan.run()
+        elif mode == 'pipelined':
+            scan = PipelinedStepScan(Rmount, lockin, start, stop, step, on_point=on_point,
+                                     settle_time=recipe['settle_time'], channels=recipe['channels'], writer=writer)
+            num_points = scan.run()
+        elif mode == 'adaptive':
+            scan = AdaptiveScan(Rmount, lockin, start, stop, step, on_point=on_point, writer=writer,
+                                settle_time=recipe['settle_time'], channels=recipe['channels'])
+            if isinstance(on_point, ProgressReporter):
+                # refinement adds points up to the point budget
+                on_point.total = scan.max_points
+            num_points = scan.run()
+        elif mode == 'grid':
+            report = on_point
+            scan = GridScan({name: mounts[name] for name in recipe['axes']}, lockin, points, writer=writer,
+                            settle_time=recipe['settle_time'], channels=recipe['channels'],
+                            on_point=(lambda point, RA, RB: report(point[-1], RA, RB)) if report else None)
+            num_points = scan.run()
+        else:
+            angles, channel_data = FlyScan(Rmount, lockin, start, stop, step, channels='XY').run()
+            writer.extend(angles, channel_data['X'], channel_data['Y'])
+            num_points = len(angles)
+    finally:
+        writer.close()
+    if recipe['text']:
+        writer.export_text(recipe['text'])
+    if not quiet:
+        duration = time.perf_counter() - t_start
+        print(f"{mode} sweep of {num_points} points in {duration:.1f} s stored in {writer.base_path}")
+    return writer.base_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run sweep recipes without the GUI.")
+    parser.add_argument('recipes', nargs='+', help="recipe ini files, run one after the other")
+    parser.add_argument('--simulate', action='store_true', help="use the simulated mount and lock-in")
+    parser.add_argument('--quiet', action='store_true', help="no progress output")
+    args = parser.parse_args(argv)
+
+    recipes = [load_recipe(path) for path in args.recipes]
+    mounts = {}
+    lockin = None
+    connected = None
+    try:
+        for recipe in recipes:
+            instruments = (tuple(recipe['mounts'].items()), recipe['lockin_address'], recipe['lockin_settings'],
+                           recipe['home'])
+            if instruments != connected:
+                for mount in mounts.values():
+                    mount.disconnect()
+                if lockin is not None:
+                    lockin.close_instrument()
+                mounts, lockin = {}, None
+                Rmount, lockin = connect_instruments(recipe, simulate=args.simulate)
+                mounts = {'rotation': Rmount}
+                connect_mounts(recipe, mounts)
+                connected = instruments
+            run_recipe(recipe, mounts['rotation'], lockin, quiet=args.quiet, mounts=mounts)
+    finally:
+        for mount in mounts.values():
+            mount.disconnect()
+        if lockin is not None:
+            lockin.close_instrument()
+
+
+if __name__ == '__main__':
+    main()
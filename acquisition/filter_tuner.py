@@ -0,0 +1,350 @@
+"""
+Lock-in filter tuner: finds the time constant, filter slope and sensitivity that give the most
+step sweep points per minute while every point still reaches a target signal to noise ratio.
+
+At a test angle (on the steepest part of the curve) the tuner first measures the signal level and
+the change of the signal over one sweep step, and sets the sensitivity to the smallest range that
+holds the signal with headroom. Then for every candidate time constant and filter slope:
+
+- noise: a capture burst at the test angle, the SNR of averaging n consecutive samples is taken
+  from the scatter of the block means, so correlated samples count for what they are worth
+- settling: the filter only has to settle until what is left of the step is below the noise of
+  a point, which gives the settle time of the filter order. The stage then steps from the
+  neighbouring angle onto the test angle, waits that long and takes a point; a point off by more
+  than three times its noise doubles the settle time and the step is repeated
+- readout: the time of a single reading or of a capture burst of n samples
+
+Points are taken like StepScan takes them, from the same two lock-in outputs: the channels of the
+recipe, which the capture has to be able to record (X, Y or R, THETA). The time constant and slope
+filter the demodulated outputs only, the aux inputs IN1, IN2 cannot be tuned. The channels tuned
+are written to the [TUNING] section of the profile. A recipe whose [lockin] settings is the profile
+takes its channels, burst_samples and settle_time from there unless [acquisition] sets them.
+
+The time per point is the measured move of one step, the settle time and the readout. Candidates
+whose move and settle time alone are longer than the best point found so far are not measured.
+
+    python -m acquisition.filter_tuner recipes/example.ini --angle 56 --snr 200 --output tuned.ini
+    python -m acquisition.filter_tuner recipes/example.ini --angle 56 --snr 200 --apply --simulate --channels "X, Y"
+"""
+import argparse
+import configparser
+import math
+import time
+from time import perf_counter
+
+import numpy as np
+
+from acquisition.engine import connect_instruments, load_recipe
+from acquisition.stepscan import capture_channels
+
+
+def settle_time_constants(order, fraction):
+    """
+    Number of time constants for the step response of order cascaded RC filters to settle within
+    fraction of the step, e.g. 6.6 for 12 dB/oct (order 2) and 1%.
+    """
+    fraction = min(max(fraction, 1e-9), 1.0)
+
+    def remaining(x):
+        return math.exp(-x) * sum(x ** j / math.factorial(j) for j in range(order))
+
+    low, high = 0.0, 1.0
+    while remaining(high) > fraction:
+        high *= 2
+    for _ in range(50):
+        middle = (low + high) / 2
+        if remaining(middle) > fraction:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def time_constant_seconds(key):
+    value, unit = key.split()
+    return float(value) * {'us': 1e-6, 'ms': 1e-3, 's': 1.0, 'ks': 1e3}[unit]
+
+
+def sensitivity_volts(key):
+    value, unit = key.split()
+    return float(value) * {'nV': 1e-9, 'uV': 1e-6, 'mV': 1e-3, 'V': 1.0}[unit]
+
+
+class FilterTuner:
+    """
+    Measures candidate filter settings of a LockInAmplifier at a test angle and recommends the
+    fastest one that meets the SNR target, see the module docstring.
+    """
+    slopes = ('6 dB', '12 dB', '18 dB', '24 dB')
+    # blocks needed to estimate the noise of the block means
+    min_blocks = 8
+    readout_repeats = 5
+
+    def __init__(self, lockin, Rmount=None, angle=None, step=0.1, snr=100.0, min_time_constant='10 us',
+                 max_time_constant='300 ms', headroom=2.0, capture_time=1.0, max_samples=4096, max_retries=3,
+                 channels='X, Y'):
+        """
+        :param Rmount: Rotation mount for the settling check and the move time, None measures noise only.
+        :param angle: Test angle (°), defaults to the current position of the mount.
+        :param step: Angle step (°) of the sweeps the settings are tuned for.
+        :param snr: Signal to noise ratio every point has to reach, on both channels.
+        :param min_time_constant: Shortest time constant tried, a key of LockInAmplifier.time_constant_dict.
+        :param max_time_constant: Longest time constant tried.
+        :param headroom: Full scale of the chosen sensitivity over the signal at the test angle.
+        :param capture_time: Longest noise capture (s) per candidate.
+        :param max_samples: Largest noise capture (samples) per candidate.
+        :param max_retries: Times the settle time is doubled before a candidate is given up.
+        :param channels: The two lock-in outputs the sweeps store, a SNAP? channel list the capture can record.
+        """
+        if capture_channels(channels) is None:
+            raise ValueError(f"The filter settings act on the demodulated outputs only and {channels} cannot be "
+                             f"captured, tune channels 'X, Y' or 'R, THETA'")
+        self.lockin = lockin
+        self.Rmount = Rmount
+        self.angle = angle
+        self.step = step
+        self.snr = snr
+        keys = list(lockin.time_constant_dict)
+        self.time_constants = keys[keys.index(min_time_constant):keys.index(max_time_constant) + 1]
+        self.headroom = headroom
+        self.capture_time = capture_time
+        self.max_samples = max_samples
+        self.max_retries = max_retries
+        self.channels = channels
+        self.capture_channels = capture_channels(channels)
+        self.results = []
+        self.best = None
+        self.level = None
+        self.step_change = None
+        self.sensitivity = None
+        self.step_move_time = 0.0
+        self.original = None
+
+    def run(self, apply=False):
+        """
+        Measure the candidates and return the best result (None if no candidate meets the SNR).
+        The lock-in keeps the best settings with apply, otherwise its settings are restored.
+        """
+        lockin = self.lockin
+        self.original = {m: lockin.query_setting(m) for m in ('SCAL', 'OFLT', 'OFSL')}
+        if self.Rmount is not None:
+            if self.angle is None:
+                self.angle = self.Rmount.position
+            self.Rmount.move_absolute(self.angle)
+        try:
+            self.measure_signal()
+            for time_constant in self.time_constants:
+                tau = time_constant_seconds(time_constant)
+                for slope in self.slopes:
+                    if self.best is not None and self.lower_bound(tau, slope) >= self.best['time_per_point']:
+                        continue
+                    result = self.measure(time_constant, slope)
+                    self.results.append(result)
+                    if result['ok'] and (self.best is None or result['time_per_point'] < self.best['time_per_point']):
+                        self.best = result
+        finally:
+            if apply and self.best is not None:
+                lockin.configure({'SCAL': self.sensitivity, 'OFLT': self.best['time_constant'],
+                                  'OFSL': self.best['slope']})
+            else:
+                lockin.configure(self.original)
+        return self.best
+
+    def wait_settled(self):
+        # well past 1%, the reference measurements must not carry any of the previous step
+        time.sleep(2 * self.lockin.get_settle_time())
+
+    def measure_signal(self):
+        """
+        Signal level at the test angle and its change over one step, with the settings the lock-in has,
+        then the sensitivity for that level.
+        """
+        lockin = self.lockin
+        self.wait_settled()
+        mean = lockin.burst_capture(64, channels=self.capture_channels)[0]
+        self.level = np.abs(mean)
+        if self.Rmount is not None and self.step:
+            self.Rmount.move_absolute(self.angle + self.step)
+            self.wait_settled()
+            neighbour = lockin.burst_capture(64, channels=self.capture_channels)[0]
+            t = perf_counter()
+            self.Rmount.move_absolute(self.angle)
+            self.step_move_time = perf_counter() - t
+            self.step_change = np.abs(neighbour - mean)
+        else:
+            self.step_change = np.zeros_like(self.level)
+        full_scales = {key: sensitivity_volts(key) for key in lockin.sensitivity_dict}
+        wanted = self.headroom * self.level.max()
+        fitting = [key for key, full_scale in full_scales.items() if full_scale >= wanted]
+        key = min(fitting, key=full_scales.get) if fitting else '1 V'
+        self.sensitivity = lockin.sensitivity_dict[key]
+        lockin.set_sensitivity(*key.split())
+
+    def settle_fraction(self):
+        """
+        Fraction of the step change that may be left when the point is taken: the noise of a point.
+        """
+        change = self.step_change.max()
+        if change <= 0:
+            return 1.0
+        return min(1.0, (self.level.min() / self.snr) / change)
+
+    def lower_bound(self, tau, slope):
+        """
+        Time per point of a candidate without its readout, known before measuring it.
+        """
+        order = self.slopes.index(slope) + 1
+        return self.step_move_time + settle_time_constants(order, self.settle_fraction()) * tau
+
+    def measure(self, time_constant, slope):
+        lockin = self.lockin
+        lockin.set_timeconstant(*time_constant.split())
+        lockin.set_filterslope(*slope.split())
+        tau = time_constant_seconds(time_constant)
+        result = {'time_constant': lockin.time_constant_dict[time_constant], 'time_constant_key': time_constant,
+                  'slope': lockin.filter_dict[slope], 'slope_key': slope, 'ok': False}
+        self.wait_settled()
+
+        # noise of the mean of n consecutive samples, n = 1, 2, 4, ...
+        rate = float(lockin.get_capturerate())
+        num_samples = int(min(self.max_samples, max(self.min_blocks * 2, rate * self.capture_time)))
+        mean, std, samples = lockin.burst_capture(num_samples, channels=self.capture_channels, return_samples=True)
+        level = np.abs(mean)
+        burst_samples = None
+        n = 1
+        while len(samples) // n >= self.min_blocks:
+            blocks = samples[:len(samples) // n * n].reshape(-1, n, samples.shape[1]).mean(axis=1, dtype=np.float64)
+            noise = blocks.std(axis=0, ddof=1)
+            snr = np.min(level / np.maximum(noise, 1e-30))
+            if snr >= self.snr:
+                burst_samples, point_noise, result['snr'] = n, noise, float(snr)
+                break
+            n *= 2
+        if burst_samples is None:
+            result['snr'] = float(snr)
+            return result
+        result['burst_samples'] = 0 if burst_samples == 1 else burst_samples
+        result['capture_rate'] = rate
+
+        # readout of one point
+        t = perf_counter()
+        for _ in range(self.readout_repeats):
+            self.read_point(result['burst_samples'])
+        result['readout_time'] = (perf_counter() - t) / self.readout_repeats
+
+        settle_time = settle_time_constants(self.slopes.index(slope) + 1, self.settle_fraction()) * tau
+        if self.Rmount is not None and self.step:
+            # step onto the test angle like a sweep does and check the point against the settled mean
+            for _ in range(self.max_retries + 1):
+                self.Rmount.move_absolute(self.angle + self.step)
+                self.wait_settled()
+                t = perf_counter()
+                self.Rmount.move_absolute(self.angle)
+                self.step_move_time = perf_counter() - t
+                time.sleep(settle_time)
+                point = self.read_point(result['burst_samples'])
+                if np.all(np.abs(point - mean) <= 3 * point_noise):
+                    break
+                settle_time *= 2
+            else:
+                result['settle_time'] = settle_time
+                return result
+        result['settle_time'] = settle_time
+        result['move_time'] = self.step_move_time
+        result['time_per_point'] = result['move_time'] + settle_time + result['readout_time']
+        result['points_per_minute'] = 60.0 / result['time_per_point']
+        result['ok'] = True
+        return result
+
+    def read_point(self, burst_samples):
+        """
+        A point the way StepScan takes it: both channels with one SNAP?, or the mean of a burst.
+        """
+        if burst_samples:
+            return self.lockin.burst_capture(burst_samples, channels=self.capture_channels)[0]
+        return np.array(self.lockin.get_multiple_channel_data(self.channels)[:2])
+
+    def write_profile(self, path):
+        """
+        Write the lock-in ini file with the tuned sensitivity, time constant and filter slope,
+        plus a [TUNING] section with what the recommendation is based on.
+        """
+        if self.best is None:
+            raise ValueError("No candidate met the SNR target, nothing to write")
+        profile = configparser.ConfigParser()
+        profile.read_dict(self.lockin.config)
+        sensitivity = list(self.lockin.sensitivity_dict)[self.sensitivity].split()
+        profile['SENSITIVITY']['val'], profile['SENSITIVITY']['unit'] = sensitivity
+        profile['TIME CONSTANT']['val'], profile['TIME CONSTANT']['unit'] = self.best['time_constant_key'].split()
+        profile['FILTER']['val'] = self.best['slope_key'].split()[0]
+        best = self.best
+        profile['TUNING'] = {
+            'angle': f"{self.angle:.4f}" if self.angle is not None else '',
+            'step': str(self.step),
+            'channels': self.channels,
+            'snr_target': str(self.snr),
+            'snr': f"{best['snr']:.1f}",
+            'burst_samples': str(best['burst_samples']),
+            'settle_time': f"{best['settle_time']:.6f}",
+            'time_per_point': f"{best['time_per_point']:.6f}",
+            'points_per_minute': f"{best['points_per_minute']:.1f}",
+        }
+        with open(path, 'w') as f:
+            profile.write(f)
+
+    def print_report(self):
+        print(f"{'time constant':<15}{'slope':<8}{'SNR':>9}{'burst':>7}{'settle ms':>11}{'readout ms':>12}"
+              f"{'points/min':>12}")
+        for result in self.results:
+            if result['ok']:
+                print(f"{result['time_constant_key']:<15}{result['slope_key']:<8}{result['snr']:9.1f}"
+                      f"{result['burst_samples']:7d}{result['settle_time'] * 1000:11.3f}"
+                      f"{result['readout_time'] * 1000:12.3f}{result['points_per_minute']:12.1f}")
+            else:
+                print(f"{result['time_constant_key']:<15}{result['slope_key']:<8}{result['snr']:9.1f}"
+                      f"{'fails':>7}")
+        if self.best is None:
+            print(f"No candidate reaches an SNR of {self.snr}.")
+        else:
+            best = self.best
+            print(f"Best for {self.channels}: {best['time_constant_key']}, {best['slope_key']}, burst_samples {best['burst_samples']}, "
+                  f"settle_time {best['settle_time']:.4f} s, {best['points_per_minute']:.1f} points/min")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the fastest lock-in filter settings meeting an SNR target.")
+    parser.add_argument('recipe', help="recipe ini file with the instruments and the lock-in settings to start from")
+    parser.add_argument('--angle', type=float, help="test angle, defaults to the start of the sweep")
+    parser.add_argument('--step', type=float, help="sweep step, defaults to the step of the recipe")
+    parser.add_argument('--snr', type=float, default=100.0, help="signal to noise ratio every point has to reach")
+    parser.add_argument('--min-tc', default='10 us', help="shortest time constant tried, e.g. '10 us'")
+    parser.add_argument('--max-tc', default='300 ms', help="longest time constant tried, e.g. '300 ms'")
+    parser.add_argument('--channels', help="lock-in outputs to tune, e.g. 'X, Y', defaults to the channels of the recipe")
+    parser.add_argument('--output', help="write the tuned settings to this lock-in ini profile")
+    parser.add_argument('--apply', action='store_true', help="leave the lock-in at the tuned settings")
+    parser.add_argument('--simulate', action='store_true', help="use the simulated mount and lock-in")
+    args = parser.parse_args(argv)
+
+    recipe = load_recipe(args.recipe)
+    channels = args.channels or recipe['channels']
+    if capture_channels(channels) is None:
+        parser.error(f"the filter settings cannot be tuned for {channels}, only for the demodulated outputs, "
+                     f"use e.g. --channels 'X, Y'")
+    Rmount, lockin = connect_instruments(recipe, simulate=args.simulate)
+    try:
+        angle = args.angle if args.angle is not None else recipe['start']
+        step = args.step if args.step is not None else recipe['step'] or 0.0
+        tuner = FilterTuner(lockin, Rmount, angle=angle, step=step, snr=args.snr,
+                            min_time_constant=args.min_tc, max_time_constant=args.max_tc, channels=channels)
+        tuner.run(apply=args.apply)
+        tuner.print_report()
+        if args.output and tuner.best is not None:
+            tuner.write_profile(args.output)
+            print(f"Profile written to {args.output}")
+    finally:
+        Rmount.disconnect()
+        lockin.close_instrument()
+
+
+if __name__ == '__main__':
+    main()
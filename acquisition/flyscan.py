@@ -0,0 +1,165 @@
+import time
+from time import perf_counter
+
+import numpy as np
+
+from instruments.motion_profile import move_duration, trapezoid_profile
+
+
+def map_samples_to_angle(sample_times, poll_times, poll_positions, profile=None):
+    """
+    Angle of each capture sample from the polled stage positions.
+    Samples outside the polled time window fall back to the velocity profile (a callable of time) if given.
+    """
+    sample_times = np.asarray(sample_times, dtype=float)
+    poll_times = np.asarray(poll_times, dtype=float)
+    poll_positions = np.asarray(poll_positions, dtype=float)
+    if len(poll_times):
+        # the DLL updates the position once per device poll, reads in between repeat it: keep the first
+        # read of every value, the closest to when the device took it
+        new_value = np.concatenate(([True], np.diff(poll_positions) != 0))
+        poll_times, poll_positions = poll_times[new_value], poll_positions[new_value]
+    if len(poll_times) < 2:
+        return profile(sample_times)
+    angles = np.interp(sample_times, poll_times, poll_positions)
+    if profile is not None:
+        outside = (sample_times < poll_times[0]) | (sample_times > poll_times[-1])
+        angles[outside] = profile(sample_times[outside])
+    return angles
+
+
+def fly_capture_rate(step_angle, rate_max, max_velocity):
+    """
+    (n, rate, velocity) of the fastest capture rate rate_max / 2**n (n = 0..20, see
+    LockInAmplifier.set_capturerate) whose velocity = step_angle * rate stays within max_velocity,
+    so the samples are step_angle apart. ValueError if even the slowest rate is too fast.
+    """
+    for n in range(21):
+        rate = rate_max / 2 ** n
+        velocity = step_angle * rate
+        if velocity <= max_velocity:
+            return n, rate, velocity
+    raise ValueError(f"A step of {step_angle}\u00b0 needs more than {max_velocity}\u00b0/s at every capture rate")
+
+
+class FlyScan:
+    """
+    Continuous motion sweep: the stage makes one long move at constant velocity while
+    the lock-in captures into its internal buffer. Samples are mapped to angles afterwards.
+    The capture rate is set so that the velocity over the rate is the step, and the move starts
+    and ends a ramp length outside start and stop, so [start, stop] is crossed at constant
+    velocity. Only the samples within [start, stop] are returned.
+    """
+    max_capture_kbytes = 4096
+    start_margin = 0.5  # s of extra capture for the latency between starting the capture and the move
+
+    def __init__(self, Rmount, lockin, start_angle, stop_angle, step_angle, channels='XY',
+                 acceleration=None, max_velocity=25.0, trigger='immediate', poll_interval=0.02):
+        """
+        :param step_angle: The desired angle between two samples (°), sets the capture rate and the stage velocity.
+        :param trigger: 'immediate' starts the capture from software, 'trigstart' waits for the
+            trigger input, which should be wired to the stage trigger output at move start.
+        :param poll_interval: Time (s) between position reads during the move, only used when
+            the mount has no position poller running.
+        """
+        self.Rmount = Rmount
+        self.lockin = lockin
+        self.start_angle = start_angle
+        self.stop_angle = stop_angle
+        self.step_angle = abs(step_angle)
+        self.channels = channels
+        self.acceleration = acceleration
+        self.max_velocity = max_velocity
+        self.trigger = trigger
+        self.poll_interval = poll_interval
+        self.is_running = True
+        self.poll_times = []
+        self.poll_positions = []
+
+    def run(self):
+        """
+        Run the sweep and return (angles, channel_data) where channel_data maps each
+        capture channel to a numpy array. The stage velocity is restored afterwards.
+        """
+        previous_velocity, previous_acceleration = self.Rmount.get_vel_params()
+        try:
+            return self.fly()
+        finally:
+            self.Rmount.set_velocity(previous_velocity, previous_acceleration)
+
+    def fly(self):
+        rate_n, capture_rate, velocity = fly_capture_rate(self.step_angle, float(self.lockin.get_captureratemax()),
+                                                          self.max_velocity)
+        self.lockin.set_capturerate(rate_n)
+        capture_rate = float(self.lockin.get_capturerate())
+        self.Rmount.set_velocity(velocity, self.acceleration)
+        velocity, acceleration = self.Rmount.get_vel_params()
+        step = velocity / capture_rate
+        if abs(step - self.step_angle) > 0.01 * self.step_angle:
+            print(f"Fly scan samples are {step:.6f}\u00b0 apart instead of {self.step_angle}\u00b0, "
+                  f"the stage runs at {velocity:.4f}\u00b0/s with {capture_rate:.1f} samples/s.")
+
+        # run up to the velocity before start and slow down after stop
+        direction = 1.0 if self.stop_angle >= self.start_angle else -1.0
+        ramp = velocity ** 2 / (2 * acceleration) if acceleration > 0 else 0.0
+        move_start = self.start_angle - direction * ramp
+        move_stop = self.stop_angle + direction * ramp
+        self.Rmount.move_absolute(move_start)
+        if not self.is_running:
+            return np.empty(0), {channel: np.empty(0, dtype=np.float32) for channel in self.channels}
+
+        distance = move_stop - move_start
+        duration = move_duration(distance, velocity, acceleration)
+        num_points = int(np.ceil((duration + self.start_margin) * capture_rate)) + 1
+        if num_points * len(self.channels) * 4 / 1024 > self.max_capture_kbytes:
+            raise ValueError("Fly scan does not fit in the capture buffer, increase the step or lower the capture rate")
+        self.lockin.set_capturelen_and_channel(num_points, channels=self.channels)
+
+        move_timeout = duration * 1.5 + 2.0
+        if self.trigger == 'trigstart':
+            self.lockin.capture_data_trig_start(channels=self.channels)
+            move = self.Rmount.move_absolute_async(move_stop, timeout=move_timeout)
+            t_move = t_capture = perf_counter()
+        else:
+            self.lockin.start_capture(mode="immediate")
+            t_capture = perf_counter()
+            move = self.Rmount.move_absolute_async(move_stop, timeout=move_timeout)
+            t_move = perf_counter()
+
+        self.poll_times = []
+        self.poll_positions = []
+        poller = getattr(self.Rmount, 'poller', None)
+        while self.is_running and not move.done():
+            if poller is None:
+                position = self.Rmount.position
+                self.poll_times.append(perf_counter() - t_move)
+                self.poll_positions.append(position)
+            time.sleep(self.poll_interval)
+        if not self.is_running:
+            # stop() may have come before the move started
+            self.Rmount.stop_profiled()
+        move.result()
+        self.lockin.stop_capture()
+        if poller is not None:
+            # the background poller already recorded the positions during the move
+            times, self.poll_positions = poller.history(since=t_move)
+            self.poll_times = [t - t_move for t in times]
+
+        channel_data = self.lockin.retrieve_capture(num_points, channels=self.channels)
+        num_samples = min(len(v) for v in channel_data.values())
+        sample_times = (t_capture - t_move) + np.arange(num_samples) / capture_rate
+
+        def profile(t):
+            return trapezoid_profile(t, move_start, move_stop, velocity, acceleration)
+
+        angles = map_samples_to_angle(sample_times, self.poll_times, self.poll_positions, profile)
+        low, high = sorted((self.start_angle, self.stop_angle))
+        in_range = (sample_times >= 0) & (sample_times <= duration) & (angles >= low) & (angles <= high)
+        return angles[in_range], {channel: np.asarray(v[:num_samples][in_range]) for channel, v in channel_data.items()}
+
+    def stop(self):
+        """
+        Stop the stage, the samples captured up to there are returned.
+        """
+        self.is_running = False
+        self.Rmount.stop_profiled()
@@ -0,0 +1,68 @@
+import time
+import numpy as np
+
+
+def grid_points(axes):
+    """
+    Set points of a full N-dimensional grid, axes is {name: positions} with the slowest axis first.
+    The faster axes run back and forth (serpentine order) so consecutive points are neighbours.
+    Returns an array with one row per point and one column per axis.
+    """
+    positions = [np.asarray(p, dtype=float) for p in axes.values()]
+    path = [[p] for p in positions[-1]]
+    for axis_positions in reversed(positions[:-1]):
+        path = [[p] + q for j, p in enumerate(axis_positions) for q in (path if j % 2 == 0 else path[::-1])]
+    return np.array(path).reshape(-1, len(positions))
+
+
+class GridScan:
+    """
+    Step scan over any number of named mounts. At each N-dimensional point all axes that
+    have to move are started together, so a point costs the slowest axis. The lock-in is
+    read once the filter settled and the point is streamed to the writer and on_point.
+    """
+    def __init__(self, mounts, lockin, points, on_point=None, writer=None, settle_time=None,
+                 channels='IN1, IN2'):
+        """
+        :param mounts: {name: KDC101_Rotation}, the column order of points.
+        :param points: Array (num_points, num_axes) of set points, e.g. from grid_points.
+        :param on_point: Called as on_point(point, RA, RB) for every point.
+        :param writer: SweepWriter with one column per axis followed by RA and RB.
+        """
+        self.mounts = mounts
+        self.lockin = lockin
+        self.points = np.asarray(points, dtype=float).reshape(-1, len(mounts))
+        self.on_point = on_point
+        self.writer = writer
+        self.settle_time = settle_time
+        self.channels = channels
+        self.is_running = True
+        self.num_points = 0
+
+    def run(self):
+        if self.settle_time is None:
+            self.settle_time = self.lockin.get_settle_time() if self.lockin is not None else 0.0
+        current = [None] * len(self.mounts)
+        for point in self.points:
+            if not self.is_running:
+                break
+            moves = [mount.move_absolute_async(target)
+                     for mount, target, previous in zip(self.mounts.values(), point, current)
+                     if target != previous]
+            for move in moves:
+                move.result()
+            current = list(point)
+            time.sleep(self.settle_time)
+            if self.lockin is not None:
+                RA, RB = self.lockin.get_multiple_channel_data(self.channels)[:2]
+            else:
+                RA, RB = 1, 1
+            if self.writer is not None:
+                self.writer.append(*point, RA, RB)
+            self.num_points += 1
+            if self.on_point is not None:
+                self.on_point(tuple(point), RA, RB)
+        return self.num_points
+
+    def stop(self):
+        self.is_running = False
@@ -0,0 +1,279 @@
+"""
+Queue of sweep recipes run one after the other on a background thread.
+
+The next job is always chosen among the jobs that share the current lock-in settings, so the
+lock-in is reconfigured and its filter re-settles once per group of settings. Within a group
+the job (and the direction it is swept in) with the shortest travel from the current stage
+position goes next, which makes consecutive sweeps alternate direction. Every job gets a time
+estimate before it starts, the report compares it with the time it actually took.
+
+    python -m acquisition.scheduler recipes/a.ini recipes/b.ini ... [--simulate] [--plan]
+
+The queue runs from the command line (or SweepQueue in a script) with the instruments to itself,
+the GUI does not drive it: its sweeps would share the mount with the queue.
+"""
+import argparse
+import threading
+import time
+from time import perf_counter
+
+import numpy as np
+
+from acquisition.engine import connect_instruments, load_recipe, run_recipe
+from acquisition.flyscan import FlyScan, fly_capture_rate
+from instruments.motion_profile import move_duration
+
+
+def sweep_angles(recipe):
+    if recipe['angles'] is not None:
+        return np.asarray(recipe['angles'], dtype=float)
+    return np.arange(recipe['start'], recipe['stop'], recipe['step'])
+
+
+def reversed_recipe(recipe):
+    """
+    The recipe swept from its last angle back to its first, None for adaptive sweeps.
+    """
+    mode = recipe['mode']
+    if mode == 'adaptive':
+        return None
+    reverse = dict(recipe, reversed=True)
+    if mode == 'fly':
+        reverse['start'], reverse['stop'] = recipe['stop'], recipe['start']
+        return reverse
+    angles = sweep_angles(recipe)
+    if mode == 'step':
+        reverse['angles'] = [float(a) for a in angles[::-1]]
+    else:
+        # same points as the forward sweep: arange from the last angle down to just past the first
+        reverse['start'], reverse['stop'], reverse['step'] = angles[-1], angles[0] - recipe['step'] / 2, -recipe['step']
+    return reverse
+
+
+def end_points(recipe):
+    """
+    (first, last) angle the stage visits during the sweep.
+    """
+    if recipe['mode'] == 'fly':
+        return recipe['start'], recipe['stop']
+    angles = sweep_angles(recipe)
+    return angles[0], angles[-1]
+
+
+class SweepJob:
+    """
+    A recipe in the queue, with the lock-in settings of its ini file for grouping and estimates.
+    """
+    def __init__(self, recipe):
+        from instruments.Lockin.SRS865A import LockInAmplifier
+        self.recipe = recipe
+        self.name = recipe['name'] or recipe['path']
+        settings = LockInAmplifier(inifile=recipe['lockin_settings'])
+        self.settings = tuple(sorted(settings.config_settings().items()))
+        self.settle_time = settings.config_settle_time()
+        self.orientations = [recipe] + [r for r in [reversed_recipe(recipe)] if r is not None]
+
+
+class SweepQueue:
+    """
+    Runs queued SweepJobs with connected instruments on a background thread.
+    Jobs can be added while the queue runs.
+    """
+    # rough costs (s) used by the estimates
+    reconfigure_time = 0.05
+    readout_time = 0.005
+
+    def __init__(self, Rmount, lockin, quiet=True):
+        self.Rmount = Rmount
+        self.lockin = lockin
+        self.quiet = quiet
+        self.pending = []
+        self.results = []
+        self.current_settings = None
+        # capture rate seen with each group of settings, the rate follows the time constant
+        self.capture_rates = {}
+        self.lock = threading.Lock()
+        self.is_running = False
+        self.thread = None
+
+    def add(self, recipe):
+        """
+        Queue a recipe dict (see acquisition.engine.load_recipe) or the path of a recipe file.
+        """
+        if isinstance(recipe, str):
+            recipe = load_recipe(recipe)
+        if recipe['mode'] == 'grid':
+            raise ValueError(f"{recipe['path']}: grid sweeps need their own mounts, run them with acquisition.engine")
+        job = SweepJob(recipe)
+        with self.lock:
+            self.pending.append(job)
+        return job
+
+    def estimate(self, job, recipe, position, settings, velocity, acceleration, capture_rate):
+        """
+        Estimated duration (s) of running recipe of job from position with the lock-in set to settings,
+        including travel and reconfiguration.
+        """
+        first, last = end_points(recipe)
+        estimate = move_duration(first - position, velocity, acceleration)
+        if job.settings != settings:
+            estimate += self.reconfigure_time + job.settle_time
+        mode = recipe['mode']
+        settle_time = recipe['settle_time']
+        capture_rate = self.capture_rates.get(job.settings, capture_rate)
+        if mode == 'fly':
+            # the fly scan picks a capture rate of CAPTURERATEMAX / 2**n, the current rate is one of those
+            fly_velocity = fly_capture_rate(abs(recipe['step']), capture_rate * 2 ** 20, 25.0)[2]
+            ramp = fly_velocity ** 2 / acceleration if acceleration > 0 else 0.0
+            return estimate + move_duration(abs(last - first) + ramp, fly_velocity, acceleration) + FlyScan.start_margin
+        if mode == 'adaptive':
+            # the default point budget of AdaptiveScan, four times its coarse grid
+            num_points = 4 * len(sweep_angles(recipe))
+            step = abs(recipe['step']) / 4
+        else:
+            num_points = len(sweep_angles(recipe))
+            step = abs(recipe['step']) if recipe['step'] else abs(last - first) / max(num_points - 1, 1)
+        if settle_time is None:
+            burst = mode == 'step' and recipe['burst_samples'] > 0
+            settle_time = job.settle_time if burst or mode != 'step' else 0.0
+        per_point = move_duration(step, velocity, acceleration) + settle_time + self.readout_time
+        if mode == 'step' and recipe['burst_samples'] > 0:
+            per_point += recipe['burst_samples'] / capture_rate
+        if mode == 'pipelined':
+            per_point = max(move_duration(step, velocity, acceleration), self.readout_time) + settle_time
+        return estimate + num_points * per_point
+
+    def next_job(self, pending, position, settings, velocity, acceleration, capture_rate):
+        """
+        Pick (job, recipe, estimate) among pending: the jobs with the current lock-in settings
+        first, then the shortest estimate over both sweep directions.
+        """
+        candidates = [job for job in pending if job.settings == settings] or pending
+        best = None
+        for job in candidates:
+            for recipe in job.orientations:
+                estimate = self.estimate(job, recipe, position, settings, velocity, acceleration, capture_rate)
+                if best is None or estimate < best[2]:
+                    best = (job, recipe, estimate)
+        return best
+
+    def plan(self):
+        """
+        The order run() would take with the current pending jobs, as a list of (job, recipe, estimate).
+        """
+        position = self.Rmount.position
+        velocity, acceleration = self.Rmount.get_vel_params()
+        capture_rate = float(self.lockin.get_capturerate())
+        with self.lock:
+            pending, settings = list(self.pending), self.current_settings
+        planned = []
+        while pending:
+            job, recipe, estimate = self.next_job(pending, position, settings, velocity, acceleration, capture_rate)
+            planned.append((job, recipe, estimate))
+            pending.remove(job)
+            settings = job.settings
+            position = end_points(recipe)[1]
+        return planned
+
+    def run_job(self, job, recipe, estimate):
+        t_start = perf_counter()
+        if job.settings != self.current_settings:
+            self.lockin.load_settings_file(recipe['lockin_settings'])
+            self.lockin.initialize_lockin()
+            self.current_settings = job.settings
+            time.sleep(job.settle_time)
+        base_path = run_recipe(recipe, self.Rmount, self.lockin, quiet=self.quiet)
+        result = {'name': job.name, 'mode': recipe['mode'], 'reversed': recipe.get('reversed', False),
+                  'estimated': estimate, 'actual': perf_counter() - t_start, 'base_path': base_path}
+        self.results.append(result)
+        print(f"{job.name}: estimated {estimate:.1f} s, took {result['actual']:.1f} s")
+        return result
+
+    def run(self):
+        """
+        Run the pending jobs in the scheduled order until none is left or stop() is called.
+        """
+        self.is_running = True
+        while self.is_running:
+            # read the stage and lock-in state again before every job
+            velocity, acceleration = self.Rmount.get_vel_params()
+            capture_rate = float(self.lockin.get_capturerate())
+            if self.current_settings is not None:
+                self.capture_rates[self.current_settings] = capture_rate
+            position = self.Rmount.position
+            with self.lock:
+                if not self.pending:
+                    break
+                job, recipe, estimate = self.next_job(self.pending, position, self.current_settings,
+                                                      velocity, acceleration, capture_rate)
+                self.pending.remove(job)
+            try:
+                self.run_job(job, recipe, estimate)
+            except Exception as e:
+                print(f"Error in {job.name}: {e}")
+                self.results.append({'name': job.name, 'mode': recipe['mode'], 'error': str(e),
+                                     'estimated': estimate, 'actual': None, 'base_path': None})
+        self.is_running = False
+        return self.results
+
+    def start(self):
+        """
+        Run the queue on a background thread.
+        """
+        self.thread = threading.Thread(target=self.run, daemon=True, name="sweep-queue")
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        """
+        Finish the running job and do not start another.
+        """
+        self.is_running = False
+
+    def wait(self):
+        if self.thread is not None:
+            self.thread.join()
+
+    def print_report(self):
+        print(f"{'job':<40}{'mode':<11}{'direction':<11}{'estimated s':>12}{'actual s':>10}")
+        total_estimated = total_actual = 0.0
+        for result in self.results:
+            direction = 'reverse' if result.get('reversed') else 'forward'
+            actual = f"{result['actual']:10.1f}" if result['actual'] is not None else f"{'failed':>10}"
+            print(f"{result['name'][-39:]:<40}{result['mode']:<11}{direction:<11}{result['estimated']:12.1f}{actual}")
+            total_estimated += result['estimated']
+            total_actual += result['actual'] or 0.0
+        print(f"{'total':<62}{total_estimated:12.1f}{total_actual:10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a queue of sweep recipes in an optimized order.")
+    parser.add_argument('recipes', nargs='+', help="recipe ini files")
+    parser.add_argument('--simulate', action='store_true', help="use the simulated mount and lock-in")
+    parser.add_argument('--plan', action='store_true', help="only print the order and the estimates")
+    parser.add_argument('--verbose', action='store_true', help="progress output of every sweep")
+    args = parser.parse_args(argv)
+
+    recipes = [load_recipe(path) for path in args.recipes]
+    # all jobs run on the instruments of the first recipe
+    Rmount, lockin = connect_instruments(recipes[0], simulate=args.simulate)
+    try:
+        queue = SweepQueue(Rmount, lockin, quiet=not args.verbose)
+        for recipe in recipes:
+            queue.add(recipe)
+        planned = queue.plan()
+        print("Planned order:")
+        for job, recipe, estimate in planned:
+            direction = 'reverse' if recipe.get('reversed') else 'forward'
+            print(f"  {job.name} ({recipe['mode']}, {direction}): {estimate:.1f} s")
+        print(f"Estimated total: {sum(p[2] for p in planned):.1f} s")
+        if not args.plan:
+            queue.run()
+            queue.print_report()
+    finally:
+        Rmount.disconnect()
+        lockin.close_instrument()
+
+
+if __name__ == '__main__':
+    main()
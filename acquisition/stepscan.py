@@ -0,0 +1,218 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import numpy as np
+
+# CAPTURECFG letter of every readout channel the capture can record
+capture_letters = {'X': 'X', 'Y': 'Y', 'R': 'R', 'THETA': 'T'}
+
+
+def capture_channels(channels):
+    """
+    Capture configuration recording a SNAP? channel list, 'X, Y' -> 'XY', 'R, THETA' -> 'RT'.
+    None if the capture cannot record them, e.g. the aux inputs IN1, IN2.
+    """
+    letters = ''.join(capture_letters.get(name.strip().upper(), '?') for name in channels.split(','))
+    return letters if letters in ('XY', 'RT') else None
+
+
+def step_columns(burst=False, closed_loop=False):
+    """
+    Columns of the points StepScan writes with these options.
+    """
+    columns = ('angle', 'RA', 'RB')
+    if burst:
+        columns += ('RA_std', 'RB_std')
+    if closed_loop:
+        columns += ('measured_angle', 'out_of_tolerance')
+    return columns
+
+
+class StepScan:
+    """
+    Plain step sweep: move to each angle, optionally wait for the output filter to settle,
+    then read both channels with one SNAP?, or average a capture burst of burst_samples.
+    Both ways give the same two lock-in outputs, so bursts need channels the capture can
+    record (X, Y or R, THETA), the aux inputs of the photodiodes are read singly.
+
+    With closed_loop the angles are converted to a table of absolute device positions before the
+    sweep and every point is an absolute move to its entry, approached from the same side so the
+    backlash of the mount is always taken up the same way. The encoder position the DLL received
+    with the move completion is stored with each point and points further than tolerance from
+    their target are flagged. This costs no device round trip more than a relative step.
+    """
+    def __init__(self, Rmount, lockin, start_angle, stop_angle, step_angle, on_point=None,
+                 writer=None, burst_samples=0, settle_time=None, angles=None,
+                 closed_loop=False, backlash=0.0, approach=None, tolerance=0.005, channels='IN1, IN2'):
+        """
+        :param on_point: Called as on_point(angle, RA, RB) for every point.
+        :param writer: SweepWriter the points are streamed to, with the columns of step_columns().
+        :param burst_samples: >0 averages this many captured samples per angle, see LockInAmplifier.burst_capture.
+        :param settle_time: Seconds to wait at each angle, defaults to the settle time of the lock-in
+            filter for bursts and to no wait for single readings.
+        :param angles: Explicit angles to visit instead of start_angle:stop_angle:step_angle.
+        :param closed_loop: Absolute moves to precomputed device positions with the measured position recorded.
+        :param backlash: Overshoot (\u00b0) before a target reached against the approach direction, 0 disables it.
+        :param approach: +1 or -1, side every target is approached from, defaults to the sweep direction.
+        :param tolerance: Largest distance (\u00b0) between measured position and target that is not flagged.
+        :param channels: The two lock-in outputs stored as RA and RB, a SNAP? channel list.
+        """
+        if burst_samples > 0 and capture_channels(channels) is None:
+            raise ValueError(f"Capture bursts cannot record {channels}, use channels 'X, Y' or 'R, THETA' "
+                             f"or single readings (burst_samples 0)")
+        self.Rmount = Rmount
+        self.lockin = lockin
+        self.start_angle = start_angle
+        self.stop_angle = stop_angle
+        self.step_angle = step_angle
+        self.on_point = on_point
+        self.writer = writer
+        self.burst_samples = burst_samples
+        self.settle_time = settle_time
+        self.angles = angles
+        self.closed_loop = closed_loop
+        self.backlash = backlash
+        self.approach = approach
+        self.tolerance = tolerance
+        self.channels = channels
+        self.is_running = True
+        self.num_points = 0
+        self.out_of_tolerance = 0
+
+    def run(self):
+        if self.angles is not None:
+            sweep_steps = np.asarray(self.angles, dtype=float)
+        else:
+            sweep_steps = np.arange(self.start_angle, self.stop_angle, self.step_angle)
+        burst = self.lockin is not None and self.burst_samples > 0
+        settle_time = self.settle_time
+        if settle_time is None:
+            settle_time = self.lockin.get_settle_time() if burst else 0.0
+
+        if self.closed_loop:
+            targets = self.Rmount.device_table(sweep_steps)
+            tolerance_dev = abs(self.Rmount.to_device_units(float(self.tolerance)))
+            backlash_dev = abs(self.Rmount.to_device_units(float(self.backlash)))
+            approach = self.approach
+            if approach is None:
+                approach = 1 if len(sweep_steps) < 2 or sweep_steps[-1] >= sweep_steps[0] else -1
+
+        previous = None
+        for i, angle in enumerate(sweep_steps):
+            if not self.is_running:
+                break
+            position = ()
+            if self.closed_loop:
+                target = int(targets[i])
+                # the first target is always approached with an overshoot, the start position is not known
+                if backlash_dev and (previous is None or (target - previous) * approach < 0):
+                    self.Rmount.move_to_device(target - approach * backlash_dev)
+                self.Rmount.move_to_device(target)
+                previous = target
+                # the move completed message updates the DLL position, no request needed
+                measured = self.Rmount.read_device_position(request=False)
+                flagged = abs(measured - target) > tolerance_dev
+                if flagged:
+                    self.out_of_tolerance += 1
+                    print(f"Stage at {self.Rmount.to_real_units(measured):.4f}\u00b0 instead of {angle:.4f}\u00b0, "
+                          f"outside the {self.tolerance}\u00b0 tolerance.")
+                position = (self.Rmount.to_real_units(measured), float(flagged))
+            elif previous is None:
+                self.Rmount.move_absolute(angle)
+                previous = angle
+            else:
+                self.Rmount.move_relative(angle - previous)
+                previous = angle
+            if settle_time > 0:
+                time.sleep(settle_time)
+            errors = ()
+            if burst:
+                (RA, RB), errors = self.lockin.burst_capture(self.burst_samples,
+                                                             channels=capture_channels(self.channels))
+            elif self.lockin is not None:
+                RA, RB = self.lockin.get_multiple_channel_data(self.channels)[:2]
+            else:
+                RA = 1
+                RB = 1
+            if self.writer is not None:
+                self.writer.append(angle, RA, RB, *errors, *position)
+            self.num_points += 1
+            if self.on_point is not None:
+                self.on_point(angle, RA, RB)
+        if self.out_of_tolerance:
+            print(f"{self.out_of_tolerance} of {self.num_points} points outside the position tolerance.")
+        return self.num_points
+
+    def stop(self):
+        self.is_running = False
+
+
+class PipelinedStepScan:
+    """
+    Step sweep that overlaps the lock-in readout of one angle with the move to the next.
+    At each angle it waits for the output filter to settle, latches both photodiode
+    channels with one SNAP?, starts the next move and then reads, stores and reports
+    the point on a worker thread while the stage is moving.
+    """
+    def __init__(self, Rmount, lockin, start_angle, stop_angle, step_angle, on_point=None,
+                 settle_time=None, channels='IN1, IN2', writer=None):
+        """
+        :param on_point: Called as on_point(angle, RA, RB) from the worker thread for every point.
+        :param settle_time: Seconds to wait at each angle, defaults to the settle time of the lock-in filter.
+        :param writer: SweepWriter the points are streamed to.
+        """
+        self.Rmount = Rmount
+        self.lockin = lockin
+        self.start_angle = start_angle
+        self.stop_angle = stop_angle
+        self.step_angle = step_angle
+        self.on_point = on_point
+        self.settle_time = settle_time
+        self.channels = channels
+        self.writer = writer
+        self.is_running = True
+        self.num_points = 0
+
+    def run(self):
+        sweep_steps = np.arange(self.start_angle, self.stop_angle, self.step_angle)
+        if self.settle_time is None:
+            self.settle_time = self.lockin.get_settle_time() if self.lockin is not None else 0.0
+
+        self.Rmount.move_absolute(self.start_angle)
+        readout = None
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="readout") as worker:
+            for i, step in enumerate(sweep_steps):
+                t_arrived = perf_counter()
+                if readout is not None:
+                    readout.result()
+                remaining = self.settle_time - (perf_counter() - t_arrived)
+                if remaining > 0:
+                    time.sleep(remaining)
+                if self.lockin is not None:
+                    self.lockin.request_multiple_channel_data(self.channels)
+
+                move = None
+                if i + 1 < len(sweep_steps) and self.is_running:
+                    move = self.Rmount.move_relative_async(self.step_angle)
+                readout = worker.submit(self.finish_point, step)
+                if move is None:
+                    break
+                move.result()
+            if readout is not None:
+                readout.result()
+        return self.num_points
+
+    def finish_point(self, angle):
+        if self.lockin is not None:
+            RA, RB = self.lockin.read_multiple_channel_data()[:2]
+        else:
+            RA, RB = 1, 1
+        if self.writer is not None:
+            self.writer.append(angle, RA, RB)
+        self.num_points += 1
+        if self.on_point is not None:
+            self.on_point(angle, RA, RB)
+
+    def stop(self):
+        self.is_running = False
@@ -0,0 +1,85 @@
+"""Compare the old list based capture decoding with the float32 array path of LockInAmplifier.
+
+Run from the repository root:
+    python -m benchmarks.bench_capture_decode
+"""
+import math
+import time
+from struct import unpack_from
+
+import numpy as np
+
+from instruments.Lockin.SRS865A import LockInAmplifier
+
+
+class SyntheticCaptureInstrument:
+    """Answers CAPTUREPROG? and CAPTUREGET? from an in-memory capture buffer."""
+    def __init__(self, capture_bytes):
+        self.capture_bytes = capture_bytes
+        self.last_command = ''
+
+    def write(self, command):
+        self.last_command = command
+
+    def query(self, command):
+        if command.startswith('CAPTUREPROG?'):
+            return str(len(self.capture_bytes) // 1024)
+        raise ValueError(f'unsupported query {command}')
+
+    def read_raw(self):
+        offset_kbytes, len_kbytes = (int(x) for x in self.last_command.split(' ', 1)[1].split(','))
+        payload = self.capture_bytes[offset_kbytes * 1024:(offset_kbytes + len_kbytes) * 1024]
+        length = str(len(payload))
+        return f'#{len(length)}{length}'.encode() + payload
+
+
+def legacy_retrieve_data(lockin, num_points, channels='XY'):
+    """The pre-numpy retrieve_data without the sleeps between blocks."""
+    bytes_captured = lockin.get_total_kbytes_captured() * 1024
+    num_of_channels = len(channels)
+    i_bytes_remaining = min(bytes_captured, num_points * 4 * num_of_channels)
+    i_block_offset = 0
+    f_data = []
+    while i_bytes_remaining > 0:
+        i_block_cnt = min(64, int(math.ceil(i_bytes_remaining / 1024.0)))
+        buf = lockin.get_data_binaryblock(i_block_offset, i_block_cnt)
+        raw_data = buf[2 + int(chr(buf[1])):]
+        i_bytes_to_convert = min(i_bytes_remaining, len(raw_data))
+        f_data += list(unpack_from('<%df' % (i_bytes_to_convert / 4), raw_data))
+        i_block_offset += i_block_cnt
+        i_bytes_remaining -= i_block_cnt * 1024
+    channel_data = {str(i): [] for i in range(num_of_channels)}
+    for i, value in enumerate(f_data[:int(num_points * num_of_channels)]):
+        channel_data[str(i % num_of_channels)].append(value)
+    return channel_data
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - t0)
+    return min(timings), result
+
+
+def main(repeat=5):
+    print(f"{'buffer':>8} {'channels':>8} {'legacy (ms)':>12} {'numpy (ms)':>11} {'speedup':>8}")
+    for capture_kbytes in (64, 512, 4096):
+        for channels in ('XY', 'XYRT'):
+            num_points = capture_kbytes * 1024 // (4 * len(channels))
+            samples = np.random.default_rng(0).standard_normal(num_points * len(channels)).astype('<f4')
+            lockin = LockInAmplifier(inifile='lockin_params.ini')
+            lockin.inst = SyntheticCaptureInstrument(samples.tobytes())
+
+            t_legacy, legacy = best_of(lambda: legacy_retrieve_data(lockin, num_points, channels), repeat)
+            t_numpy, views = best_of(lambda: lockin.retrieve_capture(num_points, channels), repeat)
+            for i, channel in enumerate(channels):
+                assert np.array_equal(np.asarray(legacy[str(i)], dtype='<f4'), views[channel])
+
+            print(f"{capture_kbytes:>6}kB {channels:>8} {t_legacy * 1e3:>12.1f} {t_numpy * 1e3:>11.1f} "
+                  f"{t_legacy / t_numpy:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Write and view times of the memory-mapped capture store.
+
+Writes a synthetic two channel capture in CaptureStream sized chunks, reporting the write rate and
+the peak memory while writing, then times CaptureReader.window for views from the whole capture
+down to a few thousand frames, against taking the same view from the capture loaded into memory.
+
+Run from the repository root:
+    python -m benchmarks.bench_capture_lod
+    python -m benchmarks.bench_capture_lod --frames 50000000
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+
+from storage.capture_store import CaptureReader, CaptureWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=10_000_000)
+    parser.add_argument('--rate', type=float, default=312500.0)
+    parser.add_argument('--chunk', type=int, default=15625, help="frames per append, 50 ms at the rate")
+    parser.add_argument('--points', type=int, default=4000, help="points per view, about twice the plot width")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    chunk = rng.standard_normal((args.chunk, 2)).astype('<f4')
+    with tempfile.TemporaryDirectory() as directory:
+        base_path = os.path.join(directory, 'capture')
+        tracemalloc.start()
+        t = perf_counter()
+        with CaptureWriter(base_path, channels='XY', rate=args.rate) as writer:
+            written = 0
+            while written < args.frames:
+                writer.append(chunk[:args.frames - written])
+                written += len(chunk)
+        t_write = perf_counter() - t
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"write {args.frames} frames  {t_write:8.2f} s  {args.frames / t_write / 1e6:6.1f} M frames/s  "
+              f"peak memory {peak / 1e6:.1f} MB")
+
+        reader = CaptureReader(base_path)
+        duration = reader.duration
+        spans = [duration, duration / 10, duration / 100, duration / 1000, args.points / 2 / args.rate]
+        t = perf_counter()
+        frames = np.fromfile(base_path + '.cap', dtype='<f4').reshape(-1, 2)
+        t_load = perf_counter() - t
+        print(f"load all into memory {t_load * 1000:8.1f} ms  {frames.nbytes / 1e6:.0f} MB")
+        print(f"{'view s':>12}{'level of detail ms':>20}{'points':>8}{'all frames in view ms':>23}")
+        for span in spans:
+            start = (duration - span) / 2
+            times = []
+            for _ in range(10):
+                t = perf_counter()
+                x, values = reader.window(start, start + span, args.points)
+                times.append(perf_counter() - t)
+            t = perf_counter()
+            frames[int(start * args.rate):int((start + span) * args.rate)].copy()
+            t_slice = perf_counter() - t
+            print(f"{span:12.4f}{np.median(times) * 1000:20.3f}{len(x):8d}{t_slice * 1000:23.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Query and load times of the sweep catalog.
+
+Fills a catalog in a temporary directory with synthetic sweeps (a few samples, time constants
+and months of timestamps), then times a query for one sample and time constant over a month
+against opening every sidecar to find the same sweeps, and loading the data of the matches.
+
+Run from the repository root:
+    python -m benchmarks.bench_catalog
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+from time import perf_counter
+
+import numpy as np
+
+from storage.catalog import SweepCatalog
+from storage.sweep_writer import SweepWriter
+
+
+def fill(directory, num_sweeps, num_points):
+    rng = np.random.default_rng(0)
+    samples = ['S1', 'S2', 'S3', 'S4']
+    time_constants = ['1 ms', '3 ms', '10 ms', '30 ms']
+    t0 = time.mktime(time.strptime('2026-01-01', '%Y-%m-%d'))
+    angles = np.linspace(40, 70, num_points)
+    with SweepCatalog(os.path.join(directory, 'catalog.sqlite')) as catalog:
+        for i in range(num_sweeps):
+            metadata = {'mode': 'Step', 'sample': samples[i % len(samples)],
+                        'start_angle': 40.0, 'stop_angle': 70.0, 'step_angle': 30.0 / num_points,
+                        'lockin': {'time_constant': time_constants[(i // 4) % len(time_constants)],
+                                   'sensitivity': '1 V', 'filter_slope': '12 dB', 'input_range': '1 V'},
+                        'stages': {'rotation': {'serial_num': '27257179', 'velocity': 10.0, 'acceleration': 10.0,
+                                                'motor_params': {'steps_per_rev': 1919.64186}}}}
+            writer = SweepWriter(os.path.join(directory, f'sweep_{i:05d}'), metadata=metadata)
+            writer.extend(angles, rng.random(num_points), rng.random(num_points))
+            writer.metadata['created'] = time.strftime('%Y-%m-%dT%H:%M:%S',
+                                                       time.localtime(t0 + i * 300 * 86400 / num_sweeps))
+            writer.close()
+            catalog.add(writer.base_path, writer.metadata)
+
+
+def scan_sidecars(directory, sample, time_constant, since, until):
+    """The same query without the catalog: open every sidecar."""
+    matches = []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        with open(path) as f:
+            metadata = json.load(f)
+        if (metadata['sample'] == sample and metadata['lockin']['time_constant'] == time_constant
+                and since <= metadata['created'] < until):
+            matches.append(path[:-len('.json')])
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sweeps', type=int, default=2000)
+    parser.add_argument('--points', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        fill(directory, args.sweeps, args.points)
+        query = {'sample': 'S2', 'time_constant': '10 ms', 'since': '2026-05-01', 'until': '2026-06-01'}
+        with SweepCatalog(os.path.join(directory, 'catalog.sqlite')) as catalog:
+            times = []
+            for _ in range(20):
+                t = perf_counter()
+                rows = catalog.find(**query)
+                times.append(perf_counter() - t)
+            t = perf_counter()
+            datasets = catalog.load(rows, columns=('angle', 'RA'))
+            t_load = perf_counter() - t
+        t = perf_counter()
+        matches = scan_sidecars(directory, query['sample'], query['time_constant'], query['since'], query['until'])
+        t_scan = perf_counter() - t
+
+    print(f"{args.sweeps} sweeps of {args.points} points, {len(rows)} match")
+    print(f"catalog query        median {np.median(times) * 1000:8.3f} ms")
+    print(f"load {len(datasets)} matches      {t_load * 1000:8.3f} ms ({sum(len(d) for d in datasets)} rows)")
+    print(f"scan all sidecars    {t_scan * 1000:8.3f} ms ({len(matches)} match)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Measure the start up of the GUI: importing main, building the form and connecting the mounts.
+
+Every repeat runs in a fresh interpreter so module imports are not cached.
+Run from the repository root:
+    python -m benchmarks.bench_startup
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+PHASE_SCRIPT = r'''
+import json, sys, time
+t0 = time.perf_counter()
+from PyQt6 import QtWidgets, uic
+app = QtWidgets.QApplication(sys.argv[:1])
+t1 = time.perf_counter()
+import main
+t2 = time.perf_counter()
+heavy_modules = [m for m in ('pyvisa', 'instruments.Lockin.SRS865A', 'instruments.KDC101.KDC101Controller')
+                 if m in sys.modules]
+
+window = QtWidgets.QMainWindow()
+t = time.perf_counter()
+uic.loadUi(main.UI_FILE, window)
+t_load_ui = time.perf_counter() - t
+window = QtWidgets.QMainWindow()
+t = time.perf_counter()
+main.load_ui(window)
+t_compiled_ui = time.perf_counter() - t
+
+t3 = time.perf_counter()
+w = main.MainWindow(simulate=True)
+w.show()
+app.processEvents()
+t4 = time.perf_counter()
+
+w.mount_serials = {'rotation': '27257179', 'tilt': '27257180'}
+from instruments.tracing import CallTrace, TracedLib
+trace = CallTrace()
+w.sim_lib = TracedLib(w.simulated_kinesis_lib(), trace)
+t = time.perf_counter()
+w.connect_Rmount()
+t_connect = time.perf_counter() - t
+build_calls = sum(1 for event in trace.events if event[0] == 'TLI_BuildDeviceList')
+for mount in w.mounts.values():
+    mount.stop_poller()
+
+print(json.dumps({'qt': t1 - t0, 'import_main': t2 - t1, 'load_ui_xml': t_load_ui,
+                  'load_ui_compiled': t_compiled_ui, 'window_shown': t4 - t3, 'connect_2_mounts': t_connect,
+                  'device_list_builds': build_calls, 'imported_at_start': heavy_modules}))
+'''
+
+
+def run_once():
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    result = subprocess.run([sys.executable, '-c', PHASE_SCRIPT], capture_output=True, text=True, env=env,
+                            check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeats)]
+    for phase in ('qt', 'import_main', 'load_ui_xml', 'load_ui_compiled', 'window_shown', 'connect_2_mounts'):
+        values = np.array([run[phase] for run in runs]) * 1000
+        print(f'{phase:<20} median {np.median(values):8.1f} ms   min {values.min():8.1f} ms')
+    print(f"{'device_list_builds':<20} {runs[0]['device_list_builds']}")
+    print(f"{'imported_at_start':<20} {', '.join(runs[0]['imported_at_start']) or 'no instrument modules'}")
+
+
+if __name__ == '__main__':
+    main()
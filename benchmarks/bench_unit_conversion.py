@@ -0,0 +1,66 @@
+"""Per call cost of real to device unit conversion for the KDC101.
+
+Compares
+  - a ctypes call with generic argument conversion (explicit c_double/c_int wrappers, no argtypes),
+    as the driver made for every CC_GetDeviceUnitFromRealValue, against the same call with declared
+    argtypes/restype. The C library frexp(double, int *) stands in for the Kinesis function, which
+    has the same kind of arguments and does trivial work, so the time is the ctypes overhead.
+  - converting one value with UnitConverter, and a whole table of sweep angles in one numpy call.
+
+Run from the repository root:
+    python -m benchmarks.bench_unit_conversion
+"""
+import ctypes
+import ctypes.util
+import sys
+import timeit
+
+import numpy as np
+
+from instruments.KDC101.KDC101Controller import UnitConverter
+
+
+def load_c_library():
+    if sys.platform == 'win32':
+        return ctypes.CDLL('msvcrt')
+    return ctypes.CDLL(ctypes.util.find_library('m') or ctypes.util.find_library('c'))
+
+
+def per_call_us(statement, number):
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    number = 100000
+    undeclared = load_c_library().frexp
+    undeclared.restype = ctypes.c_double  # without it the double result would be read as an int
+    declared = load_c_library().frexp
+    declared.restype = ctypes.c_double
+    declared.argtypes = [ctypes.c_double, ctypes.POINTER(ctypes.c_int)]
+
+    def generic_call():
+        value = ctypes.c_int()
+        undeclared(ctypes.c_double(12.5), ctypes.byref(value))
+        return value.value
+
+    def declared_call():
+        value = ctypes.c_int()
+        declared(12.5, ctypes.byref(value))
+        return value.value
+
+    converter = UnitConverter()
+    angles = np.arange(0.0, 360.0, 0.01)
+
+    print(f"{'ctypes call, no argtypes':<44}{per_call_us(generic_call, number):8.3f} us/call")
+    print(f"{'ctypes call, argtypes/restype declared':<44}{per_call_us(declared_call, number):8.3f} us/call")
+    print(f"{'UnitConverter.to_device, one value':<44}"
+          f"{per_call_us(lambda: converter.to_device(12.5), number):8.3f} us/call")
+    table_us = per_call_us(lambda: converter.to_device(angles), 200)
+    print(f"{'UnitConverter.to_device, table of %d' % len(angles):<44}{table_us:8.1f} us "
+          f"({table_us / len(angles) * 1000:.2f} ns/angle)")
+    table_dll_us = per_call_us(lambda: [generic_call() for _ in angles], 3)
+    print(f"{'ctypes call per angle of the table':<44}{table_dll_us:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
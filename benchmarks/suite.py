@@ -0,0 +1,236 @@
+"""
+Acquisition throughput benchmarks against the simulated instruments.
+
+Scenarios: step sweep, pipelined step sweep, fly scan, capture buffer download and live plot refresh
+at 1k/10k/100k points. Each reports points/second, latency percentiles per
+stage (sleeps inside the drivers, waiting for motion, lock-in readout, block
+transfer, plot redraw and render) and peak python memory, and is written as JSON so two
+versions can be compared.
+
+Run from the repository root:
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --compare before.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter
+
+import numpy as np
+
+import instruments.KDC101.KDC101Controller
+import instruments.Lockin.SRS865A
+from acquisition.flyscan import FlyScan
+from instruments.KDC101.KDC101Controller import KDC101_Rotation
+from instruments.Lockin.SRS865A import LockInAmplifier
+from instruments.Simulated.SimKDC101 import SimulatedKinesisLib
+from instruments.Simulated.SimSRS865A import SimulatedResourceManager
+
+LOCKIN_INI = 'instruments/Lockin/lockin_params.ini'
+
+
+class StageTimer:
+    """Collects the duration of every call of the wrapped methods, grouped by stage name."""
+    def __init__(self):
+        self.durations = defaultdict(list)
+
+    def record(self, stage, duration):
+        self.durations[stage].append(duration)
+
+    def wrap(self, obj, method_name, stage):
+        method = getattr(obj, method_name)
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            t0 = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(stage, perf_counter() - t0)
+        setattr(obj, method_name, timed)
+
+    def summary(self):
+        result = {}
+        for stage, durations in self.durations.items():
+            d = np.array(durations) * 1e3
+            result[stage] = {'count': len(d), 'total_ms': float(d.sum()),
+                             'p50_ms': float(np.percentile(d, 50)), 'p90_ms': float(np.percentile(d, 90)),
+                             'p99_ms': float(np.percentile(d, 99)), 'max_ms': float(d.max())}
+        return result
+
+
+class TimedSleepModule:
+    """Stands in for the time module of a driver so its sleeps (fixed delays and poll intervals) are recorded as a stage."""
+    def __init__(self, timer):
+        self.timer = timer
+
+    def sleep(self, seconds):
+        t0 = perf_counter()
+        time.sleep(seconds)
+        self.timer.record('sleep', perf_counter() - t0)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+driver_modules = (instruments.KDC101.KDC101Controller, instruments.Lockin.SRS865A)
+
+
+def simulated_instruments(timer, **lockin_kwargs):
+    lib = SimulatedKinesisLib(serials=("27257179",))
+    Rmount = KDC101_Rotation("27257179", lib=lib)
+    Rmount.connect()
+    Rmount.set_motor_params()
+    lockin = LockInAmplifier(inifile=LOCKIN_INI)
+    lockin.open_instrument('SIM', resource_manager=SimulatedResourceManager(angle_source=lib.real_position,
+                                                                            **lockin_kwargs))
+    lockin.initialize_lockin()
+    timer.wrap(Rmount, 'wait_for_message', 'motion')
+    timer.wrap(lockin, 'get_channel_data', 'readout')
+    timer.wrap(lockin, 'get_data_binaryblock', 'block_transfer')
+    timer.wrap(lockin, 'capture_data', 'capture')
+    return Rmount, lockin
+
+
+def scenario_step_sweep(timer, quick):
+    from main import StepAcquisitionThread
+    Rmount, lockin = simulated_instruments(timer)
+    stop = 2.0 if quick else 10.0
+    thread = StepAcquisitionThread(Rmount, lockin, 0.0, stop, 0.5)
+    thread.run()
+    return thread.num_points
+
+
+def scenario_pipelined_step_sweep(timer, quick):
+    from acquisition.stepscan import PipelinedStepScan
+    Rmount, lockin = simulated_instruments(timer)
+    timer.wrap(lockin, 'read_multiple_channel_data', 'readout')
+    stop = 2.0 if quick else 10.0
+    return PipelinedStepScan(Rmount, lockin, 0.0, stop, 0.5).run()
+
+
+def scenario_fly_scan(timer, quick):
+    Rmount, lockin = simulated_instruments(timer)
+    stop = 10.0 if quick else 90.0
+    angles, channel_data = FlyScan(Rmount, lockin, 0.0, stop, 0.01).run()
+    return len(angles)
+
+
+def scenario_buffer_download(timer, quick):
+    Rmount, lockin = simulated_instruments(timer)
+    lockin.inst.write('OFLT 0')
+    lockin.set_capturerate(n=0)
+    num_points = (64 if quick else 4096) * 1024 // 8
+    lockin.set_capturelen_and_channel(num_points, channels='XY')
+    lockin.capture_data(num_points, channels='XY')
+    channel_data = lockin.retrieve_capture(num_points, channels='XY')
+    return len(channel_data['X'])
+
+
+def plot_refresh_scenario(num_points):
+    def scenario(timer, quick):
+        from PyQt6 import QtWidgets
+        import pyqtgraph as pg
+        from plotting.live_plot import LivePlot
+        app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+        widget = pg.PlotWidget()
+        widget.resize(800, 600)
+        widget.show()
+        live_plot = LivePlot(widget)
+        live_plot.timer.stop()
+        timer.wrap(live_plot, 'redraw', 'plot')
+        angles = np.linspace(0, 360, num_points)
+        chunk = max(num_points // 100, 1)
+        for i in range(0, num_points, chunk):
+            live_plot.extend(angles[i:i + chunk], np.sin(angles[i:i + chunk]), np.cos(angles[i:i + chunk]))
+            live_plot.redraw()
+            t0 = perf_counter()
+            app.processEvents()
+            timer.record('render', perf_counter() - t0)
+        widget.close()
+        return num_points
+    return scenario
+
+
+scenarios = {
+    'step_sweep': scenario_step_sweep,
+    'pipelined_step_sweep': scenario_pipelined_step_sweep,
+    'fly_scan': scenario_fly_scan,
+    'buffer_download': scenario_buffer_download,
+    'plot_refresh_1k': plot_refresh_scenario(1000),
+    'plot_refresh_10k': plot_refresh_scenario(10000),
+    'plot_refresh_100k': plot_refresh_scenario(100000),
+}
+
+
+def run_scenario(name, quick):
+    timer = StageTimer()
+    saved_time = [module.time for module in driver_modules]
+    for module in driver_modules:
+        module.time = TimedSleepModule(timer)
+    tracemalloc.start()
+    t0 = perf_counter()
+    try:
+        points = scenarios[name](timer, quick)
+    finally:
+        wall_time = perf_counter() - t0
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        for module, saved in zip(driver_modules, saved_time):
+            module.time = saved
+    return {'points': points, 'wall_time_s': wall_time, 'points_per_second': points / wall_time,
+            'peak_memory_bytes': peak_memory, 'stages': timer.summary()}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    for name, result in results['scenarios'].items():
+        line = (f"{name:<18} {result['points']:>8} pts {result['wall_time_s']:>8.2f} s "
+                f"{result['points_per_second']:>10.1f} pts/s {result['peak_memory_bytes'] / 2 ** 20:>7.1f} MiB")
+        if baseline and name in baseline['scenarios']:
+            ratio = result['points_per_second'] / baseline['scenarios'][name]['points_per_second']
+            line += f"  {ratio:>5.2f}x vs {baseline.get('revision')}"
+        print(line)
+        for stage, stats in sorted(result['stages'].items()):
+            print(f"    {stage:<16} n={stats['count']:<6} total {stats['total_ms']:>9.1f} ms  "
+                  f"p50 {stats['p50_ms']:>7.2f}  p90 {stats['p90_ms']:>7.2f}  p99 {stats['p99_ms']:>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=list(scenarios), default=list(scenarios))
+    parser.add_argument('--quick', action='store_true', help='smaller sweeps and buffers')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare against')
+    args = parser.parse_args()
+
+    results = {'revision': git_revision(), 'python': platform.python_version(), 'quick': args.quick,
+               'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'scenarios': {}}
+    for name in args.scenarios:
+        results['scenarios'][name] = run_scenario(name, args.quick)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,157 @@
 import time
 import os
 import sys
+import threading
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from ctypes import *
 
+import numpy as np
+
+# GenericMotor message ids posted by the Kinesis DLL
+HOMED, MOVED = 0, 1
+
+# status bits: moving clockwise/counterclockwise, jogging clockwise/counterclockwise, homing
+MOVING_STATUS_BITS = 0x00000010 | 0x00000020 | 0x00000040 | 0x00000080 | 0x00000200
+
+# sampling interval (s) of the KDC101 servo loop, velocity and acceleration device units are scaled by it
+KDC101_T = 2048 / 6e6
+
+# restype and argtypes of the Kinesis entry points used here (Thorlabs.MotionControl.KCube.DCServo.h)
+KINESIS_SIGNATURES = {
+    'TLI_BuildDeviceList': (c_short, []),
+    'TLI_GetDeviceListByTypeExt': (c_short, [POINTER(c_char), c_ulong, c_int]),
+    'CC_Open': (c_short, [c_char_p]),
+    'CC_Close': (None, [c_char_p]),
+    'CC_StartPolling': (c_bool, [c_char_p, c_int]),
+    'CC_StopPolling': (None, [c_char_p]),
+    'CC_ClearMessageQueue': (None, [c_char_p]),
+    'CC_GetNextMessage': (c_bool, [c_char_p, POINTER(c_ushort), POINTER(c_ushort), POINTER(c_ulong)]),
+    'CC_GetStatusBits': (c_ulong, [c_char_p]),
+    'CC_Home': (c_short, [c_char_p]),
+    'CC_SetMotorParamsExt': (c_short, [c_char_p, c_double, c_double, c_double]),
+    'CC_GetDeviceUnitFromRealValue': (c_short, [c_char_p, c_double, POINTER(c_int), c_int]),
+    'CC_GetRealValueFromDeviceUnit': (c_short, [c_char_p, c_int, POINTER(c_double), c_int]),
+    'CC_SetMoveAbsolutePosition': (c_short, [c_char_p, c_int]),
+    'CC_MoveAbsolute': (c_short, [c_char_p]),
+    'CC_MoveRelative': (c_short, [c_char_p, c_int]),
+    'CC_MoveToPosition': (c_short, [c_char_p, c_int]),
+    'CC_SetJogMode': (c_short, [c_char_p, c_short, c_short]),
+    'CC_SetJogVelParams': (c_short, [c_char_p, c_int, c_int]),
+    'CC_SetJogStepSize': (c_short, [c_char_p, c_uint]),
+    'CC_MoveJog': (c_short, [c_char_p, c_short]),
+    'CC_StopProfiled': (c_short, [c_char_p]),
+    'CC_GetVelParams': (c_short, [c_char_p, POINTER(c_int), POINTER(c_int)]),
+    'CC_SetVelParams': (c_short, [c_char_p, c_int, c_int]),
+    'CC_RequestPosition': (c_short, [c_char_p]),
+    'CC_GetPosition': (c_int, [c_char_p]),
+}
+
+
+def declare_signatures(lib):
+    """
+    Set restype and argtypes of the used Kinesis functions, so ctypes converts the arguments
+    directly and rejects arguments of the wrong type instead of passing them on silently.
+    """
+    for name, (restype, argtypes) in KINESIS_SIGNATURES.items():
+        function = getattr(lib, name)
+        function.restype = restype
+        function.argtypes = argtypes
+    return lib
+
+
+# the Kinesis DLL is loaded once per process and shared by every KDC101_Rotation
+kinesis_lib = None
+kinesis_lib_lock = threading.Lock()
+# serial numbers of the connected KDC101s found by TLI_BuildDeviceList, per library handle
+device_lists = {}
+
+
+def load_kinesis_lib():
+    """
+    Return the process-wide handle of the KCube DC servo DLL, loading it on the first call.
+    """
+    global kinesis_lib
+    with kinesis_lib_lock:
+        if kinesis_lib is None:
+            if sys.version_info < (3, 8):
+                os.chdir(r"C:\\Program Files\\Thorlabs\\Kinesis")
+            else:
+                os.add_dll_directory(r"C:\\Program Files\\Thorlabs\\Kinesis")
+            kinesis_lib = declare_signatures(cdll.LoadLibrary("Thorlabs.MotionControl.KCube.DCServo.dll"))
+        return kinesis_lib
+
+
+def get_device_list(lib, refresh=False):
+    """
+    Serial numbers of the connected KDC101s (type 27). The list is built once per library
+    handle, pass refresh=True to scan the USB bus again, e.g. after plugging in a controller.
+    """
+    with kinesis_lib_lock:
+        if refresh or lib not in device_lists:
+            if lib.TLI_BuildDeviceList() != 0:
+                raise ConnectionError("Failed to build device list.")
+            serial_numbers = create_string_buffer(100)
+            lib.TLI_GetDeviceListByTypeExt(serial_numbers, 100, 27)
+            device_lists[lib] = [serial for serial in serial_numbers.value.decode().split(",") if serial]
+        return device_lists[lib]
+
+
+class UnitConverter:
+    """
+    Conversion between real units (\u00b0, \u00b0/s, \u00b0/s\u00b2) and KDC101 device units computed from
+    the motor parameters, matching CC_GetDeviceUnitFromRealValue and CC_GetRealValueFromDeviceUnit
+    without a DLL call. Accepts scalars and whole numpy arrays, e.g. a table of sweep angles.
+    """
+    def __init__(self, steps_per_rev=1919.64186, gbox_ratio=1.0, pitch=1.0):
+        counts_per_unit = steps_per_rev * gbox_ratio / pitch
+        # unit types 0: position, 1: velocity, 2: acceleration
+        self.scale = (counts_per_unit, counts_per_unit * KDC101_T * 65536, counts_per_unit * KDC101_T ** 2 * 65536)
+
+    def to_device(self, real_value, unit_type=0):
+        if isinstance(real_value, (int, float)):
+            return int(round(real_value * self.scale[unit_type]))
+        return np.rint(np.asarray(real_value, dtype=float) * self.scale[unit_type]).astype(np.int32)
+
+    def to_real(self, device_value, unit_type=0):
+        if isinstance(device_value, (int, float)):
+            return device_value / self.scale[unit_type]
+        return np.asarray(device_value, dtype=float) / self.scale[unit_type]
+
+
 class KDC101_Rotation:
-    def __init__(self, serial_num: str):
+    def __init__(self, serial_num: str, lib=None, timeout=120.0):
         """
         Initialize the KDC101 controller with the given serial number.
         :param serial_num: The serial number of the KDC101 device.
+        :param lib: Library handle to use instead of the Kinesis DLL, e.g. a SimulatedKinesisLib.
+        :param timeout: Default time (s) to wait for a move or homing to complete.
         """
         self.serial_num = c_char_p(serial_num.encode('utf-8'))
+        self.timeout = timeout
+        self.motor_params = None
+        self.converter = None
+        self.poller = None
+        # waits of the *_async methods, created on connect and shut down on disconnect
+        self.executor = None
+        self.closing = threading.Event()
         
-        if sys.version_info < (3, 8):
-            os.chdir(r"C:\\Program Files\\Thorlabs\\Kinesis")
-        else:
-            os.add_dll_directory(r"C:\\Program Files\\Thorlabs\\Kinesis")
-        
-        self.lib = cdll.LoadLibrary("Thorlabs.MotionControl.KCube.DCServo.dll")
+        self.lib = lib if lib is not None else load_kinesis_lib()
 
-    def build_device_list(self):
-        if self.lib.TLI_BuildDeviceList() == 0:
-            device_list_size = self.lib.TLI_GetDeviceListSize()
-            serial_numbers = create_string_buffer(100)
-            self.lib.TLI_GetDeviceListByTypeExt(serial_numbers, 100, 27)
-            serial_list = serial_numbers.value.decode().split(",")
-            if self.serial_num.value.decode() in serial_list:
-                print(f"Device {self.serial_num.value.decode()} found.")
-            else:
-                print(f"Device {self.serial_num.value.decode()} not found.")
-                raise ConnectionError("Device not found.")
+    def build_device_list(self, refresh=False):
+        """
+        Check that the device is connected, using the cached device list. The list is rebuilt
+        once if the device is not in it, or always with refresh=True.
+        """
+        serial_list = get_device_list(self.lib, refresh)
+        if self.serial_num.value.decode() not in serial_list and not refresh:
+            serial_list = get_device_list(self.lib, refresh=True)
+        if self.serial_num.value.decode() in serial_list:
+            print(f"Device {self.serial_num.value.decode()} found.")
         else:
-            raise ConnectionError("Failed to build device list.")
+            print(f"Device {self.serial_num.value.decode()} not found.")
+            raise ConnectionError("Device not found.")
 
 
     def connect(self):
@@ -40,77 +161,205 @@ class KDC101_Rotation:
         self.build_device_list()
         self.lib.CC_Open(self.serial_num)
         self.lib.CC_StartPolling(self.serial_num, c_int(200))
+        self.closing.clear()
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1,
+                                               thread_name_prefix=f"KDC101-{self.serial_num.value.decode()}")
         print("Device connected.")
     
-    def wait_for_message(self, expected_id):
-        msg_type, msg_id, msg_data = c_ushort(), c_ushort(), c_ulong()
+    def check_connected(self):
+        """
+        Raise RuntimeError unless connect() was called, the *_async methods need its executor.
+        """
+        if self.executor is None:
+            raise RuntimeError(f"Device {self.serial_num.value.decode()} is not connected.")
+
+    def wait_for_message(self, expected_id, timeout=None, poll_interval=0.002):
+        """
+        Wait until the move or homing completes, signalled by the GenericMotor message with
+        expected_id (0: homed, 1: moved) or by the moving status bits clearing after a move was seen.
+        :param timeout: Seconds to wait before raising TimeoutError, defaults to self.timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.perf_counter() + timeout
+        seen_moving = False
         while True:
-            self.lib.CC_WaitForMessage(self.serial_num, byref(msg_type), byref(msg_id), byref(msg_data))
-            
+            if self.closing.is_set():
+                raise RuntimeError(f"Device {self.serial_num.value.decode()} was disconnected during the move.")
+            done, seen_moving = self.check_completion(expected_id, seen_moving)
+            if done:
+                return
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"Device {self.serial_num.value.decode()} did not complete the move within {timeout} s.")
+            time.sleep(poll_interval)
+
+    def check_completion(self, expected_id, seen_moving=False):
+        """
+        One non-blocking completion check for wait_for_message, returns (done, seen_moving).
+        """
+        msg_type, msg_id, msg_data = c_ushort(), c_ushort(), c_ulong()
+        while self.lib.CC_GetNextMessage(self.serial_num, byref(msg_type), byref(msg_id), byref(msg_data)):
             if msg_type.value == 2 and msg_id.value == expected_id:
-                break
+                return True, seen_moving
+        if self.is_moving():
+            return False, True
+        return seen_moving, seen_moving
+
+    def get_status_bits(self):
+        return self.lib.CC_GetStatusBits(self.serial_num)
 
+    def is_moving(self):
+        return bool(self.get_status_bits() & MOVING_STATUS_BITS)
 
     def clear_message_queue(self):
         self.lib.CC_ClearMessageQueue(self.serial_num)
     
-    def home(self):
+    def home(self, timeout=None):
         """
         Home the device.
         """
-        time.sleep(0.25)
+        self.home_async(timeout).result()
+        print("Device homed.")
+
+    def home_async(self, timeout=None):
+        """
+        Start homing and return a Future that completes when the device is homed.
+        """
+        self.check_connected()
+        self.start_home()
+        return self.executor.submit(self.wait_for_message, HOMED, timeout)
+
+    def start_home(self):
+        """
+        Start homing without waiting for it to finish.
+        """
         self.clear_message_queue()
         self.lib.CC_Home(self.serial_num)
-        self.wait_for_message(expected_id=0)
-        print("Device homed.")
     
     def set_motor_params(self, steps_per_rev=1919.64186, gbox_ratio=1.0, pitch=1.0):
         """
         Set motor parameters for real-to-device unit conversion.
         """
         self.lib.CC_SetMotorParamsExt(self.serial_num, c_double(steps_per_rev), c_double(gbox_ratio), c_double(pitch))
+        self.motor_params = {'steps_per_rev': steps_per_rev, 'gbox_ratio': gbox_ratio, 'pitch': pitch}
+        self.converter = UnitConverter(steps_per_rev, gbox_ratio, pitch)
         print("Motor parameters set.")
+
+    def to_device_units(self, real_value, unit_type=0):
+        """
+        Real value (or numpy array of values) in device units, unit_type 0: position, 1: velocity, 2: acceleration.
+        Computed locally once the motor parameters are set, through the DLL before that.
+        """
+        if self.converter is not None:
+            return self.converter.to_device(real_value, unit_type)
+        device_value = c_int()
+        self.lib.CC_GetDeviceUnitFromRealValue(self.serial_num, c_double(real_value), byref(device_value), unit_type)
+        return device_value.value
+
+    def to_real_units(self, device_value, unit_type=0):
+        """
+        Inverse of to_device_units.
+        """
+        if self.converter is not None:
+            return self.converter.to_real(device_value, unit_type)
+        real_value = c_double()
+        self.lib.CC_GetRealValueFromDeviceUnit(self.serial_num, c_int(device_value), byref(real_value), unit_type)
+        return real_value.value
     
     
     
-    def move_absolute(self, target_position):
+    def move_absolute(self, target_position, timeout=None):
         """
         Move the device to an absolute position.
         :param target_position: The target position in real units (\u00b0).
         """
-        time.sleep(0.25)
+        self.move_absolute_async(target_position, timeout).result()
+
+    def move_absolute_async(self, target_position, timeout=None):
+        """
+        Start a move to an absolute position and return a Future that completes when the move is done.
+        The Future raises TimeoutError if the move does not complete within timeout (s).
+        """
+        self.check_connected()
+        self.start_move_absolute(target_position)
+        return self.executor.submit(self.wait_for_message, MOVED, timeout)
+
+    def start_move_absolute(self, target_position):
+        """
+        Start a move to an absolute position without waiting for it to finish.
+        Call wait_for_message(expected_id=1) to wait for the move to complete.
+        :param target_position: The target position in real units (\u00b0).
+        """
         self.clear_message_queue()
 
-        new_pos_real = c_double(target_position)
-        new_pos_dev = c_int()
-        self.lib.CC_GetDeviceUnitFromRealValue(self.serial_num, new_pos_real, byref(new_pos_dev), 0)
-        
+        new_pos_dev = c_int(self.to_device_units(target_position))
         self.lib.CC_SetMoveAbsolutePosition(self.serial_num, new_pos_dev)
-        time.sleep(0.25)
         self.lib.CC_MoveAbsolute(self.serial_num)
         print(f"Moving to {target_position} \u00b0.")
-        self.wait_for_message(expected_id=1)
 
-    def move_relative(self, displacement):
+    def device_table(self, positions):
+        """
+        Absolute positions (\u00b0) as an int array of device units, computed once before a sweep
+        so each target is exact instead of accumulating the rounding of relative steps.
+        """
+        if self.converter is not None:
+            return self.converter.to_device(np.asarray(positions, dtype=float))
+        return np.array([self.to_device_units(float(p)) for p in positions], dtype=np.int32)
+
+    def move_to_device(self, position_dev, timeout=None):
+        """
+        Move to an absolute position given in device units, e.g. an entry of device_table().
+        """
+        self.move_to_device_async(position_dev, timeout).result()
+
+    def move_to_device_async(self, position_dev, timeout=None):
+        self.check_connected()
+        self.start_move_to_device(position_dev)
+        return self.executor.submit(self.wait_for_message, MOVED, timeout)
+
+    def start_move_to_device(self, position_dev):
+        """
+        Start an absolute move in device units, one DLL call like a relative move.
+        """
+        self.clear_message_queue()
+        self.lib.CC_MoveToPosition(self.serial_num, c_int(int(position_dev)))
+
+    def move_relative(self, displacement, timeout=None):
         """
         Move relative to previous position in real units.
         """
-        disp_real = c_double(displacement)
-        disp_dev = c_int()
-        self.lib.CC_GetDeviceUnitFromRealValue(self.serial_num, disp_real, byref(disp_dev), 0)
-        
+        self.move_relative_async(displacement, timeout).result()
+        #print("Current position: {} \u00b0".format(self.position))
+
+    def move_relative_async(self, displacement, timeout=None):
+        """
+        Start a relative move and return a Future that completes when the move is done.
+        """
+        self.check_connected()
+        self.start_move_relative(displacement)
+        return self.executor.submit(self.wait_for_message, MOVED, timeout)
+
+    def start_move_relative(self, displacement):
+        """
+        Start a relative move without waiting for it to finish.
+        """
+        self.clear_message_queue()
+        disp_dev = c_int(self.to_device_units(displacement))
         self.lib.CC_MoveRelative(self.serial_num, disp_dev)
         print(f"Moving relatively by {displacement}\u00b0.")
-        self.wait_for_message(expected_id=1)
-        #print("Current position: {} \u00b0".format(self.position))
+
+    def stop_profiled(self):
+        """
+        Stop the current move with the deceleration of the move profile, a pending wait returns once it stopped.
+        """
+        self.lib.CC_StopProfiled(self.serial_num)
 
     def set_jog_mode(self):
         self.lib.CC_SetJogMode(self.serial_num, c_short(2), c_short(1))
-        v_real = c_int(15)
-        v_dev_u = c_int()
-        self.lib.CC_GetDeviceUnitFromRealValue(self.serial_num, v_real, byref(v_dev_u), 0)
-        
-        self.lib.CC_SetJogVelParams(self.serial_num,v_dev_u,v_dev_u)
+        # 15 \u00b0/s jog velocity and 15 \u00b0/s\u00b2 acceleration
+        velocity_dev = c_int(self.to_device_units(15.0, 1))
+        acceleration_dev = c_int(self.to_device_units(15.0, 2))
+        self.lib.CC_SetJogVelParams(self.serial_num, acceleration_dev, velocity_dev)
         self.set_jog_step_size(3)
 
     def move_jog(self, direction):
@@ -129,30 +378,37 @@ class KDC101_Rotation:
         print(f"Jogging in direction: {'Backwards' if direction == 1 else 'Forward'}.")
 
     def set_jog_step_size(self, step_size):
-        new_jog_step_real = c_double(step_size)
-        new_jog_step_dev = c_uint()
-        self.lib.CC_GetDeviceUnitFromRealValue(self.serial_num, new_jog_step_real, byref(new_jog_step_dev), 0)
+        new_jog_step_dev = c_uint(self.to_device_units(step_size))
         self.lib.CC_SetJogStepSize(self.serial_num, new_jog_step_dev)
         print(f"Jog step size set to {step_size}\u00b0.")
 
 
-    def get_velocity(self):
-        velocity_dev, acceleration_dev = c_int32(), c_int32()
+    def get_vel_params(self):
+        """
+        Get the maximum velocity (\u00b0/s) and acceleration (\u00b0/s\u00b2) of the move profile.
+        """
+        velocity_dev, acceleration_dev = c_int(), c_int()
         self.lib.CC_GetVelParams(self.serial_num, byref(acceleration_dev), byref(velocity_dev))
-        velocity_real, acceleration_real = c_int(), c_int()
-        self.lib.CC_GetRealValueFromDeviceUnit(self.serial_num,velocity_dev, velocity_real, c_int(1))
-        print(f"Current velocity: {velocity_real.value}\u00b0/s")
-        return velocity_real.value
+        return self.to_real_units(velocity_dev.value, 1), self.to_real_units(acceleration_dev.value, 2)
+
+    def get_velocity(self):
+        velocity, acceleration = self.get_vel_params()
+        print(f"Current velocity: {velocity}\u00b0/s")
+        return velocity
     
     
-    def set_velocity(self, velocity):
-        time.sleep(0.25)
-        self.clear_message_queue()
+    def set_velocity(self, velocity, acceleration=None):
+        """
+        Set the maximum velocity (\u00b0/s) and optionally the acceleration (\u00b0/s\u00b2) of the move profile.
+        """
         if velocity > 0:
             current_velocity, current_acceleration = c_int(), c_int()
             self.lib.CC_GetVelParams(self.serial_num, byref(current_acceleration), byref(current_velocity))
-            self.lib.CC_SetVelParams(self.serial_num, current_acceleration, c_int(velocity))
-            print(f"Velocity set to {velocity}.")
+            velocity_dev = c_int(self.to_device_units(velocity, 1))
+            if acceleration is not None and acceleration > 0:
+                current_acceleration = c_int(self.to_device_units(acceleration, 2))
+            self.lib.CC_SetVelParams(self.serial_num, current_acceleration, velocity_dev)
+            print(f"Velocity set to {velocity}\u00b0/s.")
 
     def polling(self,rate):
         """
@@ -166,22 +422,136 @@ class KDC101_Rotation:
         """
         Disconnect the device.
         """
+        self.stop_poller()
+        # no wait may call into the closed device: a running one gives up, queued ones are cancelled
+        if self.executor is not None:
+            self.closing.set()
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
         self.lib.CC_StopPolling(self.serial_num)
         self.lib.CC_Close(self.serial_num)
         print("Device disconnected.")
 
+    def get_metadata(self):
+        """
+        Serial number, motor parameters and move profile, for storing with the data.
+        """
+        velocity, acceleration = self.get_vel_params()
+        return {'serial_num': self.serial_num.value.decode(), 'motor_params': self.motor_params,
+                'velocity': velocity, 'acceleration': acceleration}
+
     @property
     def position(self):
         """
         Get the current position of the device in real units.
         """
-        self.lib.CC_RequestPosition(self.serial_num)
-        
-        dev_pos = c_int(self.lib.CC_GetPosition(self.serial_num))
+        return self.read_position()
+
+    def read_position(self, request=True):
+        """
+        Position in real units. With request=False the value last polled by the DLL polling loop
+        is returned without asking the device for a new one.
+        """
+        return self.to_real_units(self.read_device_position(request))
+
+    def read_device_position(self, request=True):
+        """
+        Encoder position in device units, see read_position.
+        """
+        if request:
+            self.lib.CC_RequestPosition(self.serial_num)
+        return self.lib.CC_GetPosition(self.serial_num)
+
+    def start_poller(self, interval=0.05, history=100000):
+        """
+        Start a PositionPoller reading position and status every interval (s), see PositionPoller.
+        """
+        if self.poller is None:
+            self.poller = PositionPoller(self, interval, history)
+            self.poller.start()
+        return self.poller
+
+    def stop_poller(self):
+        if self.poller is not None:
+            self.poller.stop()
+            self.poller = None
+
+    @property
+    def latest_position(self):
+        """
+        Last position published by the poller, read from the device if no poller is running.
+        """
+        if self.poller is not None and self.poller.latest is not None:
+            return self.poller.latest[1]
+        return self.position
+
+
+class PositionPoller:
+    """
+    Background thread that reads the position and status bits of a KDC101_Rotation at a fixed rate.
+    The DLL polling loop is set to the same rate, so the values are read from the DLL without
+    requesting them from the device. The newest (time, position, status_bits) is kept in latest,
+    the timestamps are time.perf_counter() and every reading also goes into a bounded history.
+    """
+    def __init__(self, stage, interval=0.05, history=100000):
+        """
+        :param interval: Time (s) between two readings.
+        :param history: Number of readings kept for history().
+        """
+        self.stage = stage
+        self.interval = interval
+        self.latest = None
+        self.readings = deque(maxlen=history)
+        self.callbacks = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True,
+                                       name=f"KDC101-poller-{stage.serial_num.value.decode()}")
 
-        real_pos = c_double()
-        self.lib.CC_GetRealValueFromDeviceUnit(self.serial_num, dev_pos, byref(real_pos), 0)
-        return real_pos.value
+    def add_callback(self, callback):
+        """
+        Call callback(time, position, status_bits) from the poller thread after every reading.
+        """
+        self.callbacks.append(callback)
+
+    def start(self):
+        self.stage.polling(max(1, int(self.interval * 1000)))
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def run(self):
+        next_time = time.perf_counter()
+        while not self.stop_event.is_set():
+            try:
+                position = self.stage.read_position(request=False)
+                status_bits = self.stage.get_status_bits()
+            except Exception as e:
+                print(f"Position poller error: {e}")
+            else:
+                reading = (time.perf_counter(), position, status_bits)
+                with self.lock:
+                    self.latest = reading
+                    self.readings.append(reading)
+                for callback in self.callbacks:
+                    callback(*reading)
+            next_time += self.interval
+            self.stop_event.wait(max(0.0, next_time - time.perf_counter()))
+
+    def history(self, since=None, until=None):
+        """
+        (times, positions) of the readings between since and until (perf_counter times) as lists.
+        """
+        with self.lock:
+            readings = list(self.readings)
+        times = [r[0] for r in readings]
+        positions = [r[1] for r in readings]
+        first = 0 if since is None else bisect_left(times, since)
+        last = len(times) if until is None else bisect_right(times, until)
+        return times[first:last], positions[first:last]
     
     
 if __name__ == "__main__":
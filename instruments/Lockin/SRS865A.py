@@ -1,13 +1,30 @@
 #By Sandeep Feb 2024
 # import visa
-import pyvisa
 import configparser
 import numpy as np
 import time
 import math
-from struct import unpack_from
 config = configparser.ConfigParser()
 
+
+def parse_binblock_header(buf):
+    """Return (offset, length) of the payload of an IEEE 488.2 definite length block.
+    The block looks like '#<n><length><payload>' where n is the number of length digits."""
+    if buf[:1] != b'#':
+        raise ValueError('not an IEEE 488.2 binary block')
+    num_digits = int(chr(buf[1]))
+    return 2 + num_digits, int(buf[2:2 + num_digits])
+
+
+def decode_binaryblock_into(buf, out):
+    """Copy the little endian float32 payload of a CAPTUREGET? block into the float32 array out.
+    Returns the number of floats written, no python float objects are created."""
+    offset, length = parse_binblock_header(buf)
+    n = min(length // 4, out.size)
+    out[:n] = np.frombuffer(buf, dtype='<f4', count=n, offset=offset)
+    return n
+
+
 class LockInAmplifier:
     time_constant_dict = {'1 us': 0, '3 us': 1, '10 us': 2, '30 us': 3, '100 us': 4, '300 us': 5,
                           '1 ms': 6, '3 ms': 7, '10 ms': 8, '30 ms': 9, '100 ms': 10, '300 ms': 11,
@@ -24,122 +41,252 @@ class LockInAmplifier:
 
     filter_dict ={'6 dB':0, '12 dB':1, '18 dB':2, '24 dB':3}
 
+    # number of time constants for the output to settle within 1% of a step, per filter slope
+    settle_time_constants = {'6 dB': 4.6, '12 dB': 6.6, '18 dB': 8.4, '24 dB': 10.0}
+
+    time_units = {'us': 1e-6, 'ms': 1e-3, 's': 1.0, 'ks': 1e3}
+
+
+    setting_tokens = {'SYNC': ['OFF', 'ON'], 'ISRC': ['A', 'A-B'], 'ICPL': ['AC', 'DC'], 'IGND': ['FLOAT', 'GROUND'],
+                      'IVMD': ['VOLTAGE', 'CURRENT'], 'ICUR': ['1 uA', '10 nA'], 'RSRC': ['INT', 'EXT', 'DUAL', 'CHOP'],
+                      'RTRG': ['SIN', 'POSTTL', 'NEGTTL'], 'REFZ': ['50OHMS', '1MEG']}
+
+    # settings held in the cache, in the order initialize_lockin configures them
+    cached_settings = ('SCAL', 'OFLT', 'IRNG', 'OFSL', 'SYNC', 'ISRC', 'ICPL', 'IGND', 'IVMD', 'ICUR', 'RSRC', 'RTRG', 'REFZ')
+
+    # seconds a cached setting is trusted before *ESR? is checked for front panel changes
+    cache_check_interval = 1.0
+
+    # user request bit of the standard event status register, set by front panel keys and knobs
+    ESR_URQ = 0x40
+
 
     def __init__(self, inifile):
         self.config = configparser.ConfigParser()
         self.config.read(inifile)
-    def open_instrument(self, instrument_address):
-        self.inst = pyvisa.ResourceManager().open_resource(instrument_address)
+        self.inst = None
+        self.settings_cache = {}
+        self.burst_config = None
+        self.burst_rate = None
+        self.cache_checked = 0.0
+    def open_instrument(self, instrument_address, resource_manager=None):
+        """ resource_manager defaults to pyvisa.ResourceManager(),
+        pass a SimulatedResourceManager to run without the instrument"""
+        if resource_manager is None:
+            # imported here, pyvisa is slow to import and not needed with a simulated resource manager
+            import pyvisa
+            resource_manager = pyvisa.ResourceManager()
+        self.inst = resource_manager.open_resource(instrument_address)
+        self.settings_cache.clear()
 
     def close_instrument(self):
         if self.inst:
             self.inst.close()
             self.inst = None
+        self.settings_cache.clear()
     def timeout(self, ms=1000):
         self.inst.timeout = int(ms)
 
+    def setting_index(self, mnemonic, value):
+        """ index of a setting given either as index or as token, e.g. ('ISRC', 'A-B') -> 1"""
+        tokens = self.setting_tokens.get(mnemonic)
+        if tokens is None or isinstance(value, int) or str(value).isdigit():
+            return int(value)
+        value = str(value).upper()
+        for index, token in enumerate(tokens):
+            if token.upper() == value or token.upper().startswith(value):
+                return index
+        raise ValueError(f"Invalid value {value} for {mnemonic}")
+
+    def check_cache(self):
+        """ drop the cached settings if the front panel was used since the last check"""
+        if time.perf_counter() - self.cache_checked > self.cache_check_interval:
+            if int(self.inst.query('*ESR?')) & self.ESR_URQ:
+                self.settings_cache.clear()
+            self.cache_checked = time.perf_counter()
+
+    def refresh_settings(self, mnemonics=cached_settings):
+        """ read the given settings into the cache with a single query"""
+        reply = self.inst.query(';'.join(['*ESR?'] + [f'{m}?' for m in mnemonics]))
+        values = [int(float(v)) for v in reply.strip().split(';')]
+        if values[0] & self.ESR_URQ:
+            self.settings_cache.clear()
+        self.settings_cache.update(zip(mnemonics, values[1:]))
+        self.cache_checked = time.perf_counter()
+
+    def query_setting(self, mnemonic):
+        self.check_cache()
+        if mnemonic not in self.settings_cache:
+            self.settings_cache[mnemonic] = int(float(self.inst.query(f'{mnemonic}?')))
+        return self.settings_cache[mnemonic]
+
+    def write_setting(self, mnemonic, value):
+        """ write-through: skipped when the cached value already matches"""
+        index = self.setting_index(mnemonic, value)
+        self.check_cache()
+        if self.settings_cache.get(mnemonic) != index:
+            self.inst.write(f'{mnemonic} {index}')
+            self.settings_cache[mnemonic] = index
+
+    def configure(self, settings):
+        """ settings: {mnemonic: index or token}
+        sends only the changed settings in one command and verifies them with one query,
+        returns the list of mnemonics that were written"""
+        wanted = {m: self.setting_index(m, v) for m, v in settings.items()}
+        self.check_cache()
+        missing = [m for m in wanted if m not in self.settings_cache]
+        if missing:
+            self.refresh_settings(missing)
+        changed = [m for m, index in wanted.items() if self.settings_cache[m] != index]
+        if changed:
+            self.inst.write(';'.join(f'{m} {wanted[m]}' for m in changed))
+            reply = self.inst.query(';'.join(f'{m}?' for m in changed))
+            actual = [int(float(v)) for v in reply.strip().split(';')]
+            self.settings_cache.update(zip(changed, actual))
+            rejected = [m for m, index in zip(changed, actual) if index != wanted[m]]
+            if rejected:
+                raise ValueError(f"Lock-in did not accept {', '.join(rejected)}")
+        return changed
+
     def get_timeconstant(self):
-        return list(self.time_constant_dict.keys())[int(self.inst.query("OFLT?"))]
+        return list(self.time_constant_dict.keys())[self.query_setting('OFLT')]
 
     def set_timeconstant(self, value, unit):
         index = self.time_constant_dict.get(f"{value} {unit}")
         if index is not None:
-            self.inst.write(f"OFLT {index}")
+            self.write_setting('OFLT', index)
             return f"time constant set to {self.get_timeconstant()}"
         else:
             return "Invalid time constant value or unit"
+    def get_timeconstant_seconds(self):
+        value, unit = self.get_timeconstant().split()
+        return float(value) * self.time_units[unit]
+
+    def get_settle_time(self):
+        """ time in s for the output filter to settle within 1% after the input changes,
+        from the current time constant and filter slope"""
+        return self.settle_time_constants[self.get_filterslope()] * self.get_timeconstant_seconds()
+
     def get_sensitivity(self):
-        return list(self.sensitivity_dict.keys())[int(self.inst.query('SCAL?'))]
+        return list(self.sensitivity_dict.keys())[self.query_setting('SCAL')]
     
     def set_sensitivity(self, value, unit):
         index = self.sensitivity_dict.get(f"{value} {unit}")
         if index is not None:
-            self.inst.write(f"SCAL {index}")
+            self.write_setting('SCAL', index)
             return f"sensitivity set to {self.get_sensitivity()}"
         else:
             return "Invalid sensitivity value or unit"
     def get_inputrange(self):
-        return list(self.input_range_dict.keys())[int(self.inst.query('IRNG?'))]
+        return list(self.input_range_dict.keys())[self.query_setting('IRNG')]
     
     def set_inputrange(self, value, unit):
         index = self.input_range_dict.get(f"{value} {unit}")
         if index is not None:
-            self.inst.write(f"IRNG {index}")
+            self.write_setting('IRNG', index)
             return f"inputrange set to {self.get_inputrange()}"
         else:
             return "Invalid inputrange value or unit"
     def get_filterslope(self):
-        return list(self.filter_dict.keys())[int(self.inst.query('OFSL?'))]
+        return list(self.filter_dict.keys())[self.query_setting('OFSL')]
     
     def set_filterslope(self, value, unit='dB'):
         index = self.filter_dict.get(f"{value} {unit}")
         if index is not None:
-            self.inst.write(f"OFSL {index}")
+            self.write_setting('OFSL', index)
             return f"filter slope set to {self.get_filterslope()}"
         else:
             return "Invalid filter value"
     def get_sync_filter(self):
-        return ['OFF', 'ON'][int(self.inst.query("SYNC?"))]
+        return self.setting_tokens['SYNC'][self.query_setting('SYNC')]
     def set_sync_filter(self, value ='OFF'):
-        self.inst.write(f"SYNC {value}")
+        self.write_setting('SYNC', value)
     def get_input_channel(self):
-        return ['A', 'A-B'][int(self.inst.query("ISRC?"))]
+        return self.setting_tokens['ISRC'][self.query_setting('ISRC')]
     def set_input_channel(self, value ='A'):
-        self.inst.write(f"ISRC {value}")
+        self.write_setting('ISRC', value)
     def get_coupling(self):
-        return ['AC', 'DC'][int(self.inst.query("ICPL?"))]
+        return self.setting_tokens['ICPL'][self.query_setting('ICPL')]
     def set_coupling(self, value ='AC'):
-        self.inst.write(f"ICPL {value}")
+        self.write_setting('ICPL', value)
     def get_ground(self):
-        return ['FLOAT', 'GROUND'][int(self.inst.query("IGND?"))]
+        return self.setting_tokens['IGND'][self.query_setting('IGND')]
     def set_ground(self, value ='FLOAT'):
-        self.inst.write(f"IGND {value}")
+        self.write_setting('IGND', value)
     def get_input_mode(self):
-        return ['VOLTAGE', 'CURRENT'][int(self.inst.query("IVMD?"))]
+        return self.setting_tokens['IVMD'][self.query_setting('IVMD')]
     def set_input_mode(self, value ='VOLTAGE'):
-        self.inst.write(f"IVMD {value}")
+        self.write_setting('IVMD', value)
     def get_current_range(self):
-        return ['1 uA', '10 nA'][int(self.inst.query("ICUR?"))]
+        return self.setting_tokens['ICUR'][self.query_setting('ICUR')]
     def set_current_range(self, value ='1 uA'):
-        indx ={'1 uA':0, '10 nA':1}[value]
-        self.inst.write(f"ICUR {indx}")
+        self.write_setting('ICUR', value)
     def get_reference_source(self):
-        return ['INT', 'EXT', 'DUAL', 'CHOP'][int(self.inst.query("RSRC?"))]
+        return self.setting_tokens['RSRC'][self.query_setting('RSRC')]
     def set_reference_source(self, value ='EXT'):
-        self.inst.write(f"RSRC {value}")
+        self.write_setting('RSRC', value)
     def get_reference_trigger(self):
-        return ['SIN', 'POSTTL', 'NEGTTL'][int(self.inst.query("RTRG?"))]
+        return self.setting_tokens['RTRG'][self.query_setting('RTRG')]
     def set_reference_trigger(self, value ='SIN'):
-        self.inst.write(f"RTRG {value}")
+        self.write_setting('RTRG', value)
     def get_reference_trigger_impedance(self):
-        return ['50OHMS', '1MEG'][int(self.inst.query("REFZ?"))]
+        return self.setting_tokens['REFZ'][self.query_setting('REFZ')]
     def set_reference_impedance(self, value ='50OHM'):
-        self.inst.write(f"REFZ {value}")
+        self.write_setting('REFZ', value)
     def get_external_ref_freq(self):
-        return f'{self.inst.query('FREQEXT?')} Hz'
+        return f'{self.inst.query("FREQEXT?")} Hz'
     
     def get_phase(self):
-        return f'{float(self.inst.query('PHAS?'))} Deg'
+        return f'{float(self.inst.query("PHAS?"))} Deg'
     def auto_phase(self):
         self.inst.write(f"APHS")
     def set_phase(self, value):
         self.inst.write(f"PHAS {value} DEG")
 
-    
+    def config_settings(self):
+        """ the settings of the ini file as {mnemonic: index or token}"""
+        config = self.config
+        return {
+            'SCAL': self.sensitivity_dict[f"{int(config['SENSITIVITY']['val'])} {config['SENSITIVITY']['unit']}"],
+            'OFLT': self.time_constant_dict[f"{int(config['TIME CONSTANT']['val'])} {config['TIME CONSTANT']['unit']}"],
+            'IRNG': self.input_range_dict[f"{int(config['INPUT RANGE']['val'])} {config['INPUT RANGE']['unit']}"],
+            'OFSL': self.filter_dict[f"{int(config['FILTER']['val'])} dB"],
+            'SYNC': config['Sync']['val'],
+            'ISRC': config['INPUT CHANNEL']['val'],
+            'ICPL': config['COUPLE']['val'],
+            'IGND': config['GROUND']['val'],
+            'IVMD': config['INPUT']['val'],
+            'ICUR': config['CURRENT']['val'],
+            'RSRC': config['Ref SOURCE']['val'],
+            'RTRG': config['TRIGGER']['val'],
+            'REFZ': config['Ref IMPEDANCE']['val'],
+        }
+
+    def load_settings_file(self, inifile):
+        """ use the settings of another lockin_params.ini style file for config_settings and initialize_lockin"""
+        self.config = configparser.ConfigParser()
+        self.config.read(inifile)
+
+    def config_settle_time(self):
+        """ settle time in s of the time constant and filter slope of the ini file, without querying the lock-in"""
+        config = self.config
+        time_constant = int(config['TIME CONSTANT']['val']) * self.time_units[config['TIME CONSTANT']['unit']]
+        return self.settle_time_constants[f"{int(config['FILTER']['val'])} dB"] * time_constant
+
+    def get_metadata(self):
+        """ the current settings, for storing with the data"""
+        return {
+            'time_constant': self.get_timeconstant(), 'sensitivity': self.get_sensitivity(),
+            'input_range': self.get_inputrange(), 'filter_slope': self.get_filterslope(),
+            'sync_filter': self.get_sync_filter(), 'input_channel': self.get_input_channel(),
+            'coupling': self.get_coupling(), 'ground': self.get_ground(), 'input_mode': self.get_input_mode(),
+            'current_range': self.get_current_range(), 'reference_source': self.get_reference_source(),
+            'reference_trigger': self.get_reference_trigger(),
+            'reference_impedance': self.get_reference_trigger_impedance(), 'phase': self.get_phase(),
+        }
+
     def initialize_lockin(self):
-        self.set_sensitivity(value=int(self.config['SENSITIVITY']['val']), unit= self.config['SENSITIVITY']['unit'])
-        self.set_timeconstant(value=int(self.config['TIME CONSTANT']['val']), unit= self.config['TIME CONSTANT']['unit'])
-        self.set_inputrange(value=int(self.config['INPUT RANGE']['val']), unit= self.config['INPUT RANGE']['unit'])
-        self.set_filterslope(value=int(self.config['FILTER']['val']))
-        self.set_sync_filter(value=self.config['Sync']['val'])
-        self.set_input_channel(value=self.config['INPUT CHANNEL']['val'])
-        self.set_coupling(value=self.config['COUPLE']['val'])
-        self.set_ground(value=self.config['GROUND']['val'])
-        self.set_input_mode(value= self.config['INPUT']['val'])
-        self.set_current_range(value=self.config['CURRENT']['val'])
-        self.set_reference_source(value=self.config['Ref SOURCE']['val'])
-        self.set_reference_trigger(value=self.config['TRIGGER']['val'])
-        self.set_reference_impedance(value= self.config['Ref IMPEDANCE']['val'])
+        self.configure(self.config_settings())
         self.timeout(ms=10000)
     
     def get_channel_data(self, channel= 'X'):
@@ -151,7 +298,14 @@ class LockInAmplifier:
     
     def get_multiple_channel_data(self, channels= 'X, Y, IN1'):
         "2 or 3 channels"
+        self.request_multiple_channel_data(channels)
+        return self.read_multiple_channel_data()
+
+    def request_multiple_channel_data(self, channels= 'X, Y, IN1'):
+        """ the values are latched when SNAP? arrives, read them later with read_multiple_channel_data"""
         self.inst.write(f'SNAP? {channels}')
+
+    def read_multiple_channel_data(self):
         byte_string =  self.inst.read_raw()
         regular_string = byte_string.decode('utf-8')  # Convert byte string to regular string
         floats_list = [float(x) for x in regular_string.split(',')]
@@ -169,11 +323,15 @@ class LockInAmplifier:
             n is limitted to 0<=n<=20
         """
         self.inst.write(f'CAPTURERATE {int(n)}')
+        self.burst_config = None
     def get_capturerate(self):
         return self.inst.query('CAPTURERATE?')
+    def get_capturelen_kbytes(self):
+        return int(self.inst.query('CAPTURELEN?'))
     def set_capturelen_kbytes(self, n):
         if n<=4096:
             self.inst.write(f'CAPTURELEN {int(n)}')
+            self.burst_config = None
     def set_capturelen_and_channel(self, num_points, channels='XY' ):
         num_of_channels = len(channels)
         self.set_captureconfig_channels(channels=channels)
@@ -186,6 +344,7 @@ class LockInAmplifier:
     def set_captureconfig_channels(self, channels ='XY'):
         """ X|XY|RT|XYRT"""
         self.inst.write(f'CAPTURECFG {channels}')
+        self.burst_config = None
     def get_capture_num_of_channels(self):
         """ 0:X, 1:XY, 2:RT, 3:XYRT"""
         return {0: 1, 1: 2, 2: 2, 3: 4}.get(int(self.inst.query('CAPTURECFG?')), None)
@@ -231,67 +390,70 @@ class LockInAmplifier:
     
 
     
-    def capture_data(self, num_points, channels='XY', mode="immediate", print_status=True):
-
-        num_of_channels = len(channels)
-        # self.set_captureconfig_channels(channels=channels)
-        capturelen_kbytes = (num_points * num_of_channels * 4) / 1024
-        next_closer_capturelen_kbytes = int(((capturelen_kbytes // 2) + 1) * 2) if capturelen_kbytes <= 4096 else print(
-            'reduce the sampling rate')
-        # self.set_capturelen_kbytes(n=next_closer_capturelen_kbytes)
-
+    def capture_data(self, num_points, channels='XY', mode="immediate", print_status=True, timeout=None, stop=None):
+        """ start a one-shot capture and wait until it is done, see wait_for_capture
+        returns False if the capture was cancelled through stop"""
         self.start_capture(mode=mode)
-       
-
-        status = self.get_capture_status()
-        print('*'*20)
-        print('*'*15)
-        print(f'Step1: Lockin capturing data...trigger status: {status}' )
-       
-        condition_satisfied = False
-
+        if print_status:
+            print('*'*20)
+            print('*'*15)
+            print(f'Step1: Lockin capturing data...trigger status: {self.get_capture_status()}')
+
+        done = self.wait_for_capture(num_channels=len(channels), timeout=timeout, stop=stop, print_status=print_status)
+        if done and print_status:
+            bytes_captured = self.get_total_kbytes_captured() * 1024
+            print(f'\t amount of data captured: {bytes_captured} bytes ,{bytes_captured / 1024} kB')
+        return done
+
+    def capture_duration(self, num_channels):
+        """ time (s) a one-shot capture needs to fill the configured buffer"""
+        buffer_bytes = self.get_capturelen_kbytes() * 1024
+        return buffer_bytes / (4 * num_channels * float(self.get_capturerate()))
+
+    def wait_for_capture(self, num_channels=2, timeout=None, stop=None, print_status=True,
+                         poll_interval=0.005, wake_margin=0.02):
+        """ wait for a one-shot capture to finish
+        The end is predicted from the capture rate and buffer length: sleep until wake_margin s
+        before it, then poll CAPTURESTAT? every poll_interval s. While waiting for a trigger the
+        status is polled at 10x poll_interval.
+        :param timeout: seconds after the capture starts (or triggers) before raising TimeoutError,
+            defaults to twice the predicted duration plus the VISA timeout
+        :param stop: callable polled while waiting, returning True stops the capture and returns False
+        """
+        duration = self.capture_duration(num_channels)
+        if timeout is None:
+            timeout = 2 * duration + self.inst.timeout / 1000.0
+        triggered = None
+        deadline = time.perf_counter() + timeout
         while True:
+            if stop is not None and stop():
+                self.stop_capture()
+                if print_status:
+                    print("Lockin capture cancelled")
+                return False
+            now = time.perf_counter()
             try:
                 status = self.get_capture_status()
-                if status =='triggered':
-                    if not condition_satisfied:
-                        print("Step3: Lockin capture triggered")
-                        condition_satisfied =True
-
-                if status == 'done':
-                    print("Step5: Lockin capture finished")
-                    break
             except ValueError as ve:
                 print("error occured while querying lockin status", ve)
-            
-            except Exception as e:
-                print(e)
-
-            time.sleep(1)
-
-
-
-        # if print_status:
-        #     while (num_bytes_sofar := self.get_num_of_capturebytes_sofar()) < num_points * 4 * num_of_channels:
-        #         print(f'capture status: {self.inst.query(f'CAPTURESTAT?')}')
-        #         time.sleep(1)
-        #         print(
-        #             f'bytes so far: {num_bytes_sofar}/{next_closer_capturelen_kbytes * 1024}--- points so far: {int((num_bytes_sofar / 4) / num_of_channels)}/{num_points}')
-                
-
-        bytes_captured = self.get_total_kbytes_captured() * 1024
-
-      
-       
-        print(f'\t amount of data captured: {bytes_captured} bytes ,{bytes_captured / 1024} kB')
-        # print("""Excess data points are captured until the buffer is filled. The buffer length is limited to 1 ≤ n ≤ 4096,
-        #     where n is even. The buffer length is measured in kilobytes """)
-        # self.stop_capture()
-
-
-
-
-
+                status = None
+            if status == 'done':
+                if print_status:
+                    print("Step5: Lockin capture finished")
+                return True
+            if status == 'triggered' and triggered is None:
+                if print_status:
+                    print("Step3: Lockin capture triggered")
+                triggered = now
+                deadline = now + timeout
+            if now > deadline:
+                raise TimeoutError(f'Lockin capture did not finish within {timeout} s')
+            if triggered is None:
+                time.sleep(10 * poll_interval)
+                continue
+            # sleep in short slices so stop is still honoured during long captures
+            wake = triggered + duration - wake_margin
+            time.sleep(max(min(wake - time.perf_counter(), 0.1), poll_interval))
 
     def capture_data_continuous(self, channels='XY', mode="immediate", print_status=True):
         """immediate or trigstop """
@@ -310,76 +472,96 @@ class LockInAmplifier:
             print(f'num of points sofar: {num_bytes_sofar/(num_of_channels*4)}')
 
 
-    def retrieve_data(self,num_points,  channels='XY',  print_status=True):
-        bytes_captured = self.get_total_kbytes_captured() * 1024
-        num_of_channels = len(channels)
-        i_bytes_remaining = min(bytes_captured, num_points * 4 * num_of_channels)
+    def read_capture_floats(self, num_floats, max_retries=3):
+        """ download num_floats values of the capture buffer in 64 kB blocks
+        straight into a preallocated float32 array
+        a failed or empty block is retried up to max_retries times, then the error is raised"""
+        f_data = np.empty(num_floats, dtype='<f4')
+        i_filled = 0
         i_block_offset = 0
-        f_data = []
-        data_block_retrieved =False
-        while i_bytes_remaining > 0:
+        retries = 0
+        while i_filled < num_floats:
+            i_block_cnt = min(64, int(math.ceil((num_floats - i_filled) * 4 / 1024.0)))
             try:
-                i_block_cnt = min(64, int(math.ceil(i_bytes_remaining / 1024.0)))
                 buf = self.get_data_binaryblock(i_block_offset, i_block_cnt)
-                data_block_retrieved =True
-            except ValueError as ve:
-                print("Error occurred while retrieving data:", ve)
-                data_block_retrieved =False
+                n = decode_binaryblock_into(buf, f_data[i_filled:])
+                if n == 0:
+                    raise ValueError(f'empty capture block at {i_block_offset} kB')
             except Exception as e:
-                print("An unexpected error occurred while retrieving data:", e)
-                data_block_retrieved =False
-                
-            if data_block_retrieved:
-                raw_data = buf[2 + int(chr(buf[1])):]
-                i_bytes_to_convert = min(i_bytes_remaining, len(raw_data))
-                f_block_data = list(unpack_from('<%df' % (i_bytes_to_convert / 4), raw_data))
-                f_data += f_block_data
-                i_block_offset += i_block_cnt
-                i_bytes_remaining -= i_block_cnt * 1024
-
-            
-            time.sleep(0.5)
-
-        channel_data = {str(i): [] for i in range(num_of_channels)}
-        for i, value in enumerate(f_data[:int(num_points * num_of_channels)]):
-            channel_data[str(i % num_of_channels)].append(value)
+                retries += 1
+                if retries > max_retries:
+                    raise
+                print(f"Error occurred while retrieving data (try {retries} of {max_retries}):", e)
+                time.sleep(0.5)
+                continue
+            retries = 0
+            i_filled += n
+            i_block_offset += i_block_cnt
+        return f_data
+
+    def retrieve_capture(self, num_points, channels='XY'):
+        """ returns {channel: view} for each capture channel, e.g. X, Y, R, T(theta)
+        the views are strided columns of a single float32 array"""
+        num_of_channels = len(channels)
+        bytes_captured = self.get_total_kbytes_captured() * 1024
+        num_floats = min(bytes_captured // 4, int(num_points) * num_of_channels)
+        num_floats -= num_floats % num_of_channels
+        columns = self.read_capture_floats(num_floats).reshape(-1, num_of_channels)
+        return {channel: columns[:, i] for i, channel in enumerate(channels)}
+
+    def retrieve_data(self,num_points,  channels='XY',  print_status=True):
+        channel_views = self.retrieve_capture(num_points, channels=channels)
+        channel_data = {str(i): view for i, view in enumerate(channel_views.values())}
         if print_status:
             print('Step7: data Retrieved')
 
         return channel_data
     
-    def retrieve_data_for_continuous_aquisition(self,num_points,  channels='XY',  print_status=True):
-        bytes_captured = self.get_total_kbytes_captured() * 1024
+    def configure_burst(self, num_samples, channels='XY', rate_n=None):
+        """ set up the capture for burst_capture, skipped if it is still set up for the same burst"""
+        # the capture rate follows the time constant, so a new time constant also needs a new set up
+        config = (num_samples, channels, rate_n, self.query_setting('OFLT'))
+        if self.burst_config == config:
+            return
+        self.set_capturelen_and_channel(num_samples, channels=channels)
+        if rate_n is not None:
+            self.set_capturerate(rate_n)
+        self.burst_rate = float(self.get_capturerate())
+        self.burst_config = config
+
+    def burst_capture(self, num_samples, channels='XY', rate_n=None, return_samples=False, timeout=None):
+        """ capture num_samples at captureratemax/2^rate_n (the current rate if None) and
+        return the mean and standard deviation of each channel as arrays in the order of channels,
+        plus the (num_samples, channels) float32 samples if return_samples.
+        Costs a few round trips whatever num_samples is, instead of one OUTP? per sample."""
+        self.configure_burst(num_samples, channels, rate_n)
         num_of_channels = len(channels)
-        i_bytes_remaining = bytes_captured
-        i_block_offset = 0
-        f_data = []
-        while i_bytes_remaining > 0:
-            i_block_cnt = min(64, int(math.ceil(i_bytes_remaining / 1024.0)))
-            buf = self.get_data_binaryblock(i_block_offset, i_block_cnt)
-            raw_data = buf[2 + int(chr(buf[1])):]
-            i_bytes_to_convert = min(i_bytes_remaining, len(raw_data))
-            f_block_data = list(unpack_from('<%df' % (i_bytes_to_convert / 4), raw_data))
-            f_data += f_block_data
-            i_block_offset += i_block_cnt
-            i_bytes_remaining -= i_block_cnt * 1024
-            time.sleep(0.2)
-
-        channel_data = {str(i): [] for i in range(num_of_channels)}
-        for i, value in enumerate(f_data):
-            channel_data[str(i % num_of_channels)].append(value)
-        for key in list(channel_data):
-            channel_data[key] =np.array(channel_data[key])
-            tolerance = 1e-100
-            non_zero_indices =np.where(np.abs(channel_data[key]) > tolerance)[0]
-            channel_data[key] =channel_data[key][non_zero_indices]
-            channel_data[key] =  channel_data[key][-num_points:]
-        if print_status:
-            print('data Retrieved')
-        return channel_data
-    
+        num_bytes = num_samples * num_of_channels * 4
+        duration = num_samples / self.burst_rate
+        if timeout is None:
+            timeout = 2 * duration + self.inst.timeout / 1000.0
+
+        self.start_capture(mode="immediate")
+        t_start = time.perf_counter()
+        time.sleep(duration)
+        while self.get_num_of_capturebytes_sofar() < num_bytes:
+            if time.perf_counter() - t_start > timeout:
+                self.stop_capture()
+                raise TimeoutError(f'Lockin burst of {num_samples} samples did not finish within {timeout} s')
+            time.sleep(0.002)
+        self.stop_capture()
+
+        samples = self.read_capture_floats(num_samples * num_of_channels).reshape(-1, num_of_channels)
+        mean = samples.mean(axis=0, dtype=np.float64)
+        std = samples.std(axis=0, dtype=np.float64, ddof=1) if num_samples > 1 else np.zeros(num_of_channels)
+        if return_samples:
+            return mean, std, samples
+        return mean, std
+
+    def stream_capture(self, channels='XY'):
+        """ reader for a running continuous capture that only downloads new data, see CaptureStream"""
+        return CaptureStream(self, channels=channels)
 
-    
     def get_data_ascii(self,n):
         """ return return single data of diffrent channel
         """
@@ -389,6 +571,85 @@ class LockInAmplifier:
  
 
 
+class CaptureStream:
+    """ Incremental reader for a continuous (CAPTURESTART CONT) capture.
+    It remembers how many bytes it has read and on every poll downloads only the
+    bytes captured since, handling the wrap-around of the circular capture buffer.
+    If the capture overtakes the reader by more than one buffer, the overwritten
+    frames are skipped and counted in frames_lost.
+    CAPTUREBYTES? is taken as the running total of bytes captured since CAPTURESTART, which keeps
+    growing past the buffer length while the buffer wraps; this is an assumption not checked against
+    the SR865A manual. If the total goes down the capture was restarted, the stream then reads the
+    new capture from its start and counts it in restarts.
+    Every poll decodes into the same buffer, so the frames it returns are only valid until the next poll."""
+    def __init__(self, lockin, channels='XY'):
+        self.lockin = lockin
+        self.channels = channels
+        self.frame_bytes = 4 * len(channels)
+        self.buffer_bytes = lockin.get_capturelen_kbytes() * 1024
+        # only whole frames are read, the last frame of a buffer that is not a multiple of the frame size is never written
+        self.buffer_bytes -= self.buffer_bytes % self.frame_bytes
+        self.bytes_read = 0
+        self.frames_lost = 0
+        self.restarts = 0
+        # a poll never returns more than one capture buffer
+        self.block = np.empty(self.buffer_bytes, dtype=np.uint8)
+
+    def read_buffer_range(self, start, stop, out):
+        """ copy bytes [start, stop) of the capture buffer into the uint8 array out"""
+        first_kbyte = start // 1024
+        offset = start - first_kbyte * 1024
+        filled = 0
+        while filled < stop - start:
+            len_kbytes = min(64, int(math.ceil((offset + stop - start - filled) / 1024.0)))
+            buf = self.lockin.get_data_binaryblock(first_kbyte, len_kbytes)
+            data_offset, length = parse_binblock_header(buf)
+            n = min(length - offset, stop - start - filled)
+            out[filled:filled + n] = np.frombuffer(buf, dtype=np.uint8, count=n, offset=data_offset + offset)
+            filled += n
+            first_kbyte += len_kbytes
+            offset = 0
+
+    def poll(self):
+        """ returns the frames captured since the last poll as a float32 array (frames, channels),
+        a view of the reused buffer: copy it to keep it past the next poll"""
+        total = self.lockin.get_num_of_capturebytes_sofar()
+        total -= total % self.frame_bytes
+        if total < self.bytes_read:
+            self.restarts += 1
+            self.bytes_read = 0
+        if total - self.bytes_read > self.buffer_bytes:
+            skipped = total - self.buffer_bytes - self.bytes_read
+            self.frames_lost += skipped // self.frame_bytes
+            self.bytes_read += skipped
+        new_bytes = total - self.bytes_read
+        out = self.block[:new_bytes]
+        start = self.bytes_read % self.buffer_bytes
+        head = min(new_bytes, self.buffer_bytes - start)
+        if head:
+            self.read_buffer_range(start, start + head, out[:head])
+        if new_bytes > head:
+            self.read_buffer_range(0, new_bytes - head, out[head:])
+        self.bytes_read = total
+        return out.view('<f4').reshape(-1, len(self.channels))
+
+    def chunks(self, poll_interval=0.05, stop=None):
+        """ generator of new frames, polls every poll_interval s until stop() returns True"""
+        while stop is None or not stop():
+            t0 = time.perf_counter()
+            frames = self.poll()
+            if len(frames):
+                yield frames
+            remaining = poll_interval - (time.perf_counter() - t0)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def run(self, callback, poll_interval=0.05, stop=None):
+        """ calls callback(frames) for every chunk of new frames"""
+        for frames in self.chunks(poll_interval, stop):
+            callback(frames)
+
+
 # Example usage:
 if __name__ == "__main__":
     amplifier = LockInAmplifier(inifile="lockin_params.ini")
@@ -0,0 +1,321 @@
+"""
+Simulated Thorlabs Kinesis KCube DC servo library.
+
+SimulatedKinesisLib stands in for the ctypes handle of Thorlabs.MotionControl.KCube.DCServo.dll,
+so KDC101_Rotation runs unchanged on a machine without the stage:
+
+    Rmount = KDC101_Rotation("27257179", lib=SimulatedKinesisLib())
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from instruments.motion_profile import move_duration, trapezoid_profile
+
+# Kinesis message identifiers (GenericMotor messages have type 2)
+GENERIC_MOTOR = 2
+HOMED, MOVED, STOPPED = 0, 1, 2
+
+# KDC101 time base used by the velocity and acceleration unit conversion
+KDC101_T = 2048 / 6e6
+
+
+def _value(arg):
+    """Return the python value of a plain value, a ctypes value or a byref() of one."""
+    arg = getattr(arg, '_obj', arg)
+    return getattr(arg, 'value', arg)
+
+
+def _store(ref, value):
+    """Write value into the ctypes object behind a byref() or a pointer-like argument."""
+    obj = getattr(ref, '_obj', ref)
+    obj.value = type(obj.value)(value)
+
+
+class SimulatedStage:
+    """State of one simulated KDC101 controller and its rotation mount."""
+    def __init__(self, velocity=10.0, acceleration=10.0, home_velocity=10.0, position_error=0.0, rng=None):
+        self.steps_per_deg = 1919.64186
+        self.position = 0.0
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.home_velocity = home_velocity
+        self.jog_step = 1.0
+        self.move = None  # (t_start, start, target, velocity, acceleration, t_end, message_id)
+        self.move_target = 0.0
+        self.messages = deque()
+        self.message_ready = threading.Condition()
+        self.timer = None
+        self.poll_interval = None
+        self.poll_start = 0.0
+        self.completed_at = None
+        # standard deviation (°) of where a move settles around its target
+        self.position_error = position_error
+        self.move_error = 0.0
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.is_open = False
+
+    def real_position(self, t=None):
+        t = time.perf_counter() if t is None else t
+        if self.move is None:
+            return self.position
+        t_start, start, target, velocity, acceleration, t_end, message_id = self.move
+        if t >= t_end:
+            return target + self.move_error
+        return float(trapezoid_profile(t - t_start, start, target, velocity, acceleration))
+
+    def is_moving(self, t=None):
+        t = time.perf_counter() if t is None else t
+        return self.move is not None and t < self.move[5]
+
+    def start_move(self, target, velocity=None, message_id=MOVED):
+        now = time.perf_counter()
+        start = self.real_position(now)
+        self.cancel_move(now, post_message=False)
+        velocity = self.velocity if velocity is None else velocity
+        duration = move_duration(target - start, velocity, self.acceleration)
+        self.move_error = self.rng.normal(0.0, self.position_error) if self.position_error else 0.0
+        self.move = (now, start, target, velocity, self.acceleration, now + duration, message_id)
+        self.timer = threading.Timer(duration, self.finish_move, args=(self.move,))
+        self.timer.daemon = True
+        self.timer.start()
+
+    def finish_move(self, move):
+        if self.move is not move:
+            return
+        self.position = move[2] + self.move_error
+        self.move = None
+        # the move completed message carries a status update, so the polled position is current from here
+        self.completed_at = time.perf_counter()
+        self.post_message(GENERIC_MOTOR, move[6])
+
+    def cancel_move(self, t=None, post_message=True):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.move is not None:
+            self.position = self.real_position(t)
+            self.move = None
+            if post_message:
+                self.post_message(GENERIC_MOTOR, STOPPED)
+
+    def post_message(self, msg_type, msg_id, msg_data=0):
+        with self.message_ready:
+            self.messages.append((msg_type, msg_id, msg_data))
+            self.message_ready.notify_all()
+
+    def polled_position(self):
+        """Position as last reported by the polling loop (the real device is only read every poll interval)."""
+        now = time.perf_counter()
+        if not self.poll_interval:
+            return self.real_position(now)
+        ticks = int((now - self.poll_start) / self.poll_interval)
+        t = self.poll_start + ticks * self.poll_interval
+        if self.completed_at is not None and self.completed_at > t:
+            t = self.completed_at
+        return self.real_position(t)
+
+
+class SimulatedKinesisLib:
+    """
+    Drop-in replacement for the Kinesis KCube DC servo ctypes library.
+    Moves follow a trapezoidal velocity profile in wall-clock time and post
+    the Homed/Moved messages that CC_WaitForMessage returns.
+    :param serials: Serial numbers reported by the device list.
+    :param call_latency: Time (s) spent in every DLL call, models the USB round trip.
+    :param position_error: Standard deviation (°) of the final position of a move around its target.
+    """
+    def __init__(self, serials=("27257179",), velocity=10.0, acceleration=10.0, call_latency=0.0005,
+                 position_error=0.0, seed=None):
+        self.call_latency = call_latency
+        self.stage_params = {'velocity': velocity, 'acceleration': acceleration, 'position_error': position_error,
+                             'rng': np.random.default_rng(seed)}
+        self.stages = {str(s): SimulatedStage(**self.stage_params) for s in serials}
+
+    def add_stage(self, serial):
+        """Add a controller to the device list, like plugging in another KDC101."""
+        if str(serial) not in self.stages:
+            self.stages[str(serial)] = SimulatedStage(**self.stage_params)
+
+    def _stage(self, serial_num):
+        time.sleep(self.call_latency)
+        serial = _value(serial_num)
+        if isinstance(serial, bytes):
+            serial = serial.decode()
+        return self.stages[serial]
+
+    def real_position(self, serial=None):
+        """Current true position (°) of a stage, for coupling simulated instruments to the motion."""
+        stage = self.stages[serial] if serial is not None else next(iter(self.stages.values()))
+        return stage.real_position()
+
+    # Device list
+    def TLI_BuildDeviceList(self):
+        time.sleep(self.call_latency)
+        return 0
+
+    def TLI_GetDeviceListSize(self):
+        return len(self.stages)
+
+    def TLI_GetDeviceListByTypeExt(self, buffer, size, type_id):
+        buffer.value = ",".join(self.stages).encode()[:int(_value(size)) - 1]
+        return 0
+
+    # Connection
+    def CC_Open(self, serial_num):
+        self._stage(serial_num).is_open = True
+        return 0
+
+    def CC_Close(self, serial_num):
+        stage = self._stage(serial_num)
+        stage.cancel_move(post_message=False)
+        stage.is_open = False
+
+    def CC_StartPolling(self, serial_num, rate):
+        stage = self._stage(serial_num)
+        stage.poll_interval = _value(rate) / 1000
+        stage.poll_start = time.perf_counter()
+        return True
+
+    def CC_StopPolling(self, serial_num):
+        self._stage(serial_num).poll_interval = None
+
+    # Messages
+    def CC_ClearMessageQueue(self, serial_num):
+        stage = self._stage(serial_num)
+        with stage.message_ready:
+            stage.messages.clear()
+
+    def CC_MessageQueueSize(self, serial_num):
+        return len(self._stage(serial_num).messages)
+
+    def CC_WaitForMessage(self, serial_num, msg_type, msg_id, msg_data):
+        stage = self._stage(serial_num)
+        with stage.message_ready:
+            stage.message_ready.wait_for(lambda: stage.messages)
+            message = stage.messages.popleft()
+        for ref, value in zip((msg_type, msg_id, msg_data), message):
+            _store(ref, value)
+        return True
+
+    def CC_GetNextMessage(self, serial_num, msg_type, msg_id, msg_data):
+        stage = self._stage(serial_num)
+        with stage.message_ready:
+            if not stage.messages:
+                return False
+            message = stage.messages.popleft()
+        for ref, value in zip((msg_type, msg_id, msg_data), message):
+            _store(ref, value)
+        return True
+
+    # Unit conversion, unit_type 0: distance, 1: velocity, 2: acceleration
+    def _scale(self, stage, unit_type):
+        return stage.steps_per_deg * {0: 1.0, 1: KDC101_T * 65536, 2: KDC101_T ** 2 * 65536}[int(_value(unit_type))]
+
+    def CC_SetMotorParamsExt(self, serial_num, steps_per_rev, gbox_ratio, pitch):
+        stage = self._stage(serial_num)
+        stage.steps_per_deg = _value(steps_per_rev) * _value(gbox_ratio) / _value(pitch)
+        return 0
+
+    def CC_GetDeviceUnitFromRealValue(self, serial_num, real_value, device_value, unit_type):
+        stage = self._stage(serial_num)
+        _store(device_value, round(_value(real_value) * self._scale(stage, unit_type)))
+        return 0
+
+    def CC_GetRealValueFromDeviceUnit(self, serial_num, device_value, real_value, unit_type):
+        stage = self._stage(serial_num)
+        _store(real_value, _value(device_value) / self._scale(stage, unit_type))
+        return 0
+
+    # Motion parameters
+    def CC_GetVelParams(self, serial_num, acceleration, max_velocity):
+        stage = self._stage(serial_num)
+        _store(acceleration, round(stage.acceleration * self._scale(stage, 2)))
+        _store(max_velocity, round(stage.velocity * self._scale(stage, 1)))
+        return 0
+
+    def CC_SetVelParams(self, serial_num, acceleration, max_velocity):
+        stage = self._stage(serial_num)
+        stage.acceleration = _value(acceleration) / self._scale(stage, 2)
+        stage.velocity = _value(max_velocity) / self._scale(stage, 1)
+        return 0
+
+    def CC_SetJogMode(self, serial_num, mode, stop_mode):
+        self._stage(serial_num)
+        return 0
+
+    def CC_SetJogVelParams(self, serial_num, acceleration, max_velocity):
+        self._stage(serial_num)
+        return 0
+
+    def CC_SetJogStepSize(self, serial_num, step_size):
+        stage = self._stage(serial_num)
+        stage.jog_step = _value(step_size) / stage.steps_per_deg
+        return 0
+
+    # Motion
+    def CC_Home(self, serial_num):
+        stage = self._stage(serial_num)
+        stage.start_move(0.0, velocity=stage.home_velocity, message_id=HOMED)
+        return 0
+
+    def CC_SetMoveAbsolutePosition(self, serial_num, position):
+        stage = self._stage(serial_num)
+        stage.move_target = _value(position) / stage.steps_per_deg
+        return 0
+
+    def CC_MoveAbsolute(self, serial_num):
+        stage = self._stage(serial_num)
+        stage.start_move(stage.move_target)
+        return 0
+
+    def CC_MoveToPosition(self, serial_num, position):
+        stage = self._stage(serial_num)
+        stage.start_move(_value(position) / stage.steps_per_deg)
+        return 0
+
+    def CC_MoveRelative(self, serial_num, displacement):
+        stage = self._stage(serial_num)
+        target = stage.move[2] if stage.is_moving() else stage.real_position()
+        stage.start_move(target + _value(displacement) / stage.steps_per_deg)
+        return 0
+
+    def CC_MoveJog(self, serial_num, direction):
+        stage = self._stage(serial_num)
+        sign = 1 if int(_value(direction)) == 2 else -1
+        stage.start_move(stage.real_position() + sign * stage.jog_step)
+        return 0
+
+    def CC_StopImmediate(self, serial_num):
+        self._stage(serial_num).cancel_move()
+        return 0
+
+    def CC_StopProfiled(self, serial_num):
+        self._stage(serial_num).cancel_move()
+        return 0
+
+    # Status
+    def CC_RequestPosition(self, serial_num):
+        self._stage(serial_num)
+        return 0
+
+    def CC_GetPosition(self, serial_num):
+        stage = self._stage(serial_num)
+        return round(stage.polled_position() * stage.steps_per_deg)
+
+    def CC_RequestStatusBits(self, serial_num):
+        self._stage(serial_num)
+        return 0
+
+    def CC_GetStatusBits(self, serial_num):
+        """Bit 4/5: moving clockwise/counterclockwise, bit 9: moving home, bit 10: homed."""
+        stage = self._stage(serial_num)
+        bits = 0x400
+        if stage.is_moving():
+            t_start, start, target, velocity, acceleration, t_end, message_id = stage.move
+            bits |= 0x10 if target >= start else 0x20
+            if message_id == HOMED:
+                bits |= 0x200
+        return bits
@@ -0,0 +1,329 @@
+"""
+Simulated Stanford Research Systems SR865A lock-in amplifier.
+
+SimulatedSRS865A behaves like the pyvisa resource that LockInAmplifier talks to. It answers
+the settings commands, OUTP?, SNAP? and the CAPTURE* commands including the binary block
+transfer, with configurable per-command latency and noise:
+
+    lockin = LockInAmplifier(inifile="lockin_params.ini")
+    lockin.open_instrument('SIM', resource_manager=SimulatedResourceManager())
+"""
+import math
+import time
+
+import numpy as np
+
+from instruments.Lockin.SRS865A import LockInAmplifier
+
+# seconds spent per transfer, 'query' is added when the transfer contains a query and
+# command specific entries are added per command
+default_latency = {'write': 0.0005, 'query': 0.0015, 'OUTP?': 0.002, 'SNAP?': 0.002}
+
+time_constants = [float(k.split()[0]) * {'us': 1e-6, 'ms': 1e-3, 's': 1.0, 'ks': 1e3}[k.split()[1]]
+                  for k in LockInAmplifier.time_constant_dict]
+
+# equivalent noise bandwidth * time constant for 6, 12, 18 and 24 dB/oct
+enbw_factor = [1 / 4, 1 / 8, 3 / 32, 5 / 64]
+
+enum_tokens = {
+    'SYNC': ['OFF', 'ON'],
+    'ISRC': ['A', 'A-B'],
+    'ICPL': ['AC', 'DC'],
+    'IGND': ['FLOAT', 'GROUND'],
+    'IVMD': ['VOLTAGE', 'CURRENT'],
+    'RSRC': ['INT', 'EXT', 'DUAL', 'CHOP'],
+    'RTRG': ['SIN', 'POSTTL', 'NEGTTL'],
+    'REFZ': ['50OHMS', '1MEG'],
+    'CAPTURECFG': ['X', 'XY', 'RT', 'XYRT'],
+}
+
+output_channels = {'X': 0, 'Y': 1, 'R': 2, 'THETA': 3, 'IN1': 4, 'IN2': 5, 'IN3': 6, 'IN4': 7}
+
+
+def default_reflectivity(angle):
+    """
+    Photodiode A and B test signals (V) against angle (°): a smooth background with a
+    narrow dip near 56.3° on A, and the complementary transmitted signal on B.
+    """
+    angle = np.asarray(angle, dtype=float)
+    background = 0.5 + 0.3 * np.cos(np.radians(angle)) ** 2
+    dip = 0.35 * np.exp(-((np.mod(angle, 180.0) - 56.3) / 0.8) ** 2)
+    A = background - dip
+    return A, 1.0 - 0.8 * A
+
+
+class SimulatedSRS865A:
+    """
+    :param angle_source: Callable returning the current stage angle (°), e.g. SimulatedKinesisLib.real_position.
+    :param signal: Callable mapping angles to the (A, B) photodiode signals.
+    :param noise_density: Input noise density (V/sqrt(Hz)) before the output filter.
+    :param latency: Per-command latency overrides, see default_latency.
+    :param transfer_rate: Binary block transfer rate in bytes/s.
+    """
+    max_capture_rate = 1.25e6
+
+    def __init__(self, angle_source=None, signal=default_reflectivity, noise_density=1e-4, latency=None,
+                 transfer_rate=4e6, seed=None):
+        self.angle_source = angle_source or (lambda: 0.0)
+        self.signal = signal
+        self.noise_density = noise_density
+        self.latency = dict(default_latency, **(latency or {}))
+        self.transfer_rate = transfer_rate
+        self.rng = np.random.default_rng(seed)
+        self.timeout = 2000
+        self.settings = {'OFLT': 8, 'SCAL': 0, 'IRNG': 0, 'OFSL': 1, 'SYNC': 0, 'ISRC': 0, 'ICPL': 0,
+                         'IGND': 0, 'IVMD': 0, 'ICUR': 0, 'RSRC': 1, 'RTRG': 0, 'REFZ': 0, 'PHAS': 0.0,
+                         'CAPTURERATE': 0, 'CAPTURELEN': 256, 'CAPTURECFG': 1}
+        self.frequency = 1000.0
+        self.event_status = 0
+        self.response = b''
+        self.filter_state = None
+        self.filter_time = time.perf_counter()
+        self.reset_capture()
+
+    # pyvisa resource interface
+    def write(self, command):
+        commands = [cmd.strip() for cmd in command.split(';') if cmd.strip()]
+        names = [cmd.split(None, 1)[0].upper() for cmd in commands]
+        # one USB transfer per write, plus the query turnaround and any per-command extra
+        time.sleep(self.latency['write'] + sum(self.latency.get(name, 0) for name in names) +
+                   (self.latency['query'] if any(name.endswith('?') for name in names) else 0))
+        responses = []
+        for cmd in commands:
+            answer = self.execute(cmd)
+            if answer is not None:
+                responses.append(answer)
+        if responses:
+            if isinstance(responses[-1], bytes):
+                self.response = responses[-1]
+            else:
+                self.response = (';'.join(responses) + '\n').encode()
+        return len(command)
+
+    def read_raw(self, size=None):
+        response, self.response = self.response, b''
+        if response.startswith(b'#'):
+            time.sleep(len(response) / self.transfer_rate)
+        return response
+
+    def read(self):
+        return self.read_raw().decode()
+
+    def query(self, command):
+        self.write(command)
+        return self.read()
+
+    def close(self):
+        self.stop_capture_now()
+
+    # command handling
+    def execute(self, cmd):
+        name, _, args = cmd.partition(' ')
+        name = name.upper()
+        args = [a.strip() for a in args.split(',')] if args.strip() else []
+        self.advance_capture()
+
+        if name == '*IDN?':
+            return 'Stanford_Research_Systems,SR865A,005180,V1.47'
+        if name == '*ESR?':
+            status, self.event_status = self.event_status, 0
+            return str(status)
+        if name == 'OUTP?':
+            return f'{self.read_outputs()[self.channel_index(args[0])]:.6e}'
+        if name == 'SNAP?':
+            outputs = self.read_outputs()
+            return ','.join(f'{outputs[self.channel_index(a)]:.6e}' for a in args)
+        if name == 'FREQEXT?':
+            return f'{self.frequency:.6e}'
+        if name == 'PHAS':
+            self.settings['PHAS'] = float(args[0].split()[0])
+            return None
+        if name == 'APHS':
+            self.settings['PHAS'] = 0.0
+            return None
+        if name == 'TRIG':
+            self.trigger()
+            return None
+        if name == '*CLS':
+            self.event_status = 0
+            return None
+        if name == 'CDSP':
+            return None
+        if name == 'CAPTURERATEMAX?':
+            return f'{self.capture_rate_max():.6e}'
+        if name == 'CAPTURERATE?':
+            return f'{self.capture_rate():.6e}'
+        if name == 'CAPTURESTART':
+            self.start_capture(args[0].upper(), args[1].upper() if len(args) > 1 else 'IMM')
+            return None
+        if name == 'CAPTURESTOP':
+            self.stop_capture_now()
+            return None
+        if name == 'CAPTURESTAT?':
+            return str(self.capture_status())
+        if name == 'CAPTUREBYTES?':
+            return str(self.capture_frames * self.capture_channels() * 4)
+        if name == 'CAPTUREPROG?':
+            return str(self.capture_filled_bytes() // 1024)
+        if name == 'CAPTUREGET?':
+            return self.capture_block(int(args[0]), int(args[1]))
+        if name == 'CAPTUREVAL?':
+            frame = int(args[0]) % max(self.capture_capacity_frames(), 1)
+            values = self.capture_buffer.reshape(-1, self.capture_channels())[frame]
+            return ','.join(f'{v:.6e}' for v in values)
+        if name.endswith('?') and name[:-1] in self.settings:
+            value = self.settings[name[:-1]]
+            return f'{value:.6e}' if isinstance(value, float) else str(value)
+        if name in self.settings:
+            self.settings[name] = self.parse_setting(name, args[0])
+            if name == 'OFLT' or name == 'OFSL':
+                self.filter_state = None
+            return None
+        raise ValueError(f'simulated SR865A: unsupported command {cmd}')
+
+    def front_panel(self, name, value):
+        """Change a setting as if from the front panel, which sets the URQ bit of *ESR?."""
+        self.settings[name] = self.parse_setting(name, str(value))
+        self.event_status |= 0x40
+
+    def parse_setting(self, name, arg):
+        tokens = enum_tokens.get(name)
+        if tokens is not None and not arg.lstrip('-').isdigit():
+            arg = arg.upper()
+            matches = [i for i, token in enumerate(tokens) if token == arg or token.startswith(arg)]
+            if not matches:
+                raise ValueError(f'simulated SR865A: invalid parameter {name} {arg}')
+            return matches[0]
+        return int(arg)
+
+    @staticmethod
+    def channel_index(token):
+        token = token.strip().upper()
+        if token.isdigit():
+            return int(token)
+        for name, index in output_channels.items():
+            if name.startswith(token) or token.startswith(name):
+                return index
+        raise ValueError(f'simulated SR865A: unknown channel {token}')
+
+    # output filter
+    def time_constant(self):
+        return time_constants[self.settings['OFLT']]
+
+    def read_outputs(self):
+        """X, Y, R, theta, IN1..IN4 after the cascaded RC output filter."""
+        now = time.perf_counter()
+        target = np.array(self.signal(self.angle_source()), dtype=float)
+        order = self.settings['OFSL'] + 1
+        if self.filter_state is None:
+            self.filter_state = np.tile(target, (order, 1))
+        else:
+            alpha = 1 - math.exp(-(now - self.filter_time) / self.time_constant())
+            previous = target
+            for stage in self.filter_state:
+                stage += alpha * (previous - stage)
+                previous = stage
+        self.filter_time = now
+        noise = self.noise_density * math.sqrt(enbw_factor[self.settings['OFSL']] / self.time_constant())
+        A, B = self.filter_state[-1] + noise * self.rng.standard_normal(2)
+        X, Y = A, B
+        return [X, Y, math.hypot(X, Y), math.degrees(math.atan2(Y, X)), A, B, 0.0, 0.0]
+
+    # capture buffer
+    def reset_capture(self):
+        self.capture_state = 'idle'
+        self.capture_mode = 'ONE'
+        self.capture_start = 0.0
+        self.capture_frames = 0
+        self.capture_last_angle = None
+        self.capture_buffer = np.zeros(self.settings['CAPTURELEN'] * 256, dtype='<f4')
+
+    def capture_rate_max(self):
+        k = max(0, math.ceil(math.log2(self.max_capture_rate * self.time_constant() / 4)))
+        return self.max_capture_rate / 2 ** k
+
+    def capture_rate(self):
+        return self.capture_rate_max() / 2 ** self.settings['CAPTURERATE']
+
+    def capture_channels(self):
+        return (1, 2, 2, 4)[self.settings['CAPTURECFG']]
+
+    def capture_capacity_frames(self):
+        return len(self.capture_buffer) // self.capture_channels()
+
+    def capture_filled_bytes(self):
+        return min(self.capture_frames, self.capture_capacity_frames()) * self.capture_channels() * 4
+
+    def start_capture(self, mode, trigger):
+        self.reset_capture()
+        self.capture_mode = mode
+        if trigger.startswith('TRIG'):
+            self.capture_state = 'armed'
+        else:
+            self.trigger()
+
+    def trigger(self):
+        if self.capture_state in ('armed', 'idle'):
+            self.capture_state = 'running'
+            self.capture_start = time.perf_counter()
+            self.capture_last_angle = self.angle_source()
+
+    def stop_capture_now(self):
+        self.advance_capture()
+        if self.capture_state in ('running', 'armed'):
+            self.capture_state = 'done'
+
+    def capture_status(self):
+        return {'idle': 0, 'armed': 0, 'running': 3, 'done': 6}[self.capture_state]
+
+    def advance_capture(self):
+        """Generate the samples captured since the last command."""
+        if self.capture_state != 'running':
+            return
+        rate = self.capture_rate()
+        due = int((time.perf_counter() - self.capture_start) * rate)
+        capacity = self.capture_capacity_frames()
+        if self.capture_mode == 'ONE':
+            due = min(due, capacity)
+        n = due - self.capture_frames
+        if n > 0:
+            angle = self.angle_source()
+            angles = np.linspace(self.capture_last_angle, angle, n + 1)[1:]
+            self.capture_last_angle = angle
+            noise = self.noise_density * math.sqrt(enbw_factor[self.settings['OFSL']] / self.time_constant())
+            A, B = self.signal(angles)
+            A = A + noise * self.rng.standard_normal(n)
+            B = B + noise * self.rng.standard_normal(n)
+            X, Y = A, B
+            columns = {'X': X, 'Y': Y, 'R': np.hypot(X, Y), 'T': np.degrees(np.arctan2(Y, X))}
+            frames = np.column_stack([columns[c] for c in enum_tokens['CAPTURECFG'][self.settings['CAPTURECFG']]])
+            frames = frames.astype('<f4')
+            if n > capacity:
+                frames = frames[-capacity:]
+            first = (due - len(frames)) % capacity
+            buffer = self.capture_buffer.reshape(-1, self.capture_channels())
+            head = min(len(frames), capacity - first)
+            buffer[first:first + head] = frames[:head]
+            buffer[:len(frames) - head] = frames[head:]
+            self.capture_frames = due
+        if self.capture_mode == 'ONE' and self.capture_frames >= capacity:
+            self.capture_state = 'done'
+
+    def capture_block(self, offset_kbytes, len_kbytes):
+        payload = self.capture_buffer.tobytes()[offset_kbytes * 1024:(offset_kbytes + len_kbytes) * 1024]
+        length = str(len(payload))
+        return f'#{len(length)}{length}'.encode() + payload
+
+
+class SimulatedResourceManager:
+    """Stands in for pyvisa.ResourceManager(), every address opens a SimulatedSRS865A."""
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.resources = {}
+
+    def open_resource(self, resource_name):
+        self.resources[resource_name] = SimulatedSRS865A(**self.kwargs)
+        return self.resources[resource_name]
+
+    def list_resources(self):
+        return tuple(self.resources)
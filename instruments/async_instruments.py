@@ -0,0 +1,118 @@
+"""
+asyncio wrappers for the blocking instrument drivers.
+
+Blocking DLL and VISA calls run on a bounded thread pool shared by all
+instruments, moves are awaited by polling for completion from the event loop,
+so several mounts and lock-ins can be driven from one thread:
+
+    async def measure(mounts, lockins, angles):
+        await asyncio.gather(*(m.move_absolute(a) for m, a in zip(mounts, angles)))
+        return await asyncio.gather(*(l.get_multiple_channel_data('IN1, IN2') for l in lockins))
+
+    mounts = [AsyncKDC101(KDC101_Rotation(serial)) for serial in ("27257179", "27257180")]
+    lockins = [AsyncLockIn(lockin1), AsyncLockIn(lockin2)]
+    asyncio.run(measure(mounts, lockins, (10.0, 45.0)))
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from instruments.KDC101.KDC101Controller import HOMED, MOVED
+
+_executor = None
+
+
+def get_executor(max_workers=8):
+    """The thread pool the blocking driver calls run on, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="instrument-io")
+    return _executor
+
+
+class AsyncInstrument:
+    """
+    Runs the methods of a blocking driver on the executor. Any driver method is
+    available as a coroutine, e.g. await AsyncLockIn(lockin).get_timeconstant().
+    """
+    def __init__(self, driver, executor=None, serialize=True):
+        """
+        :param serialize: Allow only one call at a time on this instrument, needed when a
+            transaction is a write followed by a read.
+        """
+        self.driver = driver
+        self.executor = executor or get_executor()
+        self.lock = asyncio.Lock() if serialize else None
+
+    async def call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        if self.lock is None:
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+        async with self.lock:
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attribute = getattr(self.driver, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def method(*args, **kwargs):
+            return await self.call(attribute, *args, **kwargs)
+        return method
+
+
+class AsyncKDC101(AsyncInstrument):
+    """
+    Awaitable moves for a KDC101_Rotation. No thread is blocked while the stage moves,
+    completion is polled from the event loop.
+    """
+    def __init__(self, Rmount, executor=None, poll_interval=0.005):
+        super().__init__(Rmount, executor, serialize=False)
+        self.poll_interval = poll_interval
+
+    async def wait_for_message(self, expected_id, timeout=None):
+        loop = asyncio.get_running_loop()
+        timeout = self.driver.timeout if timeout is None else timeout
+        deadline = loop.time() + timeout
+        seen_moving = False
+        while True:
+            done, seen_moving = await self.call(self.driver.check_completion, expected_id, seen_moving)
+            if done:
+                return
+            if loop.time() > deadline:
+                raise TimeoutError(f"Device {self.driver.serial_num.value.decode()} did not complete the move within {timeout} s.")
+            await asyncio.sleep(self.poll_interval)
+
+    async def home(self, timeout=None):
+        await self.call(self.driver.start_home)
+        await self.wait_for_message(HOMED, timeout)
+
+    async def move_absolute(self, target_position, timeout=None):
+        await self.call(self.driver.start_move_absolute, target_position)
+        await self.wait_for_message(MOVED, timeout)
+
+    async def move_relative(self, displacement, timeout=None):
+        await self.call(self.driver.start_move_relative, displacement)
+        await self.wait_for_message(MOVED, timeout)
+
+    async def get_position(self):
+        return await self.call(lambda: self.driver.position)
+
+
+class AsyncLockIn(AsyncInstrument):
+    """
+    Awaitable LockInAmplifier. Calls on one lock-in are serialized so VISA write/read
+    pairs never interleave, calls on different lock-ins run concurrently.
+    """
+    def __init__(self, lockin, executor=None):
+        super().__init__(lockin, executor, serialize=True)
+
+    async def settle(self):
+        """Wait for the output filter to settle after the input changed."""
+        await asyncio.sleep(await self.call(self.driver.get_settle_time))
+
+    async def read_point(self, channels='IN1, IN2'):
+        """Wait for the filter to settle and read the channels with one SNAP?."""
+        await self.settle()
+        return await self.call(self.driver.get_multiple_channel_data, channels)
@@ -0,0 +1,49 @@
+"""
+Trapezoidal move profile of the KDC101 mounts, shared by the fly scan, the sweep queue
+estimates and the simulated stage.
+"""
+import numpy as np
+
+
+def move_duration(distance, velocity, acceleration):
+    """
+    Duration (s) of a trapezoidal move over distance (°) with the given maximum velocity and acceleration.
+    """
+    distance = abs(distance)
+    if acceleration <= 0:
+        return distance / velocity
+    ramp_distance = velocity ** 2 / acceleration
+    if distance <= ramp_distance:
+        # triangular profile, the stage never reaches the set velocity
+        return 2 * np.sqrt(distance / acceleration)
+    return 2 * velocity / acceleration + (distance - ramp_distance) / velocity
+
+
+def trapezoid_profile(t, start, stop, velocity, acceleration):
+    """
+    Position (°) at times t (s after the move started) of a trapezoidal move from start to stop.
+    """
+    t = np.clip(np.asarray(t, dtype=float), 0, None)
+    distance = abs(stop - start)
+    direction = 1.0 if stop >= start else -1.0
+    if acceleration <= 0:
+        travelled = np.minimum(velocity * t, distance)
+        return start + direction * travelled
+
+    t_ramp = velocity / acceleration
+    if distance <= velocity * t_ramp:
+        t_ramp = np.sqrt(distance / acceleration)
+        velocity = acceleration * t_ramp
+    t_total = move_duration(distance, velocity, acceleration)
+    t_cruise_end = t_total - t_ramp
+
+    travelled = np.where(
+        t < t_ramp,
+        0.5 * acceleration * t ** 2,
+        np.where(
+            t < t_cruise_end,
+            0.5 * acceleration * t_ramp ** 2 + velocity * (t - t_ramp),
+            distance - 0.5 * acceleration * np.clip(t_total - t, 0, None) ** 2,
+        ),
+    )
+    return start + direction * np.minimum(travelled, distance)
@@ -0,0 +1,206 @@
+"""
+Opt-in call tracing for the instrument drivers.
+
+trace_stage and trace_lockin swap the ctypes library handle of a KDC101_Rotation and the
+VISA resource of a LockInAmplifier for wrappers that record every call into a CallTrace.
+Nothing is wrapped unless they are called, so untraced drivers run at full speed.
+
+    trace = CallTrace()
+    trace_stage(Rmount, trace)
+    trace_lockin(lockin, trace)
+    ... run a sweep ...
+    trace.print_summary()
+    trace.export_chrome_trace('trace.json')  # open in chrome://tracing or ui.perfetto.dev
+"""
+import json
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter_ns
+
+import numpy as np
+
+
+class CallTrace:
+    """
+    Ring of the last capacity calls, each stored as a tuple
+    (name, category, start_ns, stop_ns, num_bytes, thread_id).
+    """
+    # upper edges (ms) of the latency histogram bins of the summary
+    histogram_edges_ms = (0.1, 1, 10, 100, 1000)
+
+    def __init__(self, capacity=200000):
+        self.events = deque(maxlen=capacity)
+        self.t0 = perf_counter_ns()
+
+    def record(self, name, category, start_ns, stop_ns, num_bytes=0):
+        # deque.append is atomic, no lock needed between the driver threads
+        self.events.append((name, category, start_ns, stop_ns, num_bytes, threading.get_ident()))
+
+    @contextmanager
+    def span(self, name, category='app'):
+        """
+        Record the time spent in a with block, e.g. a sleep or a Qt slot.
+        """
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, perf_counter_ns())
+
+    def clear(self):
+        self.events.clear()
+
+    def __len__(self):
+        return len(self.events)
+
+    def chrome_trace(self):
+        """
+        The events in Chrome trace event format, also read by Perfetto.
+        """
+        pid = os.getpid()
+        trace_events = []
+        for name, category, start, stop, num_bytes, tid in list(self.events):
+            event = {'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                     'ts': (start - self.t0) / 1000.0, 'dur': (stop - start) / 1000.0}
+            if num_bytes:
+                event['args'] = {'bytes': num_bytes}
+            trace_events.append(event)
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self):
+        """
+        Per command latency statistics (ms), byte count and histogram over histogram_edges_ms.
+        """
+        durations, total_bytes = {}, {}
+        for name, category, start, stop, num_bytes, tid in list(self.events):
+            key = (category, name)
+            durations.setdefault(key, []).append(stop - start)
+            total_bytes[key] = total_bytes.get(key, 0) + num_bytes
+        edges = np.concatenate(([0], self.histogram_edges_ms, [np.inf]))
+        rows = []
+        for (category, name), values in durations.items():
+            ms = np.asarray(values) / 1e6
+            rows.append({'category': category, 'name': name, 'count': len(ms), 'total_ms': ms.sum(),
+                         'mean_ms': ms.mean(), 'p50_ms': np.percentile(ms, 50), 'p99_ms': np.percentile(ms, 99),
+                         'max_ms': ms.max(), 'bytes': total_bytes[(category, name)],
+                         'histogram': np.histogram(ms, bins=edges)[0].tolist()})
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+    def print_summary(self):
+        bins = ['<' + format(edge, 'g') for edge in self.histogram_edges_ms] + ['more']
+        print(f"{'command':<34}{'count':>7}{'total ms':>11}{'mean ms':>10}{'p50 ms':>9}{'p99 ms':>9}"
+              f"{'max ms':>9}{'bytes':>11}  histogram ms " + ' '.join(bins))
+        for row in self.summary():
+            command = (row['category'] + ':' + row['name'])[:33]
+            print(f"{command:<34}{row['count']:>7}{row['total_ms']:>11.2f}"
+                  f"{row['mean_ms']:>10.3f}{row['p50_ms']:>9.3f}{row['p99_ms']:>9.3f}{row['max_ms']:>9.2f}"
+                  f"{row['bytes']:>11}  {row['histogram']}")
+
+
+class TracedLib:
+    """
+    Wrapper of a ctypes library (or a SimulatedKinesisLib) that records every function call.
+    """
+    def __init__(self, lib, trace, category='kinesis'):
+        self.lib = lib
+        self.trace = trace
+        self.category = category
+
+    def __getattr__(self, name):
+        function = getattr(self.lib, name)
+        if not callable(function):
+            return function
+        record = self.trace.record
+        category = self.category
+
+        def traced(*args):
+            start = perf_counter_ns()
+            try:
+                return function(*args)
+            finally:
+                record(name, category, start, perf_counter_ns())
+        # cache the wrapper so later lookups skip __getattr__
+        self.__dict__[name] = traced
+        return traced
+
+
+class TracedResource:
+    """
+    Wrapper of a pyvisa resource that records write, query and read calls with the
+    command mnemonic and the number of bytes transferred.
+    """
+    def __init__(self, resource, trace, category='visa'):
+        self.__dict__['resource'] = resource
+        self.__dict__['trace'] = trace
+        self.__dict__['category'] = category
+
+    def __getattr__(self, name):
+        return getattr(self.resource, name)
+
+    def __setattr__(self, name, value):
+        # e.g. timeout is set on the resource itself
+        setattr(self.resource, name, value)
+
+    @staticmethod
+    def mnemonic(command):
+        return command.split(None, 1)[0] if command.strip() else command
+
+    def write(self, command, *args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return self.resource.write(command, *args, **kwargs)
+        finally:
+            self.trace.record('write ' + self.mnemonic(command), self.category, start, perf_counter_ns(), len(command))
+
+    def query(self, command, *args, **kwargs):
+        start = perf_counter_ns()
+        reply = ''
+        try:
+            reply = self.resource.query(command, *args, **kwargs)
+            return reply
+        finally:
+            self.trace.record('query ' + self.mnemonic(command), self.category, start, perf_counter_ns(),
+                              len(command) + len(reply))
+
+    def read(self, *args, **kwargs):
+        start = perf_counter_ns()
+        reply = ''
+        try:
+            reply = self.resource.read(*args, **kwargs)
+            return reply
+        finally:
+            self.trace.record('read', self.category, start, perf_counter_ns(), len(reply))
+
+    def read_raw(self, *args, **kwargs):
+        start = perf_counter_ns()
+        reply = b''
+        try:
+            reply = self.resource.read_raw(*args, **kwargs)
+            return reply
+        finally:
+            self.trace.record('read_raw', self.category, start, perf_counter_ns(), len(reply))
+
+
+def trace_stage(stage, trace):
+    """
+    Record the DLL calls of a KDC101_Rotation into trace.
+    """
+    if not isinstance(stage.lib, TracedLib):
+        stage.lib = TracedLib(stage.lib, trace)
+    return stage
+
+
+def trace_lockin(lockin, trace):
+    """
+    Record the VISA traffic of an opened LockInAmplifier into trace.
+    """
+    if not isinstance(lockin.inst, TracedResource):
+        lockin.inst = TracedResource(lockin.inst, trace)
+    return lockin
@@ -0,0 +1,540 @@
+# Form implementation generated from reading ui file 'interface.ui'
+#
+# Created by: PyQt6 UI code generator 6.11.0
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic6 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(859, 503)
+        self.centralwidget = QtWidgets.QWidget(parent=MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.verticalLayout = QtWidgets.QVBoxLayout(self.centralwidget)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.frame = QtWidgets.QFrame(parent=self.centralwidget)
+        self.frame.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame.setLineWidth(0)
+        self.frame.setObjectName("frame")
+        self.horizontalLayout = QtWidgets.QHBoxLayout(self.frame)
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.frame_2 = QtWidgets.QFrame(parent=self.frame)
+        self.frame_2.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_2.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_2.setLineWidth(0)
+        self.frame_2.setObjectName("frame_2")
+        self.verticalLayout_2 = QtWidgets.QVBoxLayout(self.frame_2)
+        self.verticalLayout_2.setObjectName("verticalLayout_2")
+        self.frame_4 = QtWidgets.QFrame(parent=self.frame_2)
+        self.frame_4.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_4.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_4.setLineWidth(0)
+        self.frame_4.setObjectName("frame_4")
+        self.verticalLayout_4 = QtWidgets.QVBoxLayout(self.frame_4)
+        self.verticalLayout_4.setObjectName("verticalLayout_4")
+        self.AngleDial = QtWidgets.QDial(parent=self.frame_4)
+        palette = QtGui.QPalette()
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.WindowText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.Button, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.Light, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.Midlight, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.Dark, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.Mid, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.Text, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.BrightText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.ButtonText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.Base, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.Window, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.Shadow, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.AlternateBase, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 220))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.ToolTipBase, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Active, QtGui.QPalette.ColorRole.ToolTipText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.WindowText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.Button, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.Light, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.Midlight, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.Dark, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.Mid, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.Text, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.BrightText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.ButtonText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.Base, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.Window, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.Shadow, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.AlternateBase, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 220))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.ToolTipBase, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Inactive, QtGui.QPalette.ColorRole.ToolTipText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.WindowText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.Button, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.Light, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.Midlight, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.Dark, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.Mid, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.Text, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.BrightText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.ButtonText, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.Base, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.Window, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.Shadow, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.AlternateBase, brush)
+        brush = QtGui.QBrush(QtGui.QColor(255, 255, 220))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.ToolTipBase, brush)
+        brush = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+        brush.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        palette.setBrush(QtGui.QPalette.ColorGroup.Disabled, QtGui.QPalette.ColorRole.ToolTipText, brush)
+        self.AngleDial.setPalette(palette)
+        self.AngleDial.setFocusPolicy(QtCore.Qt.FocusPolicy.ClickFocus)
+        self.AngleDial.setLayoutDirection(QtCore.Qt.LayoutDirection.RightToLeft)
+        self.AngleDial.setAutoFillBackground(False)
+        self.AngleDial.setMaximum(360)
+        self.AngleDial.setPageStep(10)
+        self.AngleDial.setProperty("value", 3)
+        self.AngleDial.setTracking(True)
+        self.AngleDial.setOrientation(QtCore.Qt.Orientation.Horizontal)
+        self.AngleDial.setInvertedAppearance(False)
+        self.AngleDial.setInvertedControls(False)
+        self.AngleDial.setWrapping(True)
+        self.AngleDial.setNotchTarget(5.0)
+        self.AngleDial.setNotchesVisible(True)
+        self.AngleDial.setObjectName("AngleDial")
+        self.verticalLayout_4.addWidget(self.AngleDial)
+        self.verticalLayout_2.addWidget(self.frame_4)
+        self.frame_5 = QtWidgets.QFrame(parent=self.frame_2)
+        self.frame_5.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_5.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_5.setLineWidth(0)
+        self.frame_5.setObjectName("frame_5")
+        self.verticalLayout_3 = QtWidgets.QVBoxLayout(self.frame_5)
+        self.verticalLayout_3.setContentsMargins(2, 2, 2, 2)
+        self.verticalLayout_3.setSpacing(2)
+        self.verticalLayout_3.setObjectName("verticalLayout_3")
+        self.frame_16 = QtWidgets.QFrame(parent=self.frame_5)
+        self.frame_16.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_16.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_16.setObjectName("frame_16")
+        self.horizontalLayout_11 = QtWidgets.QHBoxLayout(self.frame_16)
+        self.horizontalLayout_11.setContentsMargins(1, 1, 1, 1)
+        self.horizontalLayout_11.setSpacing(1)
+        self.horizontalLayout_11.setObjectName("horizontalLayout_11")
+        self.AngleTx = QtWidgets.QTextEdit(parent=self.frame_16)
+        self.AngleTx.setMaximumSize(QtCore.QSize(80, 20))
+        self.AngleTx.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
+        self.AngleTx.setFrameShadow(QtWidgets.QFrame.Shadow.Plain)
+        self.AngleTx.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.AngleTx.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.AngleTx.setLineWrapMode(QtWidgets.QTextEdit.LineWrapMode.WidgetWidth)
+        self.AngleTx.setObjectName("AngleTx")
+        self.horizontalLayout_11.addWidget(self.AngleTx)
+        self.verticalLayout_3.addWidget(self.frame_16)
+        self.frame_9 = QtWidgets.QFrame(parent=self.frame_5)
+        self.frame_9.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_9.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_9.setLineWidth(0)
+        self.frame_9.setObjectName("frame_9")
+        self.horizontalLayout_2 = QtWidgets.QHBoxLayout(self.frame_9)
+        self.horizontalLayout_2.setObjectName("horizontalLayout_2")
+        self.frame_11 = QtWidgets.QFrame(parent=self.frame_9)
+        self.frame_11.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_11.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_11.setLineWidth(0)
+        self.frame_11.setObjectName("frame_11")
+        self.horizontalLayout_3 = QtWidgets.QHBoxLayout(self.frame_11)
+        self.horizontalLayout_3.setContentsMargins(2, 2, 2, 2)
+        self.horizontalLayout_3.setSpacing(2)
+        self.horizontalLayout_3.setObjectName("horizontalLayout_3")
+        self.ConnectBT = QtWidgets.QPushButton(parent=self.frame_11)
+        self.ConnectBT.setObjectName("ConnectBT")
+        self.horizontalLayout_3.addWidget(self.ConnectBT)
+        self.horizontalLayout_2.addWidget(self.frame_11)
+        self.frame_10 = QtWidgets.QFrame(parent=self.frame_9)
+        self.frame_10.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_10.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_10.setLineWidth(0)
+        self.frame_10.setObjectName("frame_10")
+        self.horizontalLayout_4 = QtWidgets.QHBoxLayout(self.frame_10)
+        self.horizontalLayout_4.setContentsMargins(2, 2, 2, 2)
+        self.horizontalLayout_4.setSpacing(2)
+        self.horizontalLayout_4.setObjectName("horizontalLayout_4")
+        self.DisconnectBT = QtWidgets.QPushButton(parent=self.frame_10)
+        self.DisconnectBT.setObjectName("DisconnectBT")
+        self.horizontalLayout_4.addWidget(self.DisconnectBT)
+        self.horizontalLayout_2.addWidget(self.frame_10)
+        self.frame_19 = QtWidgets.QFrame(parent=self.frame_9)
+        self.frame_19.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_19.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_19.setObjectName("frame_19")
+        self.horizontalLayout_12 = QtWidgets.QHBoxLayout(self.frame_19)
+        self.horizontalLayout_12.setObjectName("horizontalLayout_12")
+        self.ConnectLockinBT = QtWidgets.QPushButton(parent=self.frame_19)
+        self.ConnectLockinBT.setObjectName("ConnectLockinBT")
+        self.horizontalLayout_12.addWidget(self.ConnectLockinBT)
+        self.horizontalLayout_2.addWidget(self.frame_19)
+        self.verticalLayout_3.addWidget(self.frame_9)
+        self.frame_8 = QtWidgets.QFrame(parent=self.frame_5)
+        self.frame_8.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_8.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_8.setLineWidth(0)
+        self.frame_8.setObjectName("frame_8")
+        self.horizontalLayout_5 = QtWidgets.QHBoxLayout(self.frame_8)
+        self.horizontalLayout_5.setContentsMargins(2, 2, 2, 2)
+        self.horizontalLayout_5.setSpacing(2)
+        self.horizontalLayout_5.setObjectName("horizontalLayout_5")
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_5.addItem(spacerItem)
+        self.HomeBT = QtWidgets.QPushButton(parent=self.frame_8)
+        self.HomeBT.setObjectName("HomeBT")
+        self.horizontalLayout_5.addWidget(self.HomeBT)
+        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_5.addItem(spacerItem1)
+        self.verticalLayout_3.addWidget(self.frame_8)
+        self.frame_7 = QtWidgets.QFrame(parent=self.frame_5)
+        self.frame_7.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_7.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_7.setLineWidth(0)
+        self.frame_7.setObjectName("frame_7")
+        self.horizontalLayout_6 = QtWidgets.QHBoxLayout(self.frame_7)
+        self.horizontalLayout_6.setObjectName("horizontalLayout_6")
+        self.frame_12 = QtWidgets.QFrame(parent=self.frame_7)
+        self.frame_12.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_12.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_12.setLineWidth(0)
+        self.frame_12.setObjectName("frame_12")
+        self.horizontalLayout_7 = QtWidgets.QHBoxLayout(self.frame_12)
+        self.horizontalLayout_7.setContentsMargins(2, 2, 2, 2)
+        self.horizontalLayout_7.setSpacing(2)
+        self.horizontalLayout_7.setObjectName("horizontalLayout_7")
+        self.BackwardBT = QtWidgets.QPushButton(parent=self.frame_12)
+        self.BackwardBT.setObjectName("BackwardBT")
+        self.horizontalLayout_7.addWidget(self.BackwardBT)
+        self.horizontalLayout_6.addWidget(self.frame_12)
+        self.frame_13 = QtWidgets.QFrame(parent=self.frame_7)
+        self.frame_13.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_13.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_13.setLineWidth(0)
+        self.frame_13.setObjectName("frame_13")
+        self.horizontalLayout_8 = QtWidgets.QHBoxLayout(self.frame_13)
+        self.horizontalLayout_8.setContentsMargins(2, 2, 2, 2)
+        self.horizontalLayout_8.setSpacing(2)
+        self.horizontalLayout_8.setObjectName("horizontalLayout_8")
+        self.ForwardBT = QtWidgets.QPushButton(parent=self.frame_13)
+        self.ForwardBT.setObjectName("ForwardBT")
+        self.horizontalLayout_8.addWidget(self.ForwardBT)
+        self.horizontalLayout_6.addWidget(self.frame_13)
+        self.verticalLayout_3.addWidget(self.frame_7)
+        self.frame_6 = QtWidgets.QFrame(parent=self.frame_5)
+        self.frame_6.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_6.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_6.setLineWidth(0)
+        self.frame_6.setObjectName("frame_6")
+        self.horizontalLayout_9 = QtWidgets.QHBoxLayout(self.frame_6)
+        self.horizontalLayout_9.setContentsMargins(1, 1, 1, 1)
+        self.horizontalLayout_9.setSpacing(2)
+        self.horizontalLayout_9.setObjectName("horizontalLayout_9")
+        self.frame_14 = QtWidgets.QFrame(parent=self.frame_6)
+        self.frame_14.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_14.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_14.setLineWidth(0)
+        self.frame_14.setObjectName("frame_14")
+        self.verticalLayout_8 = QtWidgets.QVBoxLayout(self.frame_14)
+        self.verticalLayout_8.setSizeConstraint(QtWidgets.QLayout.SizeConstraint.SetNoConstraint)
+        self.verticalLayout_8.setContentsMargins(0, 0, 0, 0)
+        self.verticalLayout_8.setSpacing(1)
+        self.verticalLayout_8.setObjectName("verticalLayout_8")
+        self.StartTX = QtWidgets.QTextEdit(parent=self.frame_14)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.StartTX.sizePolicy().hasHeightForWidth())
+        self.StartTX.setSizePolicy(sizePolicy)
+        self.StartTX.setMaximumSize(QtCore.QSize(16777215, 20))
+        self.StartTX.setFrameShape(QtWidgets.QFrame.Shape.Box)
+        self.StartTX.setFrameShadow(QtWidgets.QFrame.Shadow.Plain)
+        self.StartTX.setLineWidth(0)
+        self.StartTX.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.StartTX.setObjectName("StartTX")
+        self.verticalLayout_8.addWidget(self.StartTX)
+        self.horizontalLayout_9.addWidget(self.frame_14)
+        self.frame_17 = QtWidgets.QFrame(parent=self.frame_6)
+        self.frame_17.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_17.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_17.setLineWidth(0)
+        self.frame_17.setObjectName("frame_17")
+        self.verticalLayout_6 = QtWidgets.QVBoxLayout(self.frame_17)
+        self.verticalLayout_6.setSizeConstraint(QtWidgets.QLayout.SizeConstraint.SetNoConstraint)
+        self.verticalLayout_6.setContentsMargins(1, 1, 1, 1)
+        self.verticalLayout_6.setSpacing(1)
+        self.verticalLayout_6.setObjectName("verticalLayout_6")
+        self.StopTX = QtWidgets.QTextEdit(parent=self.frame_17)
+        self.StopTX.setMaximumSize(QtCore.QSize(16777215, 20))
+        self.StopTX.setFrameShape(QtWidgets.QFrame.Shape.Box)
+        self.StopTX.setFrameShadow(QtWidgets.QFrame.Shadow.Plain)
+        self.StopTX.setLineWidth(-2)
+        self.StopTX.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.StopTX.setObjectName("StopTX")
+        self.verticalLayout_6.addWidget(self.StopTX)
+        self.horizontalLayout_9.addWidget(self.frame_17)
+        self.frame_18 = QtWidgets.QFrame(parent=self.frame_6)
+        self.frame_18.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_18.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_18.setLineWidth(0)
+        self.frame_18.setObjectName("frame_18")
+        self.verticalLayout_7 = QtWidgets.QVBoxLayout(self.frame_18)
+        self.verticalLayout_7.setSizeConstraint(QtWidgets.QLayout.SizeConstraint.SetNoConstraint)
+        self.verticalLayout_7.setContentsMargins(1, 1, 1, 1)
+        self.verticalLayout_7.setSpacing(0)
+        self.verticalLayout_7.setObjectName("verticalLayout_7")
+        self.StepTX = QtWidgets.QTextEdit(parent=self.frame_18)
+        self.StepTX.setMaximumSize(QtCore.QSize(16777215, 20))
+        self.StepTX.setFrameShape(QtWidgets.QFrame.Shape.Box)
+        self.StepTX.setFrameShadow(QtWidgets.QFrame.Shadow.Plain)
+        self.StepTX.setLineWidth(0)
+        self.StepTX.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.StepTX.setObjectName("StepTX")
+        self.verticalLayout_7.addWidget(self.StepTX)
+        self.horizontalLayout_9.addWidget(self.frame_18)
+        self.frame_15 = QtWidgets.QFrame(parent=self.frame_6)
+        self.frame_15.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_15.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_15.setLineWidth(0)
+        self.frame_15.setObjectName("frame_15")
+        self.horizontalLayout_10 = QtWidgets.QHBoxLayout(self.frame_15)
+        self.horizontalLayout_10.setSizeConstraint(QtWidgets.QLayout.SizeConstraint.SetNoConstraint)
+        self.horizontalLayout_10.setContentsMargins(1, 1, 1, 1)
+        self.horizontalLayout_10.setSpacing(1)
+        self.horizontalLayout_10.setObjectName("horizontalLayout_10")
+        self.ModeCB = QtWidgets.QComboBox(parent=self.frame_15)
+        self.ModeCB.setObjectName("ModeCB")
+        self.ModeCB.addItem("")
+        self.ModeCB.addItem("")
+        self.ModeCB.addItem("")
+        self.ModeCB.addItem("")
+        self.ModeCB.addItem("")
+        self.ModeCB.addItem("")
+        self.horizontalLayout_10.addWidget(self.ModeCB)
+        self.GoBT = QtWidgets.QPushButton(parent=self.frame_15)
+        self.GoBT.setObjectName("GoBT")
+        self.horizontalLayout_10.addWidget(self.GoBT)
+        self.horizontalLayout_9.addWidget(self.frame_15)
+        self.verticalLayout_3.addWidget(self.frame_6)
+        self.frame_22 = QtWidgets.QFrame(parent=self.frame_5)
+        self.frame_22.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_22.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_22.setLineWidth(0)
+        self.frame_22.setObjectName("frame_22")
+        self.horizontalLayout_15 = QtWidgets.QHBoxLayout(self.frame_22)
+        self.horizontalLayout_15.setContentsMargins(1, 1, 1, 1)
+        self.horizontalLayout_15.setSpacing(2)
+        self.horizontalLayout_15.setObjectName("horizontalLayout_15")
+        self.ChannelsCB = QtWidgets.QComboBox(parent=self.frame_22)
+        self.ChannelsCB.setObjectName("ChannelsCB")
+        self.ChannelsCB.addItem("")
+        self.ChannelsCB.addItem("")
+        self.ChannelsCB.addItem("")
+        self.horizontalLayout_15.addWidget(self.ChannelsCB)
+        self.BurstSB = QtWidgets.QSpinBox(parent=self.frame_22)
+        self.BurstSB.setMaximum(65536)
+        self.BurstSB.setObjectName("BurstSB")
+        self.horizontalLayout_15.addWidget(self.BurstSB)
+        self.ClosedLoopCB = QtWidgets.QCheckBox(parent=self.frame_22)
+        self.ClosedLoopCB.setObjectName("ClosedLoopCB")
+        self.horizontalLayout_15.addWidget(self.ClosedLoopCB)
+        self.BacklashSB = QtWidgets.QDoubleSpinBox(parent=self.frame_22)
+        self.BacklashSB.setDecimals(3)
+        self.BacklashSB.setMaximum(5.0)
+        self.BacklashSB.setSingleStep(0.05)
+        self.BacklashSB.setObjectName("BacklashSB")
+        self.horizontalLayout_15.addWidget(self.BacklashSB)
+        self.verticalLayout_3.addWidget(self.frame_22)
+        self.verticalLayout_3.setStretch(0, 5)
+        self.verticalLayout_3.setStretch(1, 5)
+        self.verticalLayout_3.setStretch(2, 5)
+        self.verticalLayout_3.setStretch(3, 5)
+        self.verticalLayout_3.setStretch(4, 1)
+        self.verticalLayout_3.setStretch(5, 1)
+        self.verticalLayout_2.addWidget(self.frame_5)
+        self.verticalLayout_2.setStretch(0, 1)
+        self.verticalLayout_2.setStretch(1, 2)
+        self.horizontalLayout.addWidget(self.frame_2)
+        self.frame_3 = QtWidgets.QFrame(parent=self.frame)
+        self.frame_3.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_3.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_3.setObjectName("frame_3")
+        self.verticalLayout_5 = QtWidgets.QVBoxLayout(self.frame_3)
+        self.verticalLayout_5.setContentsMargins(1, 1, 1, 1)
+        self.verticalLayout_5.setObjectName("verticalLayout_5")
+        self.frame_21 = QtWidgets.QFrame(parent=self.frame_3)
+        self.frame_21.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_21.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_21.setObjectName("frame_21")
+        self.horizontalLayout_14 = QtWidgets.QHBoxLayout(self.frame_21)
+        self.horizontalLayout_14.setContentsMargins(1, 1, 1, 1)
+        self.horizontalLayout_14.setSpacing(1)
+        self.horizontalLayout_14.setObjectName("horizontalLayout_14")
+        self.LockInAngleGraph = PlotWidget(parent=self.frame_21)
+        self.LockInAngleGraph.setObjectName("LockInAngleGraph")
+        self.horizontalLayout_14.addWidget(self.LockInAngleGraph)
+        self.verticalLayout_5.addWidget(self.frame_21)
+        self.frame_20 = QtWidgets.QFrame(parent=self.frame_3)
+        self.frame_20.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.frame_20.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.frame_20.setObjectName("frame_20")
+        self.horizontalLayout_13 = QtWidgets.QHBoxLayout(self.frame_20)
+        self.horizontalLayout_13.setContentsMargins(1, 1, 1, 1)
+        self.horizontalLayout_13.setSpacing(1)
+        self.horizontalLayout_13.setObjectName("horizontalLayout_13")
+        self.MessageTx = QtWidgets.QTextEdit(parent=self.frame_20)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.MessageTx.sizePolicy().hasHeightForWidth())
+        self.MessageTx.setSizePolicy(sizePolicy)
+        self.MessageTx.setInputMethodHints(QtCore.Qt.InputMethodHint.ImhNone)
+        self.MessageTx.setObjectName("MessageTx")
+        self.horizontalLayout_13.addWidget(self.MessageTx)
+        self.SaveBT = QtWidgets.QPushButton(parent=self.frame_20)
+        self.SaveBT.setObjectName("SaveBT")
+        self.horizontalLayout_13.addWidget(self.SaveBT)
+        self.verticalLayout_5.addWidget(self.frame_20)
+        self.verticalLayout_5.setStretch(0, 1)
+        self.horizontalLayout.addWidget(self.frame_3)
+        self.horizontalLayout.setStretch(0, 1)
+        self.horizontalLayout.setStretch(1, 3)
+        self.verticalLayout.addWidget(self.frame)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.menubar = QtWidgets.QMenuBar(parent=MainWindow)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 859, 21))
+        self.menubar.setObjectName("menubar")
+        MainWindow.setMenuBar(self.menubar)
+        self.statusbar = QtWidgets.QStatusBar(parent=MainWindow)
+        self.statusbar.setObjectName("statusbar")
+        MainWindow.setStatusBar(self.statusbar)
+
+        self.retranslateUi(MainWindow)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
+        self.ConnectBT.setText(_translate("MainWindow", "Connect"))
+        self.DisconnectBT.setText(_translate("MainWindow", "Disconnect"))
+        self.ConnectLockinBT.setText(_translate("MainWindow", "Lock-in"))
+        self.HomeBT.setText(_translate("MainWindow", "Home"))
+        self.BackwardBT.setText(_translate("MainWindow", "Backward"))
+        self.ForwardBT.setText(_translate("MainWindow", "Forward"))
+        self.StartTX.setPlaceholderText(_translate("MainWindow", "Start"))
+        self.StopTX.setPlaceholderText(_translate("MainWindow", "Stop"))
+        self.StepTX.setPlaceholderText(_translate("MainWindow", "Step"))
+        self.ModeCB.setItemText(0, _translate("MainWindow", "Step"))
+        self.ModeCB.setItemText(1, _translate("MainWindow", "Pipelined"))
+        self.ModeCB.setItemText(2, _translate("MainWindow", "Fly"))
+        self.ModeCB.setItemText(3, _translate("MainWindow", "Adaptive"))
+        self.ModeCB.setItemText(4, _translate("MainWindow", "Continuous"))
+        self.ModeCB.setItemText(5, _translate("MainWindow", "Grid"))
+        self.GoBT.setText(_translate("MainWindow", "Go"))
+        self.ChannelsCB.setToolTip(_translate("MainWindow", "Lock-in outputs stored in Step mode, bursts need X, Y or R, THETA"))
+        self.ChannelsCB.setItemText(0, _translate("MainWindow", "IN1, IN2"))
+        self.ChannelsCB.setItemText(1, _translate("MainWindow", "X, Y"))
+        self.ChannelsCB.setItemText(2, _translate("MainWindow", "R, THETA"))
+        self.BurstSB.setToolTip(_translate("MainWindow", "Capture samples averaged per angle in Step mode"))
+        self.BurstSB.setSpecialValueText(_translate("MainWindow", "No burst"))
+        self.BurstSB.setPrefix(_translate("MainWindow", "Burst "))
+        self.ClosedLoopCB.setToolTip(_translate("MainWindow", "Step mode moves to absolute device positions and stores the measured angle"))
+        self.ClosedLoopCB.setText(_translate("MainWindow", "Closed loop"))
+        self.BacklashSB.setToolTip(_translate("MainWindow", "Closed loop overshoot before targets approached against the sweep direction"))
+        self.BacklashSB.setPrefix(_translate("MainWindow", "Backlash "))
+        self.BacklashSB.setSuffix(_translate("MainWindow", " °"))
+        self.SaveBT.setText(_translate("MainWindow", "Save"))
+from pyqtgraph import PlotWidget
@@ -1,96 +1,236 @@
 import os
+import importlib
 import time
 
 from PyQt6 import QtCore, QtWidgets, uic
-import pyqtgraph as pg
-from time import perf_counter
-from instruments.KDC101.KDC101Controller import KDC101_Rotation
-import numpy as np
-from instruments.Lockin.SRS865A import LockInAmplifier
+from acquisition.flyscan import FlyScan
+from acquisition.stepscan import PipelinedStepScan, StepScan, capture_channels, step_columns
+from acquisition.gridscan import GridScan, grid_points
+from acquisition.adaptive import AdaptiveScan
+from acquisition.continuous import ContinuousCapture
+from plotting.live_plot import LivePlot
+from plotting.lod_plot import LODPlot
+from storage.capture_store import CaptureReader
+from acquisition.engine import create_sweep_writer, read_tuning
+# the instrument drivers (pyvisa, the Kinesis DLL) and the simulators are imported when Connect is pressed
+
+UI_FILE = 'interface.ui'
+COMPILED_UI_FILE = 'interface_ui.py'
 
 
 class StepAcquisitionThread(QtCore.QThread):
     #angle = QtCore.pyqtSignal(float, float)  # Signal to send angle updates to the UI
     angle_R = QtCore.pyqtSignal(float, float, float)  # Signal to send lockin updates to the UI
     finished = QtCore.pyqtSignal()
-    def __init__(self, Rmount1, lockin1, start_angle, stop_angle, step_angle):
+    def __init__(self, Rmount1, lockin1, start_angle, stop_angle, step_angle, writer=None, burst_samples=0,
+                 closed_loop=False, backlash=0.0, tolerance=0.005, channels='IN1, IN2', settle_time=None):
         super(StepAcquisitionThread, self).__init__()
-        self.is_running = True
-        self.Rmount1 = Rmount1
-        self.lockin1 = lockin1
-        self.start_angle = start_angle
-        self.stop_angle =  stop_angle
-        self.step_angle = step_angle
-        self.data = []
+        # burst_samples >0: average this many captured samples per angle and store their standard deviation too
+        # closed_loop: absolute moves to precomputed device positions, the measured position is stored per point
+        self.stepscan = StepScan(Rmount1, lockin1, start_angle, stop_angle, step_angle,
+                                 on_point=self.angle_R.emit, writer=writer, burst_samples=burst_samples,
+                                 closed_loop=closed_loop, backlash=backlash, tolerance=tolerance,
+                                 channels=channels, settle_time=settle_time)
+        self.writer = writer
+
+    @property
+    def num_points(self):
+        return self.stepscan.num_points
+
+    def run(self):
+
+        try:
+            self.stepscan.run()
+            self.finished.emit()
+        except Exception as e:
+            print(f"Error: {e}")
+            print('Specify start, stop and step')
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+
+    def stop(self):
+        self.stepscan.stop()
+
+class PipelinedStepAcquisitionThread(QtCore.QThread):
+    angle_R = QtCore.pyqtSignal(float, float, float)  # Signal to send lockin updates to the UI
+    finished = QtCore.pyqtSignal()
+    def __init__(self, Rmount1, lockin1, start_angle, stop_angle, step_angle, writer=None):
+        super(PipelinedStepAcquisitionThread, self).__init__()
+        self.stepscan = PipelinedStepScan(Rmount1, lockin1, start_angle, stop_angle, step_angle,
+                                          on_point=self.angle_R.emit, writer=writer)
+        self.writer = writer
+
+    def run(self):
+        try:
+            self.stepscan.run()
+            self.finished.emit()
+        except Exception as e:
+            print(f"Error: {e}")
+            print('Specify start, stop and step')
+        finally:
+            if self.writer is not None:
+                self.writer.close()
 
+    def stop(self):
+        self.stepscan.stop()
+
+class AdaptiveAcquisitionThread(QtCore.QThread):
+    angle_R = QtCore.pyqtSignal(float, float, float)  # Signal to send lockin updates to the UI
+    finished = QtCore.pyqtSignal()
+    def __init__(self, Rmount1, lockin1, start_angle, stop_angle, coarse_step, writer=None):
+        super(AdaptiveAcquisitionThread, self).__init__()
+        self.adaptive = AdaptiveScan(Rmount1, lockin1, start_angle, stop_angle, coarse_step,
+                                     on_point=self.angle_R.emit, writer=writer)
+        self.writer = writer
 
     def run(self):
+        try:
+            self.adaptive.run()
+            self.finished.emit()
+        except Exception as e:
+            print(f"Error: {e}")
+            print('Specify start, stop and step')
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+
+    def stop(self):
+        self.adaptive.stop()
 
+class FlyAcquisitionThread(QtCore.QThread):
+    sweep_data = QtCore.pyqtSignal(object, object, object)  # angles, RA, RB arrays of the whole fly scan
+    finished = QtCore.pyqtSignal()
+    def __init__(self, Rmount1, lockin1, start_angle, stop_angle, step_angle, writer=None):
+        super(FlyAcquisitionThread, self).__init__()
+        self.flyscan = FlyScan(Rmount1, lockin1, start_angle, stop_angle, step_angle, channels='XY')
+        self.writer = writer
+
+    def run(self):
         try:
-            sweep_steps = np.arange(self.start_angle,self.stop_angle,self.step_angle)
-            self.Rmount1.move_absolute(self.start_angle)
-            for step in sweep_steps:
-                self.Rmount1.move_relative(self.step_angle)
-                #RA = self.lockin1.get_channel_data('IN1')
-                #RB = self.lockin1.get_channel_data('IN2')
-                RA = 1
-                RB = 1
-                self.data.append((step, RA,RB))
-                self.angle_R.emit(step,RA,RB) 
+            angles, channel_data = self.flyscan.run()
+            RA, RB = channel_data['X'], channel_data['Y']
+            if self.writer is not None:
+                self.writer.extend(angles, RA, RB)
+            self.sweep_data.emit(angles, RA, RB)
             self.finished.emit()
         except Exception as e:
             print(f"Error: {e}")
             print('Specify start, stop and step')
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+
+    def stop(self):
+        self.flyscan.stop()
+
+class GridAcquisitionThread(QtCore.QThread):
+    grid_point = QtCore.pyqtSignal(object, float, float)  # set point tuple, RA, RB
+    finished = QtCore.pyqtSignal()
+    def __init__(self, mounts, lockin1, points, writer=None, settle_time=None, channels='IN1, IN2'):
+        super(GridAcquisitionThread, self).__init__()
+        self.gridscan = GridScan(mounts, lockin1, points, on_point=self.grid_point.emit, writer=writer,
+                                 settle_time=settle_time, channels=channels)
+        self.writer = writer
+
+    def run(self):
+        try:
+            self.gridscan.run()
+            self.finished.emit()
+        except Exception as e:
+            print(f"Error: {e}")
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+
+    def stop(self):
+        self.gridscan.stop()
+
+class ContinuousAcquisitionThread(QtCore.QThread):
+    capture_started = QtCore.pyqtSignal(str)  # base path of the capture files, emitted once they exist
+    finished = QtCore.pyqtSignal()
+    def __init__(self, lockin1, base_path, channels='XY', duration=None):
+        super(ContinuousAcquisitionThread, self).__init__()
+        # frames go straight to disk, see acquisition.continuous
+        self.capture = ContinuousCapture(lockin1, base_path, channels=channels, duration=duration,
+                                         on_start=self.capture_started.emit)
+
+    def run(self):
+        try:
+            self.capture.run()
+            self.finished.emit()
+        except Exception as e:
+            print(f"Error: {e}")
 
     def stop(self):
-        self.running = False
-
-# class ContiniousAcquisitionThread(QtCore.QThread):
-#     angle_R = QtCore.pyqtSignal(float, float)  # Signal to send lockin updates to the UI
-
-#     def __init__(self, Rmount1, start_angle, stop_angle):
-#         super(StepAcquisitionThread, self).__init__()
-#         self.is_running = True
-#         self.Rmount1 = Rmount1
-#         self.start = start_angle
-#         self.stop =  stop_angle
-#         self.data = []
-
-#     def run(self):
-#         try:
-#             sweep_steps = np.arange(self.start,self.stop,self.step)
-#             self.Rmount.move_absolute(self.start)
-#             for step in sweep_steps:
-#                 self.Rmount.move_relative(self.step)
-#                 R = 1
-#                 self.data.append((step, R))
-#                 self.angle_R.emit(step,R) 
-#             self.finished.emit()
-#         except Exception as e:
-#             print(f"Error: {e}")
-#             print('Specify stop and step')
-
-#     def stop(self):
-#         self.running = False
+        self.capture.stop()
 
 
     
+class PositionSignal(QtCore.QObject):
+    # emitted from the position poller thread, delivered in the GUI thread
+    position = QtCore.pyqtSignal(float, float, int)  # time, angle, status bits
+
+
+def load_ui(window):
+    """
+    Build the form of interface.ui into window and return the object holding its widgets.
+    The form is built from the pyuic6 output in interface_ui.py, which is regenerated when
+    interface.ui is newer, so the XML is not parsed at every start.
+    """
+    if not os.path.exists(COMPILED_UI_FILE) or os.path.getmtime(UI_FILE) > os.path.getmtime(COMPILED_UI_FILE):
+        try:
+            with open(COMPILED_UI_FILE + '.tmp', 'w', encoding='utf-8') as f:
+                uic.compileUi(UI_FILE, f)
+            os.replace(COMPILED_UI_FILE + '.tmp', COMPILED_UI_FILE)
+        except OSError as e:
+            print(f"Could not write {COMPILED_UI_FILE}, loading {UI_FILE}: {e}")
+            return uic.loadUi(UI_FILE, window)
+    importlib.invalidate_caches()
+    form = importlib.import_module(os.path.splitext(COMPILED_UI_FILE)[0]).Ui_MainWindow()
+    form.setupUi(window)
+    return form
+
+
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, simulate=False, trace=False):
         super(MainWindow, self).__init__(parent)
+        self.simulate = simulate
+        # records DLL/VISA calls and plot updates, written to data_dir when the window closes
+        self.trace = None
+        if trace:
+            from instruments.tracing import CallTrace
+            self.trace = CallTrace()
+        self.sim_lib = None
 
         # Load UI file
-        self.ui = uic.loadUi('interface.ui', self)
+        self.ui = load_ui(self)
         
         # Initialize connection state
         self.connection = None
         self.MainThread = None
         self.Rmount = None 
+        self.mount_serials = {'rotation': "27257179"}  # name: serial of every KDC101 mount
+        self.mounts = {}
         self.lockin = None
+        self.lockin_settings = "instruments/Lockin/lockin_params.ini"
         self.is_jogmode =False
-        self.data = []
-
-        self.R_curve = self.ui.LockInAngleGraph.plot(pen='r') 
+        self.writer = None
+        self.acquisition_thread = None
+        self.capture_plot = None  # LODPlot while the graph shows a continuous capture
+        self.data_dir = 'data'
+        self.sample = ''  # name of the measured sample, stored with every sweep in data/catalog.sqlite
+        self.burst_samples = 0  # samples averaged per angle in Step mode, 0 reads a single value
+        self.channels = 'IN1, IN2'  # lock-in outputs stored as RA, RB in Step mode, bursts need 'X, Y' or 'R, THETA'
+        self.settle_time = None  # s waited at each angle in Step mode, None: the settle time of the lock-in filter
+        self.closed_loop = False  # True: Step mode moves to absolute device positions and records the measured angle
+        self.backlash = 0.0  # overshoot (°) before targets approached against the sweep direction
+        self.position_tolerance = 0.005  # distance (°) between measured and target angle above which a point is flagged
+        self.position_interval = 0.05  # s between two background position reads of the main mount
+        self.position_signal = PositionSignal()
+        self.position_signal.position.connect(self.update_position)
+
+        self.live_plot = LivePlot(self.ui.LockInAngleGraph)
         self.ui.LockInAngleGraph.setBackground("w")
         self.ui.LockInAngleGraph.getPlotItem().setLabel('bottom', 'Angle (\u00b0)')
         self.ui.LockInAngleGraph.getPlotItem().setLabel('left', 'Reflectivity')
@@ -106,6 +246,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui.BackwardBT.clicked.connect(self.go_backward)
         self.ui.GoBT.clicked.connect(self.sweep)
         self.ui.SaveBT.clicked.connect(self.save_data)
+        self.show_step_options()
 
 
         self.ui.AngleDial.valueChanged.connect(self.value_changed)
@@ -132,12 +273,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui.ConnectBT.setEnabled(False)
         try:
             # Establish connection
-            self.Rmount = KDC101_Rotation("27257179")
-            self.Rmount.connect()
+            for name, serial in self.mount_serials.items():
+                self.connect_mount(name, serial)
+            # the first mount is the one the dial, jog buttons and 1D sweeps drive
+            self.Rmount = next(iter(self.mounts.values()))
             
             #Start thread
             #self.MainThread = MainThread(self.connection, self.start_time)
-            self.ui.AngleTx.setText(f"{self.Rmount.position} \u00b0")
+            poller = self.Rmount.start_poller(self.position_interval)
+            poller.add_callback(self.position_signal.position.emit)
             self.ui.MessageTx.setText(f"Mount connected succesfully.")
             self.connection = True
 
@@ -145,22 +289,83 @@ class MainWindow(QtWidgets.QMainWindow):
             print(f"Error: {e}")
             self.ui.MessageTx.setText(f"Could not connect: {e}")
         
+    def connect_mount(self, name, serial):
+        from instruments.KDC101.KDC101Controller import KDC101_Rotation
+        if self.simulate:
+            self.simulated_kinesis_lib().add_stage(serial)
+            self.mounts[name] = KDC101_Rotation(serial, lib=self.simulated_kinesis_lib())
+        else:
+            self.mounts[name] = KDC101_Rotation(serial)
+        if self.trace is not None:
+            from instruments.tracing import trace_stage
+            trace_stage(self.mounts[name], self.trace)
+        self.mounts[name].connect()
+        self.mount_serials[name] = serial
+        return self.mounts[name]
+
+    def simulated_kinesis_lib(self):
+        """The simulated Kinesis library shared by all mounts and the simulated lock-in."""
+        if self.sim_lib is None:
+            from instruments.Simulated.SimKDC101 import SimulatedKinesisLib
+            self.sim_lib = SimulatedKinesisLib(serials=tuple(self.mount_serials.values()))
+        return self.sim_lib
+
     def connect_Lockin(self):
-        self.lockin = LockInAmplifier(inifile="lockin_params.ini")
-        self.lockin.open_instrument(instrument_address='USB0::0xB506::0x2000::005180::INSTR')
+        from instruments.Lockin.SRS865A import LockInAmplifier
+        self.lockin = LockInAmplifier(inifile=self.lockin_settings)
+        resource_manager = None
+        if self.simulate:
+            from instruments.Simulated.SimSRS865A import SimulatedResourceManager
+            resource_manager = SimulatedResourceManager(angle_source=self.simulated_kinesis_lib().real_position)
+        self.lockin.open_instrument(instrument_address='USB0::0xB506::0x2000::005180::INSTR',
+                                    resource_manager=resource_manager)
+        if self.trace is not None:
+            from instruments.tracing import trace_lockin
+            trace_lockin(self.lockin, self.trace)
         self.lockin.initialize_lockin()
+        # Step mode starts from what acquisition.filter_tuner found for these settings
+        tuning = read_tuning(self.lockin_settings)
+        if tuning:
+            self.channels = tuning['channels']
+            self.burst_samples = tuning['burst_samples']
+            self.settle_time = tuning['settle_time']
+            self.show_step_options()
         self.ui.MessageTx.setText(f"Lock-in connected succesfully.")
 
+    def show_step_options(self):
+        """Show the Step mode channels, burst, closed loop and backlash in their controls."""
+        self.ui.ChannelsCB.setCurrentText(self.channels)
+        self.ui.BurstSB.setValue(self.burst_samples)
+        self.ui.ClosedLoopCB.setChecked(self.closed_loop)
+        self.ui.BacklashSB.setValue(self.backlash)
+
+    def read_step_options(self):
+        """Take the Step mode options from their controls, False if bursts cannot record the channels."""
+        channels = self.ui.ChannelsCB.currentText()
+        burst_samples = self.ui.BurstSB.value()
+        if burst_samples > 0 and capture_channels(channels) is None:
+            self.ui.MessageTx.setText(f"Capture bursts cannot record {channels}, choose X, Y or R, THETA")
+            return False
+        if channels != self.channels or burst_samples != self.burst_samples:
+            # a tuned settle time belongs to the tuned channels and burst
+            self.settle_time = None
+        self.channels = channels
+        self.burst_samples = burst_samples
+        self.closed_loop = self.ui.ClosedLoopCB.isChecked()
+        self.backlash = self.ui.BacklashSB.value()
+        return True
+
 
     def go_forward(self):
         self.set_jogmode()
         self.Rmount.move_jog(2)
-        self.ui.AngleTx.setText(f"{self.Rmount.position} \u00b0")
 
     def go_backward(self):
         self.set_jogmode()
         self.Rmount.move_jog(1)
-        self.ui.AngleTx.setText(f"{self.Rmount.position} \u00b0")
+
+    def update_position(self, t, angle, status_bits):
+        self.ui.AngleTx.setText(f"{angle:.3f} \u00b0")
 
     # def on_move_complete(self):
     #     self.move_thread = None
@@ -185,9 +390,17 @@ class MainWindow(QtWidgets.QMainWindow):
             self.ui.MessageTx.setText(f"Error homing device: {e}")
 
     def sweep(self):
-        start = float(self.StartTX.toPlainText())
-        stop = float(self.StopTX.toPlainText())
-        step = float(self.StepTX.toPlainText())
+        if self.ui.ModeCB.currentText() == 'Continuous':
+            self.toggle_continuous_capture()
+            return
+        if self.ui.ModeCB.currentText() == 'Grid':
+            self.grid_scan()
+            return
+        if self.capture_plot is not None:
+            self.show_sweep_plot()
+        start = float(self.ui.StartTX.toPlainText())
+        stop = float(self.ui.StopTX.toPlainText())
+        step = float(self.ui.StepTX.toPlainText())
         
         #self.Rmount.move_absolute(10)
         #self.Rmount.move_absolute(float(10))
@@ -205,28 +418,152 @@ class MainWindow(QtWidgets.QMainWindow):
         #     print(f"Error: {e}")
         #     print('Specify stop and step')
         self.ui.MessageTx.setText(f"Starting experiment")
-        self.acquisition_thread = StepAcquisitionThread(self.Rmount, self.lockin,  start, stop, step)
-        self.acquisition_thread.angle_R.connect(self.update_plot)
+        mode = self.ui.ModeCB.currentText()
+        if mode == 'Step' and not self.read_step_options():
+            return
+        if mode == 'Step':
+            burst = self.burst_samples > 0 and self.lockin is not None
+            self.writer = self.create_writer(mode, start, stop, step, columns=step_columns(burst, self.closed_loop),
+                                             channels=self.channels, burst_samples=self.burst_samples,
+                                             closed_loop=self.closed_loop, backlash=self.backlash,
+                                             tolerance=self.position_tolerance)
+        elif mode == 'Fly':
+            # the fly scan captures the demodulated outputs
+            self.writer = self.create_writer(mode, start, stop, step, channels='X, Y')
+        else:
+            self.writer = self.create_writer(mode, start, stop, step, channels='IN1, IN2')
+        if mode == 'Fly':
+            self.acquisition_thread = FlyAcquisitionThread(self.Rmount, self.lockin, start, stop, step, self.writer)
+            self.acquisition_thread.sweep_data.connect(self.update_plot_sweep)
+        elif mode == 'Adaptive':
+            self.acquisition_thread = AdaptiveAcquisitionThread(self.Rmount, self.lockin, start, stop, step,
+                                                                self.writer)
+            self.acquisition_thread.angle_R.connect(self.update_plot)
+        elif mode == 'Pipelined':
+            self.acquisition_thread = PipelinedStepAcquisitionThread(self.Rmount, self.lockin, start, stop, step,
+                                                                     self.writer)
+            self.acquisition_thread.angle_R.connect(self.update_plot)
+        else:
+            self.acquisition_thread = StepAcquisitionThread(self.Rmount, self.lockin,  start, stop, step, self.writer,
+                                                            burst_samples=self.burst_samples,
+                                                            closed_loop=self.closed_loop, backlash=self.backlash,
+                                                            tolerance=self.position_tolerance,
+                                                            channels=self.channels, settle_time=self.settle_time)
+            self.acquisition_thread.angle_R.connect(self.update_plot)
         self.acquisition_thread.finished.connect(lambda: print("Experiment Finished"))
         
         self.acquisition_thread.start()
 
+    def toggle_continuous_capture(self):
+        """
+        Go in Continuous mode starts a capture streamed to data/capture_<timestamp>, Go again stops it.
+        """
+        if isinstance(self.acquisition_thread, ContinuousAcquisitionThread) and self.acquisition_thread.isRunning():
+            self.acquisition_thread.stop()
+            self.ui.MessageTx.setText("Stopping capture")
+            return
+        base_path = os.path.join(self.data_dir, time.strftime('capture_%Y%m%d_%H%M%S'))
+        self.acquisition_thread = ContinuousAcquisitionThread(self.lockin, base_path)
+        self.acquisition_thread.capture_started.connect(self.view_capture)
+        self.acquisition_thread.finished.connect(lambda: print("Capture finished"))
+        self.acquisition_thread.start()
+        self.ui.MessageTx.setText("Capturing, press Go to stop")
+
+    def view_capture(self, base_path):
+        """
+        Show a stored or running capture against time, loaded at the level of detail of the zoom.
+        """
+        if self.capture_plot is not None:
+            self.capture_plot.stop()
+        self.live_plot.clear()
+        self.capture_plot = LODPlot(self.ui.LockInAngleGraph, CaptureReader(base_path))
+        self.ui.LockInAngleGraph.getPlotItem().setLabel('bottom', 'Time (s)')
+
+    def show_sweep_plot(self):
+        self.capture_plot.stop()
+        self.capture_plot = None
+        self.ui.LockInAngleGraph.getPlotItem().setLabel('bottom', 'Angle (\u00b0)')
+        self.ui.LockInAngleGraph.getPlotItem().getViewBox().enableAutoRange()
+
+    def grid_scan(self, recipe_path=None):
+        """
+        Go in Grid mode: scan the [grid] of a grid recipe (see recipes/grid_example.ini, asked for if not
+        given) with the connected lock-in. The [mounts] of the recipe not connected yet are connected
+        first. The plot shows the readout against the fastest axis.
+        """
+        from acquisition.engine import load_recipe
+        if recipe_path is None:
+            recipe_path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Grid recipe", "recipes", "Recipes (*.ini)")
+            if not recipe_path:
+                return
+        try:
+            recipe = load_recipe(recipe_path)
+            if recipe['mode'] != 'grid':
+                raise ValueError(f"{recipe_path} is a {recipe['mode']} recipe, not a grid recipe")
+            for name in recipe['axes']:
+                if name not in self.mounts:
+                    mount = self.connect_mount(name, recipe['mounts'][name])
+                    if recipe['home']:
+                        mount.home()
+                    mount.set_motor_params()
+        except Exception as e:
+            print(f"Error: {e}")
+            self.ui.MessageTx.setText(f"Could not start the grid scan: {e}")
+            return
+        if self.capture_plot is not None:
+            self.show_sweep_plot()
+        axes = recipe['axes']
+        points = grid_points(axes)
+        self.ui.MessageTx.setText(f"Starting grid scan of {len(points)} points")
+        self.writer = self.create_writer('Grid', None, None, None, columns=(*axes, 'RA', 'RB'), axes=axes,
+                                         channels=recipe['channels'], recipe=recipe['path'])
+        self.acquisition_thread = GridAcquisitionThread({name: self.mounts[name] for name in axes}, self.lockin,
+                                                        points, self.writer, settle_time=recipe['settle_time'],
+                                                        channels=recipe['channels'])
+        self.acquisition_thread.grid_point.connect(lambda point, RA, RB: self.update_plot(point[-1], RA, RB))
+        self.acquisition_thread.finished.connect(lambda: print("Experiment Finished"))
+        self.acquisition_thread.start()
+
+    def create_writer(self, mode, start, stop, step, columns=('angle', 'RA', 'RB'), **metadata):
+        """Every sweep is streamed to data/sweep_<timestamp>.bin/.json while it runs and added to
+        the catalog of data/ when it ends."""
+        return create_sweep_writer(self.data_dir, mode, start, stop, step, lockin=self.lockin, mounts=self.mounts,
+                                   columns=columns, sample=self.sample, **metadata)
+
     def update_plot(self, angle, RA,RB):
-        self.data.append((angle, RA, RB))
-        self.ui.LockInAngleGraph.plot([angle], [RA], pen=None, symbol='o', symbolBrush='r')
-        self.ui.LockInAngleGraph.plot([angle], [RB], pen=None, symbol='x', symbolBrush='k')
+        if self.trace is not None:
+            with self.trace.span('update_plot', 'qt'):
+                self.live_plot.append(angle, RA, RB)
+            return
+        self.live_plot.append(angle, RA, RB)
+
+    def update_plot_sweep(self, angles, RA, RB):
+        if self.trace is not None:
+            with self.trace.span('update_plot_sweep', 'qt'):
+                self.live_plot.extend(angles, RA, RB)
+            return
+        self.live_plot.extend(angles, RA, RB)
 
     def save_data(self):
-        if self.data:
+        if self.writer is not None and len(self.writer):
             file_path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Save Data", "", "Text Files (*.txt)")
             if file_path:
-                with open(file_path, 'w') as f:
-                    f.write("# Angle (degrees)\tPhotodiode A\tPhotodiode B\n")
-                    for angle, pd1, pd2 in self.data:
-                        f.write(f"{angle}\t{pd1}\t{pd2}\n")
+                self.writer.export_text(file_path)
                 print("Data saved successfully.")
 
 
+    def closeEvent(self, event):
+        if isinstance(self.acquisition_thread, ContinuousAcquisitionThread) and self.acquisition_thread.isRunning():
+            self.acquisition_thread.stop()
+            self.acquisition_thread.wait()
+        if self.trace is not None and len(self.trace):
+            os.makedirs(self.data_dir, exist_ok=True)
+            trace_path = os.path.join(self.data_dir, time.strftime('trace_%Y%m%d_%H%M%S.json'))
+            self.trace.export_chrome_trace(trace_path)
+            self.trace.print_summary()
+            print(f"Call trace written to {trace_path}")
+        super(MainWindow, self).closeEvent(event)
+
     def disconnect_Rmount(self):
         self.ui.DisconnectBT.setEnabled(False)
         QtWidgets.QApplication.processEvents()
@@ -234,7 +571,9 @@ class MainWindow(QtWidgets.QMainWindow):
             self.MainThread.stop()
 
         if self.connection is not None:
-            self.Rmount.disconnect()
+            for mount in self.mounts.values():
+                mount.disconnect()
+            self.mounts = {}
 
         # **Stop the status update timer**
         self.ui.ConnectBT.setEnabled(True)
@@ -254,7 +593,7 @@ class MainWindow(QtWidgets.QMainWindow):
 if __name__ == '__main__':
     import sys
     app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow()
+    window = MainWindow(simulate='--simulate' in sys.argv, trace='--trace' in sys.argv)
     window.show()
     sys.exit(app.exec())
     #Rmount = KDC101_Rotation("27257179")
@@ -0,0 +1,107 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt6 import QtCore
+
+
+class GrowableBuffer:
+    """
+    Preallocated float64 buffer of rows that doubles its capacity when full.
+    """
+    def __init__(self, num_columns, capacity=1024):
+        self._data = np.empty((capacity, num_columns))
+        self.size = 0
+
+    def append(self, row):
+        self._reserve(self.size + 1)
+        self._data[self.size] = row
+        self.size += 1
+
+    def extend(self, *columns):
+        columns = [np.asarray(c, dtype=float) for c in columns]
+        n = len(columns[0])
+        self._reserve(self.size + n)
+        for i, column in enumerate(columns):
+            self._data[self.size:self.size + n, i] = column
+        self.size += n
+
+    def _reserve(self, size):
+        if size > len(self._data):
+            capacity = max(size, 2 * len(self._data))
+            data = np.empty((capacity, self._data.shape[1]))
+            data[:self.size] = self._data[:self.size]
+            self._data = data
+
+    def column(self, i):
+        return self._data[:self.size, i]
+
+    def clear(self):
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+
+class LivePlot:
+    """
+    One persistent curve per channel of a PlotWidget. Incoming points go into a growable
+    buffer and the curves are redrawn at most fps times per second.
+    """
+    long_sweep_points = 2000
+
+    def __init__(self, plot_widget, fps=20):
+        self.plot_widget = plot_widget
+        self.buffer = GrowableBuffer(num_columns=3)
+        self.curves = [
+            plot_widget.plot(pen=None, symbol='o', symbolBrush='r'),
+            plot_widget.plot(pen=None, symbol='x', symbolBrush='k'),
+        ]
+        self.is_long_sweep = False
+        self.dirty = False
+        self.timer = QtCore.QTimer()
+        self.timer.setInterval(int(1000 / fps))
+        self.timer.timeout.connect(self.redraw)
+        self.timer.start()
+
+    def append(self, angle, RA, RB):
+        self.buffer.append((angle, RA, RB))
+        self.dirty = True
+
+    def extend(self, angles, RA, RB):
+        self.buffer.extend(angles, RA, RB)
+        self.dirty = True
+
+    def clear(self):
+        self.buffer.clear()
+        self.dirty = True
+
+    def redraw(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        if len(self.buffer) > self.long_sweep_points and not self.is_long_sweep:
+            self.set_long_sweep_mode(True)
+        elif len(self.buffer) <= self.long_sweep_points and self.is_long_sweep:
+            self.set_long_sweep_mode(False)
+        angles = self.buffer.column(0)
+        for i, curve in enumerate(self.curves):
+            curve.setData(angles, self.buffer.column(i + 1))
+
+    def set_long_sweep_mode(self, enable):
+        """
+        Symbols are drawn for short sweeps. Long sweeps switch to downsampled,
+        clipped lines so the cost per frame stays roughly constant.
+        """
+        self.is_long_sweep = enable
+        for curve, colour in zip(self.curves, ('r', 'k')):
+            if enable:
+                curve.setSymbol(None)
+                curve.setPen(pg.mkPen(colour))
+            else:
+                curve.setSymbol('o' if colour == 'r' else 'x')
+                curve.setPen(None)
+            curve.setDownsampling(auto=enable, method='peak')
+            curve.setClipToView(enable)
+
+    def stop(self):
+        self.timer.stop()
+        self.redraw()
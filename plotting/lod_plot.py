@@ -0,0 +1,78 @@
+import pyqtgraph as pg
+from PyQt6 import QtCore
+
+
+class LODPlot:
+    """
+    Shows a capture of a CaptureReader in a PlotWidget at the level of detail of the view: whenever
+    the x range changes the curves get only the points of that range from the finest pyramid level
+    with about points_per_pixel points per pixel of the view. Pan and zoom cost the same for a
+    minute or for hours of data. With follow the files are re-read every refresh_interval ms while
+    the capture is running and a view showing the end keeps scrolling with it.
+    """
+    pens = ('r', 'k', 'b', 'g')
+
+    def __init__(self, plot_widget, reader, points_per_pixel=2, refresh_interval=200, follow=True):
+        self.plot_widget = plot_widget
+        self.reader = reader
+        self.points_per_pixel = points_per_pixel
+        self.follow = follow
+        self.view_box = plot_widget.getPlotItem().getViewBox()
+        self.curves = [plot_widget.plot(pen=pg.mkPen(self.pens[i % len(self.pens)]), name=channel)
+                       for i, channel in enumerate(reader.channels)]
+        # many range changes arrive while dragging, redraw once they pause
+        self.update_timer = QtCore.QTimer()
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(20)
+        self.update_timer.timeout.connect(self.update)
+        self.view_box.sigXRangeChanged.connect(self.schedule_update)
+        self.refresh_timer = QtCore.QTimer()
+        self.refresh_timer.setInterval(refresh_interval)
+        self.refresh_timer.timeout.connect(self.refresh)
+        if follow:
+            self.refresh_timer.start()
+        self.view_box.enableAutoRange(x=False, y=True)
+        self.view_box.setXRange(0, max(reader.duration, 1.0), padding=0)
+        self.update()
+
+    def schedule_update(self, *args):
+        self.update_timer.start()
+
+    def update(self):
+        x_min, x_max = self.view_box.viewRange()[0]
+        max_points = max(200, int(self.view_box.width()) * self.points_per_pixel)
+        times, values = self.reader.window(x_min, x_max, max_points)
+        for i, curve in enumerate(self.curves):
+            # NaN frames mark frames the capture lost, leave a gap there
+            curve.setData(times, values[:, i], connect='finite')
+
+    def refresh(self):
+        """
+        Map the frames written since the last refresh, scroll along if the view shows the end.
+        """
+        old_duration = self.reader.duration
+        self.reader.refresh()
+        if self.reader.metadata.get('complete'):
+            self.refresh_timer.stop()
+        new_duration = self.reader.duration
+        if new_duration == old_duration:
+            return
+        x_min, x_max = self.view_box.viewRange()[0]
+        if x_max >= old_duration:
+            span = max(x_max - x_min, 1.0)
+            if new_duration > span:
+                self.view_box.setXRange(new_duration - span, new_duration, padding=0)
+            else:
+                self.view_box.setXRange(0, span, padding=0)
+        self.update()
+
+    def stop(self):
+        """
+        Stop refreshing and take the curves out of the plot.
+        """
+        self.refresh_timer.stop()
+        self.update_timer.stop()
+        self.view_box.sigXRangeChanged.disconnect(self.schedule_update)
+        for curve in self.curves:
+            self.plot_widget.removeItem(curve)
+        self.curves = []
@@ -0,0 +1,235 @@
+"""
+Memory-mapped storage for long continuous lock-in captures.
+
+A capture is stored as files next to each other:
+    <base>.cap         float32 frames, one value per capture channel, appended as they arrive
+    <base>.lod<k>.cap  min/max pyramid: level k holds the minimum and maximum of every
+                       bin_size * factor**k frames as float32 (bins, channels, 2)
+    <base>.json        sidecar with the channels, capture rate, frame count, bin sizes and metadata
+The levels are built while the capture is written and only the frames of unfinished bins are kept
+in memory, so memory use does not grow with the length of the capture. CaptureReader maps the
+files and returns, for any time range, the finest level that still fits a number of points.
+"""
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+
+def level_path(base_path, level):
+    return f'{base_path}.lod{level}.cap'
+
+
+class CaptureWriter:
+    def __init__(self, base_path, channels='XY', rate=1.0, bin_size=16, factor=4, num_levels=10,
+                 sidecar_interval=1.0, metadata=None):
+        """
+        :param base_path: Path without extension.
+        :param rate: Capture rate (Hz), frame i was captured at i / rate seconds.
+        :param bin_size: Frames per bin of level 0.
+        :param factor: Bins of a level combined into one bin of the next.
+        :param num_levels: Number of pyramid levels, the coarsest bin holds bin_size * factor**(num_levels - 1) frames.
+        :param sidecar_interval: Seconds between two updates of the sidecar while the capture runs.
+        """
+        self.base_path = base_path
+        self.channels = channels
+        self.num_channels = len(channels)
+        self.factor = factor
+        self.bin_sizes = [bin_size * factor ** level for level in range(num_levels)]
+        self.num_frames = 0
+        # frames not yet in a level 0 bin, and per level the bins not yet in a bin of the next level
+        self.tail = np.empty((0, self.num_channels), dtype='<f4')
+        self.pending = [np.empty((0, self.num_channels, 2), dtype='<f4') for _ in range(num_levels)]
+        self.num_bins = [0] * num_levels
+        self.sidecar_interval = sidecar_interval
+        self.last_sidecar = time.monotonic()
+        self.metadata = {'channels': channels, 'rate': rate, 'dtype': '<f4', 'num_frames': 0,
+                         'bin_sizes': self.bin_sizes, 'num_bins': self.num_bins, 'complete': False,
+                         'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        self.metadata.update(metadata or {})
+        directory = os.path.dirname(base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(base_path + '.cap', 'wb')
+        self.level_files = [open(level_path(base_path, level), 'wb') for level in range(num_levels)]
+        self.write_sidecar()
+
+    def append(self, frames):
+        """
+        Append float32 frames of shape (n, channels), e.g. a chunk of CaptureStream.poll().
+        """
+        frames = np.asarray(frames, dtype='<f4').reshape(-1, self.num_channels)
+        frames.tofile(self.file)
+        self.file.flush()
+        self.num_frames += len(frames)
+        frames = np.concatenate((self.tail, frames)) if len(self.tail) else frames
+        bin_size = self.bin_sizes[0]
+        num_bins = len(frames) // bin_size
+        self.tail = frames[num_bins * bin_size:].copy()
+        if num_bins:
+            bins = frames[:num_bins * bin_size].reshape(num_bins, bin_size, self.num_channels)
+            self.add_bins(0, np.stack((bins.min(axis=1), bins.max(axis=1)), axis=-1))
+        if time.monotonic() - self.last_sidecar > self.sidecar_interval:
+            self.write_sidecar()
+
+    def append_gap(self, num_frames):
+        """
+        Append num_frames NaN frames for frames the capture lost, so the time of later frames stays right.
+        """
+        chunk = np.full((min(num_frames, 65536), self.num_channels), np.nan, dtype='<f4')
+        while num_frames > 0:
+            self.append(chunk[:num_frames])
+            num_frames -= len(chunk)
+
+    def add_bins(self, level, bins):
+        bins.tofile(self.level_files[level])
+        self.level_files[level].flush()
+        self.num_bins[level] += len(bins)
+        if level + 1 == len(self.pending):
+            return
+        bins = np.concatenate((self.pending[level], bins)) if len(self.pending[level]) else bins
+        num_bins = len(bins) // self.factor
+        self.pending[level] = bins[num_bins * self.factor:].copy()
+        if num_bins:
+            groups = bins[:num_bins * self.factor].reshape(num_bins, self.factor, self.num_channels, 2)
+            self.add_bins(level + 1, np.stack((groups[..., 0].min(axis=1), groups[..., 1].max(axis=1)), axis=-1))
+
+    def write_sidecar(self):
+        self.metadata['num_frames'] = self.num_frames
+        self.metadata['num_bins'] = list(self.num_bins)
+        tmp_path = self.base_path + '.json.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.metadata, f, indent=2, default=str)
+        os.replace(tmp_path, self.base_path + '.json')
+        self.last_sidecar = time.monotonic()
+
+    def update_metadata(self, **metadata):
+        self.metadata.update(metadata)
+        self.write_sidecar()
+
+    def close(self):
+        if self.file.closed:
+            return
+        # the frames of unfinished bins end up in a last, shorter bin of every level
+        if len(self.tail):
+            self.pending_bin(0, np.stack((self.tail.min(axis=0), self.tail.max(axis=0)), axis=-1)[None])
+            self.tail = self.tail[:0]
+        else:
+            self.pending_bin(0, None)
+        self.metadata['complete'] = True
+        self.write_sidecar()
+        self.file.close()
+        for f in self.level_files:
+            f.close()
+
+    def pending_bin(self, level, last):
+        """
+        Write the last bin of level (if any) and fold the pending bins into a last bin of the next level.
+        """
+        if last is not None:
+            last.astype('<f4').tofile(self.level_files[level])
+            self.num_bins[level] += 1
+        if level + 1 == len(self.pending):
+            return
+        bins = self.pending[level] if last is None else np.concatenate((self.pending[level], last))
+        self.pending[level] = self.pending[level][:0]
+        self.pending_bin(level + 1, np.stack((bins[..., 0].min(axis=0), bins[..., 1].max(axis=0)), axis=-1)[None]
+                         if len(bins) else None)
+
+    def __len__(self):
+        return self.num_frames
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CaptureReader:
+    """
+    Read access to a stored capture through memory maps, also while it is still being written
+    (call refresh() to see the frames added since).
+    """
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.frames = None
+        self.levels = []
+        self.refresh()
+
+    def refresh(self):
+        with open(self.base_path + '.json') as f:
+            self.metadata = json.load(f)
+        self.channels = self.metadata['channels']
+        self.rate = float(self.metadata['rate'])
+        self.bin_sizes = self.metadata['bin_sizes']
+        num_channels = len(self.channels)
+        # the file sizes count, the sidecar is only updated now and then
+        self.frames = self.map(self.base_path + '.cap', (num_channels,))
+        self.levels = [self.map(level_path(self.base_path, level), (num_channels, 2))
+                       for level in range(len(self.bin_sizes))]
+
+    @staticmethod
+    def map(path, row_shape):
+        row_bytes = 4 * int(np.prod(row_shape))
+        num_rows = os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+        if num_rows == 0:
+            return np.empty((0,) + row_shape, dtype='<f4')
+        return np.memmap(path, dtype='<f4', mode='r', shape=(num_rows,) + row_shape)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def duration(self):
+        return len(self.frames) / self.rate
+
+    def window(self, start, stop, max_points=4000):
+        """
+        (times, values) of the capture between start and stop (s), values has one column per channel.
+        If the frames in the range do not fit in max_points, every bin of the finest level that fits
+        gives two points at the bin centre, its minimum and its maximum, so a line through them covers
+        the full excursion of the signal like a plot of every frame would. Frames not yet in a level 0
+        bin follow as they are, so a range the levels cover returns at most max_points plus
+        bin_sizes[0] points.
+        """
+        first = max(0, int(math.floor(start * self.rate)))
+        last = min(len(self.frames), int(math.ceil(stop * self.rate)) + 1)
+        if last <= first:
+            return np.empty(0), np.empty((0, len(self.channels)), dtype='<f4')
+        if last - first <= max_points:
+            return np.arange(first, last) / self.rate, np.array(self.frames[first:last])
+        level = len(self.levels) - 1
+        for k, bin_size in enumerate(self.bin_sizes):
+            if (last - first) / bin_size <= max_points / 2:
+                level = k
+                break
+        # a level only holds finished bins, a coarser one can end well before the newest frames
+        binned = min(last, len(self.levels[0]) * self.bin_sizes[0])
+        fitting_level = level
+        while level > 0 and len(self.levels[level]) * self.bin_sizes[level] < binned:
+            level -= 1
+        bin_size = self.bin_sizes[level]
+        first_bin = first // bin_size
+        last_bin = max(first_bin, min(len(self.levels[level]), -(-last // bin_size)))
+        envelope = np.array(self.levels[level][first_bin:last_bin])
+        starts = np.arange(first_bin, last_bin)
+        ends = starts + 1
+        group = self.bin_sizes[fitting_level] // bin_size
+        if group > 1 and len(envelope):
+            # merge the finer bins into the bins of the level that fits, so the envelope still fits
+            index = np.union1d([0], np.flatnonzero(starts % group == 0))
+            envelope = np.stack((np.minimum.reduceat(envelope[..., 0], index, axis=0),
+                                 np.maximum.reduceat(envelope[..., 1], index, axis=0)), axis=-1)
+            starts = starts[index]
+            ends = np.append(starts[1:], last_bin)
+        centres = np.minimum((starts + ends) / 2 * bin_size, len(self.frames) - 1)
+        times = np.repeat(centres / self.rate, 2)
+        values = envelope.transpose(0, 2, 1).reshape(-1, len(self.channels))
+        tail = max(first, min(last, last_bin * bin_size))
+        if tail < last:
+            times = np.concatenate((times, np.arange(tail, last) / self.rate))
+            values = np.concatenate((values, np.array(self.frames[tail:last])))
+        return times, values
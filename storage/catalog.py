@@ -0,0 +1,288 @@
+"""
+SQLite catalog of stored sweeps.
+
+Every SweepWriter made by acquisition.engine.create_sweep_writer adds its sweep to
+<data directory>/catalog.sqlite when it closes: the sweep parameters, the lock-in settings, the
+stage serial, motor parameters and move profile, angle range, point count, duration, the path of
+the .bin/.json pair and of any text export. The full sidecar metadata is kept too. The columns
+the queries filter on are indexed, so finding sweeps takes milliseconds however many there are,
+and the data of the matches is loaded straight from the .bin files.
+
+    catalog = SweepCatalog('data/catalog.sqlite')
+    rows = catalog.find(sample='S12', time_constant='10 ms', since='2026-09-01')
+    datasets = catalog.load(rows, columns=('angle', 'RA'))
+
+    python -m storage.catalog data/catalog.sqlite --sample S12 --time-constant "10 ms" --since 2026-09-01
+    python -m storage.catalog data/catalog.sqlite --scan data     # index sweeps stored before the catalog
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import time
+
+from storage.sweep_writer import read_sweep
+
+CATALOG_NAME = 'catalog.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps (
+    id INTEGER PRIMARY KEY,
+    base_path TEXT UNIQUE NOT NULL,
+    created TEXT,
+    created_ts REAL,
+    duration REAL,
+    mode TEXT,
+    sample TEXT,
+    start_angle REAL,
+    stop_angle REAL,
+    step_angle REAL,
+    min_angle REAL,
+    max_angle REAL,
+    num_points INTEGER,
+    columns TEXT,
+    complete INTEGER,
+    time_constant TEXT,
+    time_constant_s REAL,
+    sensitivity TEXT,
+    filter_slope TEXT,
+    input_range TEXT,
+    stage_serial TEXT,
+    steps_per_rev REAL,
+    velocity REAL,
+    acceleration REAL,
+    text_path TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS sweeps_created ON sweeps (created_ts);
+CREATE INDEX IF NOT EXISTS sweeps_sample ON sweeps (sample, created_ts);
+CREATE INDEX IF NOT EXISTS sweeps_time_constant ON sweeps (time_constant_s, created_ts);
+CREATE INDEX IF NOT EXISTS sweeps_mode ON sweeps (mode, created_ts);
+CREATE INDEX IF NOT EXISTS sweeps_stage ON sweeps (stage_serial, created_ts);
+"""
+
+time_units = {'us': 1e-6, 'ms': 1e-3, 's': 1.0, 'ks': 1e3}
+
+
+def time_constant_seconds(time_constant):
+    """
+    '10 ms' -> 0.01, numbers are taken as seconds already.
+    """
+    if time_constant is None or isinstance(time_constant, (int, float)):
+        return time_constant
+    value, unit = time_constant.split()
+    return float(value) * time_units[unit]
+
+
+def timestamp(value):
+    """
+    Seconds since the epoch of a 'YYYY-MM-DD[THH:MM:SS]' string (local time) or a number.
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    value = value.strip().replace(' ', 'T')
+    layout = '%Y-%m-%dT%H:%M:%S' if 'T' in value else '%Y-%m-%d'
+    return time.mktime(time.strptime(value, layout))
+
+
+class SweepCatalog:
+    """
+    Connection to a catalog file, one per thread like any sqlite3 connection.
+    """
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = os.path.dirname(os.path.abspath(path))
+        # several processes (GUI, engine, scheduler) may add sweeps at the same time
+        self.connection = sqlite3.connect(path, timeout=10.0)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def relative(self, path):
+        # paths below the catalog are stored relative to it, so the data directory can be moved
+        path = os.path.abspath(path)
+        if path.startswith(self.directory + os.sep):
+            return os.path.relpath(path, self.directory)
+        return path
+
+    def resolve(self, path):
+        return path if path is None or os.path.isabs(path) else os.path.join(self.directory, path)
+
+    def add(self, base_path, metadata=None):
+        """
+        Add or update the sweep stored at base_path, with its sidecar metadata if not given.
+        """
+        if metadata is None:
+            with open(base_path + '.json') as f:
+                metadata = json.load(f)
+        lockin = metadata.get('lockin') or {}
+        stages = metadata.get('stages') or {}
+        stage = stages.get('rotation') or next(iter(stages.values()), {})
+        motor_params = stage.get('motor_params') or {}
+        angle_range = metadata.get('angle_range') or (None, None)
+        text_path = metadata.get('text_path')
+        row = {
+            'base_path': self.relative(base_path),
+            'created': metadata.get('created'),
+            'created_ts': timestamp(metadata['created']) if metadata.get('created') else None,
+            'duration': metadata.get('duration'),
+            'mode': metadata.get('mode'),
+            'sample': metadata.get('sample') or None,
+            'start_angle': metadata.get('start_angle'),
+            'stop_angle': metadata.get('stop_angle'),
+            'step_angle': metadata.get('step_angle'),
+            'min_angle': angle_range[0],
+            'max_angle': angle_range[1],
+            'num_points': metadata.get('num_rows'),
+            'columns': ','.join(metadata.get('columns', ())),
+            'complete': int(bool(metadata.get('complete'))),
+            'time_constant': lockin.get('time_constant'),
+            'time_constant_s': time_constant_seconds(lockin.get('time_constant')),
+            'sensitivity': lockin.get('sensitivity'),
+            'filter_slope': lockin.get('filter_slope'),
+            'input_range': lockin.get('input_range'),
+            'stage_serial': stage.get('serial_num'),
+            'steps_per_rev': motor_params.get('steps_per_rev'),
+            'velocity': stage.get('velocity'),
+            'acceleration': stage.get('acceleration'),
+            'text_path': self.relative(text_path) if text_path else None,
+            'metadata': json.dumps(metadata, default=str),
+        }
+        names = ', '.join(row)
+        updates = ', '.join(f'{name} = excluded.{name}' for name in row if name != 'base_path')
+        with self.connection:
+            self.connection.execute(
+                f"INSERT INTO sweeps ({names}) VALUES ({', '.join('?' * len(row))}) "
+                f"ON CONFLICT(base_path) DO UPDATE SET {updates}", tuple(row.values()))
+
+    def scan(self, directory):
+        """
+        Add every sweep with a sidecar below directory, returns the number of sweeps added or updated.
+        """
+        count = 0
+        for sidecar in glob.glob(os.path.join(directory, '**', '*.json'), recursive=True):
+            base_path = sidecar[:-len('.json')]
+            if not os.path.exists(base_path + '.bin'):
+                continue
+            with open(sidecar) as f:
+                try:
+                    metadata = json.load(f)
+                except ValueError:
+                    continue
+            if 'columns' not in metadata:
+                # e.g. a call trace written next to the sweeps
+                continue
+            # a sweep interrupted by a crash has rows beyond the sidecar count
+            data = read_sweep(base_path, mmap=os.path.getsize(base_path + '.bin') > 0)[1]
+            metadata['num_rows'] = len(data)
+            if 'angle_range' not in metadata and len(data):
+                metadata['angle_range'] = [float(data[:, 0].min()), float(data[:, 0].max())]
+            self.add(base_path, metadata)
+            count += 1
+        return count
+
+    def find(self, sample=None, mode=None, time_constant=None, stage_serial=None, since=None, until=None,
+             complete=None, limit=None):
+        """
+        Sweeps matching all given criteria as a list of sqlite3.Row, newest first.
+        :param time_constant: '10 ms' or seconds.
+        :param since: Earliest start, 'YYYY-MM-DD', 'YYYY-MM-DDTHH:MM:SS' or seconds since the epoch.
+        :param until: Latest start, like since.
+        """
+        conditions, values = [], []
+        for column, value in (('sample', sample), ('mode', mode), ('stage_serial', stage_serial)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                values.append(value)
+        if time_constant is not None:
+            # the stored values come from strings like '10 ms', compare with a margin for rounding
+            seconds = time_constant_seconds(time_constant)
+            conditions.append('time_constant_s BETWEEN ? AND ?')
+            values += [seconds * (1 - 1e-6), seconds * (1 + 1e-6)]
+        if since is not None:
+            conditions.append('created_ts >= ?')
+            values.append(timestamp(since))
+        if until is not None:
+            conditions.append('created_ts <= ?')
+            values.append(timestamp(until))
+        if complete is not None:
+            conditions.append('complete = ?')
+            values.append(int(complete))
+        query = 'SELECT * FROM sweeps'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY created_ts DESC'
+        if limit is not None:
+            query += f' LIMIT {int(limit)}'
+        return self.connection.execute(query, values).fetchall()
+
+    def metadata(self, row):
+        return json.loads(row['metadata'])
+
+    def load(self, rows, columns=None, mmap=False):
+        """
+        Data of the sweeps in rows (from find) as a list of arrays, one column per name in columns
+        (all columns if None). mmap=True maps the files instead of reading them.
+        """
+        datasets = []
+        for row in rows:
+            data = read_sweep(self.resolve(row['base_path']), mmap=mmap)[1]
+            if columns is not None:
+                names = row['columns'].split(',')
+                data = data[:, [names.index(column) for column in columns]]
+            datasets.append(data)
+        return datasets
+
+
+def add_to_catalog(catalog_path, base_path, metadata=None):
+    """
+    Add a sweep to the catalog at catalog_path with a connection of its own, so it can be called
+    from any thread. Errors are printed, the sweep itself is already stored.
+    """
+    try:
+        with SweepCatalog(catalog_path) as catalog:
+            catalog.add(base_path, metadata)
+    except Exception as e:
+        print(f"Could not add {base_path} to the catalog {catalog_path}: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the catalog of stored sweeps.")
+    parser.add_argument('catalog', nargs='?', default=os.path.join('data', CATALOG_NAME), help="catalog file")
+    parser.add_argument('--scan', metavar='DIRECTORY', help="add the sweeps stored below DIRECTORY first")
+    parser.add_argument('--sample')
+    parser.add_argument('--mode')
+    parser.add_argument('--time-constant', help="e.g. '10 ms'")
+    parser.add_argument('--stage', help="stage serial number")
+    parser.add_argument('--since', help="YYYY-MM-DD")
+    parser.add_argument('--until', help="YYYY-MM-DD")
+    parser.add_argument('--limit', type=int)
+    args = parser.parse_args(argv)
+
+    with SweepCatalog(args.catalog) as catalog:
+        if args.scan:
+            print(f"{catalog.scan(args.scan)} sweeps indexed from {args.scan}")
+        rows = catalog.find(sample=args.sample, mode=args.mode, time_constant=args.time_constant,
+                            stage_serial=args.stage, since=args.since, until=args.until, limit=args.limit)
+        print(f"{'created':<21}{'mode':<11}{'sample':<12}{'time constant':<15}{'points':>8}{'angles':>18}  path")
+        for row in rows:
+            angles = '' if row['min_angle'] is None else f"{row['min_angle']:.2f} - {row['max_angle']:.2f}"
+            print(f"{row['created'] or '':<21}{row['mode'] or '':<11}{row['sample'] or '':<12}"
+                  f"{row['time_constant'] or '':<15}{row['num_points'] or 0:>8}{angles:>18}  {row['base_path']}")
+        print(f"{len(rows)} sweeps")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Append-as-you-go storage for sweep data.
+
+A sweep is stored as two files next to each other:
+    <base>.bin   float64 rows (angle, RA, RB, ...) appended in chunks
+    <base>.json  sidecar with the column names, row count and metadata
+The binary file only ever grows by whole rows, so after a crash every row that
+was flushed can still be read back, even if the sidecar is behind.
+With a catalog_path the sweep is added to that storage.catalog file when it closes.
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# the photodiodes are on the aux inputs, other lock-in outputs are labelled by their name
+channel_labels = {'IN1': 'Photodiode A', 'IN2': 'Photodiode B'}
+
+
+class SweepWriter:
+    def __init__(self, base_path, columns=('angle', 'RA', 'RB'), chunk_size=1024, flush_interval=1.0,
+                 metadata=None, catalog_path=None):
+        """
+        :param base_path: Path without extension, .bin and .json are added.
+        :param chunk_size: Rows buffered in memory before they are written.
+        :param flush_interval: Seconds after which buffered rows are written even if the chunk is not full.
+        :param catalog_path: SweepCatalog file the sweep is added to when it closes.
+        """
+        self.base_path = base_path
+        self.columns = tuple(columns)
+        self.chunk = np.empty((chunk_size, len(self.columns)))
+        self.chunk_rows = 0
+        self.num_rows = 0
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+        self.started = self.last_flush
+        self.catalog_path = catalog_path
+        # smallest and largest value of the first column, stored for the catalog
+        self.first_column_range = [np.inf, -np.inf]
+        self.lock = threading.Lock()
+        self.metadata = {'columns': list(self.columns), 'dtype': '<f8', 'num_rows': 0, 'complete': False,
+                         'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        self.metadata.update(metadata or {})
+        directory = os.path.dirname(base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(base_path + '.bin', 'wb')
+        self.write_sidecar()
+
+    def append(self, *row):
+        with self.lock:
+            self.chunk[self.chunk_rows] = row
+            self.chunk_rows += 1
+            if self.chunk_rows == len(self.chunk) or time.monotonic() - self.last_flush > self.flush_interval:
+                self._flush()
+
+    def extend(self, *columns):
+        """Append whole columns at once, e.g. the angles and channels of a fly scan."""
+        block = np.column_stack([np.asarray(c, dtype=float) for c in columns])
+        with self.lock:
+            self._flush()
+            self.update_range(block)
+            block.astype('<f8').tofile(self.file)
+            self.num_rows += len(block)
+            self._flush()
+
+    def update_metadata(self, **metadata):
+        with self.lock:
+            self.metadata.update(metadata)
+            self.write_sidecar()
+
+    def flush(self):
+        with self.lock:
+            if not self.file.closed:
+                self._flush()
+
+    def _flush(self):
+        if self.chunk_rows:
+            self.update_range(self.chunk[:self.chunk_rows])
+            self.chunk[:self.chunk_rows].astype('<f8').tofile(self.file)
+            self.num_rows += self.chunk_rows
+            self.chunk_rows = 0
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+        self.write_sidecar()
+
+    def update_range(self, rows):
+        if len(rows):
+            first_column = rows[:, 0]
+            self.first_column_range[0] = min(self.first_column_range[0], float(np.nanmin(first_column)))
+            self.first_column_range[1] = max(self.first_column_range[1], float(np.nanmax(first_column)))
+
+    def write_sidecar(self):
+        self.metadata['num_rows'] = self.num_rows
+        tmp_path = self.base_path + '.json.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.metadata, f, indent=2, default=str)
+        os.replace(tmp_path, self.base_path + '.json')
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.metadata['complete'] = True
+            self.metadata['duration'] = time.monotonic() - self.started
+            self._flush()
+            if self.num_rows:
+                self.metadata['angle_range'] = list(self.first_column_range)
+                self.write_sidecar()
+            self.file.close()
+        self.add_to_catalog()
+
+    def add_to_catalog(self):
+        if self.catalog_path:
+            # imported here, the catalog module reads sweeps with read_sweep of this one
+            from storage.catalog import add_to_catalog
+            add_to_catalog(self.catalog_path, self.base_path, dict(self.metadata))
+
+    def __len__(self):
+        return self.num_rows + self.chunk_rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def export_text(self, text_path, header=None):
+        self.flush()
+        export_text(self.base_path, text_path, header)
+        self.update_metadata(text_path=os.path.abspath(text_path))
+        if self.file.closed:
+            self.add_to_catalog()
+
+
+def read_sweep(base_path, mmap=False):
+    """
+    Return (metadata, data) of a stored sweep, data has one column per entry of metadata['columns'].
+    Rows beyond the sidecar count (written just before a crash) are included.
+    """
+    with open(base_path + '.json') as f:
+        metadata = json.load(f)
+    num_columns = len(metadata['columns'])
+    num_rows = os.path.getsize(base_path + '.bin') // (8 * num_columns)
+    if mmap:
+        data = np.memmap(base_path + '.bin', dtype=metadata['dtype'], mode='r', shape=(num_rows, num_columns))
+    else:
+        data = np.fromfile(base_path + '.bin', dtype=metadata['dtype'], count=num_rows * num_columns)
+        data = data.reshape(num_rows, num_columns)
+    return metadata, data
+
+
+def text_header(metadata):
+    """
+    Header of the text export built from metadata['columns']: the angle, or the set point of every
+    mount of a grid sweep, RA and RB labelled by the lock-in channels stored in them (metadata['channels'],
+    the aux inputs IN1, IN2 of sweeps stored without), further columns by name.
+    """
+    channels = [name.strip() for name in metadata.get('channels', 'IN1, IN2').split(',')]
+    labels = {'angle': 'Angle (degrees)', 'RA': channel_labels.get(channels[0], channels[0]),
+              'RB': channel_labels.get(channels[1], channels[1])}
+    labels.update({name: f'{name} (degrees)' for name in metadata.get('axes') or {}})
+    return '# ' + '\t'.join(labels.get(column, column) for column in metadata['columns'])
+
+
+def export_text(base_path, text_path, header=None):
+    """Write a stored sweep in the tab separated text format of the Save button."""
+    metadata, data = read_sweep(base_path)
+    if header is None:
+        header = text_header(metadata)
+    else:
+        # columns beyond the header, e.g. the standard deviations of a burst sweep, are labelled by name
+        extra_columns = metadata['columns'][len(header.split('\t')):]
+        header = '\t'.join([header] + list(extra_columns))
+    np.savetxt(text_path, data, fmt='%.9g', delimiter='\t', header=header, comments='')
@@ -0,0 +1,49 @@
+"""
+Shared fixtures: the simulated KDC101 and SR865A, fast enough for unit tests.
+
+    python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from instruments.KDC101.KDC101Controller import KDC101_Rotation
+from instruments.Lockin.SRS865A import LockInAmplifier
+from instruments.Simulated.SimKDC101 import SimulatedKinesisLib
+from instruments.Simulated.SimSRS865A import SimulatedResourceManager
+
+LOCKIN_SETTINGS = os.path.join(REPO_DIR, 'instruments', 'Lockin', 'lockin_params.ini')
+NO_LATENCY = {'write': 0.0, 'query': 0.0, 'OUTP?': 0.0, 'SNAP?': 0.0}
+
+
+@pytest.fixture
+def kinesis_lib():
+    """Simulated Kinesis library with a fast stage and no call latency."""
+    return SimulatedKinesisLib(velocity=100.0, acceleration=1000.0, call_latency=0.0, seed=0)
+
+
+@pytest.fixture
+def mount(kinesis_lib):
+    """Connected and homed KDC101_Rotation on the simulated library, with the motor parameters set."""
+    mount = KDC101_Rotation('27257179', lib=kinesis_lib, timeout=10.0)
+    mount.connect()
+    mount.home()
+    mount.set_motor_params()
+    yield mount
+    mount.disconnect()
+
+
+@pytest.fixture
+def lockin(kinesis_lib):
+    """Initialized LockInAmplifier on a simulated SR865A following the angle of the simulated stage."""
+    lockin = LockInAmplifier(inifile=LOCKIN_SETTINGS)
+    lockin.open_instrument('SIM', resource_manager=SimulatedResourceManager(
+        angle_source=kinesis_lib.real_position, latency=NO_LATENCY, transfer_rate=1e9, seed=0))
+    lockin.initialize_lockin()
+    yield lockin
+    lockin.close_instrument()
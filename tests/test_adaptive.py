@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from acquisition.adaptive import AdaptiveScan, interval_loss, order_by_travel
+from acquisition.engine import load_recipe
+from acquisition.scheduler import end_points
+
+
+def test_interval_loss_is_largest_where_the_curve_changes():
+    angles = np.arange(0.0, 10.0, 1.0)
+    values = np.where(angles < 5, 0.0, 1.0)
+    loss = interval_loss(angles, values, min_step=0.01)
+    assert len(loss) == len(angles) - 1
+    assert np.argmax(loss) == 4
+    # flat stretches away from the step are the least interesting
+    assert loss[0] < loss[4] and loss[-1] < loss[4]
+
+
+def test_interval_loss_curvature_weight():
+    angles = np.linspace(0.0, 1.0, 11)
+    values = np.abs(angles - 0.5)
+    flat = interval_loss(angles, values, min_step=0.01, curvature_weight=0.0)
+    curved = interval_loss(angles, values, min_step=0.01, curvature_weight=1.0)
+    # only the intervals next to the kink gain from the curvature term
+    gain = curved - flat
+    assert np.argmax(gain) in (4, 5)
+    assert np.allclose(gain[[0, 1, 8, 9]], 0.0)
+
+
+def test_interval_loss_never_splits_below_min_step():
+    angles = np.array([0.0, 0.015, 0.03, 1.0])
+    loss = interval_loss(angles, np.array([0.0, 1.0, 0.0, 1.0]), min_step=0.01)
+    assert loss[0] == 0.0 and loss[1] == 0.0
+    assert loss[2] > 0.0
+
+
+def test_interval_loss_of_a_constant_curve():
+    loss = interval_loss([0.0, 1.0, 2.0], [3.0, 3.0, 3.0], min_step=0.01)
+    assert np.all(np.isfinite(loss))
+
+
+def test_order_by_travel_starts_at_the_nearer_end():
+    assert order_by_travel([3.0, 1.0, 2.0], 0.0).tolist() == [1.0, 2.0, 3.0]
+    assert order_by_travel([3.0, 1.0, 2.0], 2.9).tolist() == [3.0, 2.0, 1.0]
+
+
+def test_adaptive_scan_refines_the_dip(mount, lockin):
+    # the simulated reflectivity has a narrow dip at 56.3°
+    scan = AdaptiveScan(mount, lockin, 50.0, 62.0, 1.0, min_step=0.05, settle_time=0.02)
+    assert np.allclose(scan.coarse_angles, np.arange(50.0, 62.0, 1.0))
+    assert scan.max_points == 48
+    assert scan.run() == 48
+    angles = np.array(scan.angles)
+    assert len(np.unique(angles)) == len(angles)
+    assert angles.min() == pytest.approx(50.0) and angles.max() == pytest.approx(61.0)
+    refined = angles[len(scan.coarse_angles):]
+    assert np.count_nonzero(np.abs(refined - 56.3) < 2.0) > len(refined) / 2
+
+
+def test_scheduler_uses_the_coarse_grid(tmp_path):
+    path = tmp_path / 'adaptive.ini'
+    path.write_text("[sweep]\nmode = adaptive\nstart = 50\nstop = 62\nstep = 1\n")
+    recipe = load_recipe(str(path))
+    assert end_points(recipe) == (50.0, 61.0)
@@ -0,0 +1,66 @@
+from struct import unpack_from
+
+import numpy as np
+import pytest
+
+from instruments.Lockin.SRS865A import decode_binaryblock_into, parse_binblock_header
+
+
+def binary_block(payload):
+    length = str(len(payload))
+    return f'#{len(length)}{length}'.encode() + payload
+
+
+def test_parse_binblock_header():
+    assert parse_binblock_header(b'#3100' + bytes(100)) == (5, 100)
+    with pytest.raises(ValueError):
+        parse_binblock_header(b'3100')
+
+
+def test_decode_matches_struct_unpack():
+    samples = np.random.default_rng(0).standard_normal(1000).astype('<f4')
+    buf = binary_block(samples.tobytes())
+    out = np.empty(1000, dtype='<f4')
+    assert decode_binaryblock_into(buf, out) == 1000
+    offset = parse_binblock_header(buf)[0]
+    assert np.array_equal(out, np.array(unpack_from('<1000f', buf, offset), dtype='<f4'))
+
+
+def test_decode_stops_at_the_end_of_out():
+    buf = binary_block(np.arange(10, dtype='<f4').tobytes())
+    out = np.zeros(4, dtype='<f4')
+    assert decode_binaryblock_into(buf, out) == 4
+    assert np.array_equal(out, [0, 1, 2, 3])
+
+
+def test_retrieve_capture_returns_strided_views(lockin):
+    lockin.set_captureconfig_channels(channels='XY')
+    lockin.set_capturelen_kbytes(8)
+    lockin.capture_data(1000, channels='XY', print_status=False)
+    views = lockin.retrieve_capture(1000, channels='XY')
+    assert list(views) == ['X', 'Y']
+    X, Y = views['X'], views['Y']
+    assert len(X) == len(Y) == 1000
+    # columns of one (frames, 2) float32 array, no copies
+    assert X.strides == Y.strides == (8,)
+    assert X.base is not None and X.base is Y.base
+
+    buf = lockin.get_data_binaryblock(0, 8)
+    offset = parse_binblock_header(buf)[0]
+    frames = np.frombuffer(buf, dtype='<f4', count=2000, offset=offset).reshape(-1, 2)
+    assert np.array_equal(X, frames[:, 0])
+    assert np.array_equal(Y, frames[:, 1])
+
+
+def test_read_capture_floats_gives_up_after_max_retries(lockin, monkeypatch):
+    calls = []
+
+    def empty_block(offset_kbytes, len_kbytes):
+        calls.append(offset_kbytes)
+        return binary_block(b'')
+
+    monkeypatch.setattr('instruments.Lockin.SRS865A.time.sleep', lambda seconds: None)
+    monkeypatch.setattr(lockin, 'get_data_binaryblock', empty_block)
+    with pytest.raises(ValueError, match='empty capture block'):
+        lockin.read_capture_floats(100, max_retries=3)
+    assert len(calls) == 4
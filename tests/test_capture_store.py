@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from storage.capture_store import CaptureReader, CaptureWriter
+
+
+def random_frames(num_frames, seed=0):
+    return np.random.default_rng(seed).standard_normal((num_frames, 2)).astype('<f4')
+
+
+def write_capture(base, frames, close=True, chunk_size=37, **kwargs):
+    writer = CaptureWriter(base, channels='XY', rate=100.0, bin_size=16, factor=4, num_levels=3, **kwargs)
+    for i in range(0, len(frames), chunk_size):
+        writer.append(frames[i:i + chunk_size])
+    if close:
+        writer.close()
+    else:
+        writer.write_sidecar()
+    return writer
+
+
+def envelope(frames, bin_size):
+    bins = [frames[i:i + bin_size] for i in range(0, len(frames), bin_size)]
+    return np.stack([np.stack((b.min(axis=0), b.max(axis=0)), axis=-1) for b in bins])
+
+
+def test_levels_hold_the_min_and_max_of_their_bins(tmp_path):
+    frames = random_frames(1000)
+    write_capture(str(tmp_path / 'capture'), frames)
+    reader = CaptureReader(str(tmp_path / 'capture'))
+    assert reader.metadata['complete'] and reader.metadata['num_frames'] == 1000
+    assert np.array_equal(np.asarray(reader.frames), frames)
+    assert reader.bin_sizes == [16, 64, 256]
+    # the last, shorter bin of every level is written on close
+    for level, bin_size in zip(reader.levels, reader.bin_sizes):
+        assert np.array_equal(np.asarray(level), envelope(frames, bin_size))
+
+
+def test_levels_of_a_running_capture_hold_finished_bins(tmp_path):
+    frames = random_frames(1000)
+    writer = write_capture(str(tmp_path / 'capture'), frames, close=False)
+    reader = CaptureReader(str(tmp_path / 'capture'))
+    assert [len(level) for level in reader.levels] == [62, 15, 3]
+    assert np.array_equal(np.asarray(reader.levels[1]), envelope(frames[:960], 64))
+    writer.close()
+
+
+def test_gaps_are_nan_frames(tmp_path):
+    writer = CaptureWriter(str(tmp_path / 'capture'), channels='XY', rate=100.0)
+    writer.append(random_frames(10))
+    writer.append_gap(5)
+    writer.append(random_frames(10, seed=1))
+    writer.close()
+    reader = CaptureReader(str(tmp_path / 'capture'))
+    assert len(reader) == 25
+    assert np.all(np.isnan(reader.frames[10:15]))
+
+
+def test_window_returns_frames_that_fit(tmp_path):
+    frames = random_frames(1000)
+    write_capture(str(tmp_path / 'capture'), frames)
+    times, values = CaptureReader(str(tmp_path / 'capture')).window(1.0, 2.0, max_points=200)
+    assert np.allclose(times, np.arange(100, 201) / 100.0)
+    assert np.array_equal(values, frames[100:201])
+
+
+def test_window_envelope_covers_every_frame(tmp_path):
+    frames = random_frames(1000)
+    write_capture(str(tmp_path / 'capture'), frames)
+    reader = CaptureReader(str(tmp_path / 'capture'))
+    times, values = reader.window(0.0, 10.0, max_points=100)
+    assert len(times) == len(values) <= 100
+    assert np.all(np.diff(times) >= 0)
+    assert np.array_equal(values.min(axis=0), frames.min(axis=0))
+    assert np.array_equal(values.max(axis=0), frames.max(axis=0))
+
+
+@pytest.mark.parametrize('start, stop, max_points', [(0.0, 10.0, 10), (8.0, 10.0, 10), (9.8, 10.0, 4)])
+def test_window_of_a_running_capture_reaches_the_newest_frames(tmp_path, start, stop, max_points):
+    frames = random_frames(1000)
+    writer = write_capture(str(tmp_path / 'capture'), frames, close=False)
+    reader = CaptureReader(str(tmp_path / 'capture'))
+    times, values = reader.window(start, stop, max_points=max_points)
+    # the coarse levels end before the newest frames, the window still reaches them
+    assert times[-1] == pytest.approx(9.99)
+    assert len(times) <= max_points + reader.bin_sizes[0]
+    in_range = frames[int(start * 100):]
+    assert np.array_equal(values.min(axis=0), in_range.min(axis=0))
+    assert np.array_equal(values.max(axis=0), in_range.max(axis=0))
+    writer.close()
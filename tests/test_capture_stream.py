@@ -0,0 +1,123 @@
+import numpy as np
+
+from acquisition.continuous import ContinuousCapture
+from instruments.Lockin.SRS865A import CaptureStream
+from storage.capture_store import CaptureReader
+
+
+class CircularCaptureLockin:
+    """
+    The capture calls CaptureStream makes, on a 1 kB circular buffer of XY frames.
+    Frame k holds (k, -k), CAPTUREBYTES? is the running total of bytes captured.
+    """
+    def __init__(self, buffer_kbytes=1):
+        self.buffer = np.zeros(buffer_kbytes * 1024 // 8 * 2, dtype='<f4')
+        self.total_bytes = 0
+
+    def capture(self, num_frames):
+        frames = self.total_bytes // 8 + np.arange(num_frames)
+        slots = frames % (len(self.buffer) // 2)
+        self.buffer[2 * slots] = frames
+        self.buffer[2 * slots + 1] = -frames
+        self.total_bytes += 8 * num_frames
+
+    def restart(self):
+        self.buffer[:] = 0
+        self.total_bytes = 0
+
+    def get_capturelen_kbytes(self):
+        return len(self.buffer) * 4 // 1024
+
+    def get_num_of_capturebytes_sofar(self):
+        return self.total_bytes
+
+    def get_data_binaryblock(self, offset_kbytes, len_kbytes):
+        payload = self.buffer.tobytes()[offset_kbytes * 1024:(offset_kbytes + len_kbytes) * 1024]
+        length = str(len(payload))
+        return f'#{len(length)}{length}'.encode() + payload
+
+
+def frames(first, last):
+    k = np.arange(first, last, dtype='<f4')
+    return np.column_stack((k, -k))
+
+
+def test_poll_returns_only_new_frames():
+    lockin = CircularCaptureLockin()
+    stream = CaptureStream(lockin)
+    assert len(stream.poll()) == 0
+    lockin.capture(50)
+    assert np.array_equal(stream.poll(), frames(0, 50))
+    lockin.capture(30)
+    assert np.array_equal(stream.poll(), frames(50, 80))
+    assert stream.frames_lost == 0
+
+
+def test_poll_across_the_end_of_the_buffer():
+    lockin = CircularCaptureLockin()
+    stream = CaptureStream(lockin)
+    lockin.capture(100)
+    stream.poll()
+    # frames 100..199 wrap around the 128 frame buffer
+    lockin.capture(100)
+    assert np.array_equal(stream.poll(), frames(100, 200))
+    lockin.capture(128)
+    assert np.array_equal(stream.poll(), frames(200, 328))
+    assert stream.frames_lost == 0
+
+
+def test_frames_overwritten_before_the_poll_are_counted_lost():
+    lockin = CircularCaptureLockin()
+    stream = CaptureStream(lockin)
+    lockin.capture(10)
+    stream.poll()
+    lockin.capture(300)
+    # only the last buffer full is still in the lock-in
+    assert np.array_equal(stream.poll(), frames(182, 310))
+    assert stream.frames_lost == 172
+
+
+def test_restarted_capture_is_read_from_its_start():
+    lockin = CircularCaptureLockin()
+    stream = CaptureStream(lockin)
+    lockin.capture(100)
+    stream.poll()
+    lockin.restart()
+    lockin.capture(20)
+    assert np.array_equal(stream.poll(), frames(0, 20))
+    assert stream.restarts == 1 and stream.frames_lost == 0
+
+
+def test_partial_frames_wait_for_the_next_poll():
+    lockin = CircularCaptureLockin()
+    stream = CaptureStream(lockin)
+    lockin.capture(10)
+    lockin.total_bytes += 4
+    assert np.array_equal(stream.poll(), frames(0, 10))
+    lockin.total_bytes -= 4
+    lockin.capture(5)
+    assert np.array_equal(stream.poll(), frames(10, 15))
+
+
+def test_poll_reuses_its_buffer():
+    lockin = CircularCaptureLockin()
+    stream = CaptureStream(lockin)
+    lockin.capture(10)
+    first = stream.poll()
+    lockin.capture(10)
+    second = stream.poll()
+    assert np.shares_memory(first, second)
+
+
+def test_continuous_capture_wraps_without_losing_frames(lockin, tmp_path):
+    chunks = []
+    capture = ContinuousCapture(lockin, str(tmp_path / 'capture'), duration=0.8, buffer_kbytes=2,
+                                on_chunk=lambda f: chunks.append(f.copy()))
+    capture.run()
+    delivered = np.concatenate(chunks)
+    # 2 kB hold 256 XY frames, the capture wrapped around more than twice
+    assert len(delivered) > 2 * 256
+    assert capture.frames_lost == 0
+    reader = CaptureReader(str(tmp_path / 'capture'))
+    assert reader.metadata['capture_restarts'] == 0
+    assert np.array_equal(np.asarray(reader.frames), delivered)
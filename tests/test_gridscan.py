@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from acquisition.engine import load_recipe
+from acquisition.gridscan import GridScan, grid_points
+from instruments.KDC101.KDC101Controller import KDC101_Rotation
+from instruments.Simulated.SimSRS865A import default_reflectivity
+from storage.sweep_writer import SweepWriter, read_sweep
+
+
+def test_grid_points_two_axes_serpentine():
+    points = grid_points({'tilt': [0, 1, 2], 'rotation': [10, 20]})
+    assert points.tolist() == [[0, 10], [0, 20], [1, 20], [1, 10], [2, 10], [2, 20]]
+
+
+def test_grid_points_three_axes_move_one_axis_at_a_time():
+    axes = {'a': [0, 1], 'b': [0, 1, 2], 'c': [0, 1, 2, 3]}
+    points = grid_points(axes)
+    assert points.shape == (24, 3)
+    # every set point once, the slowest axis in order
+    assert len({tuple(p) for p in points}) == 24
+    assert np.all(np.diff(points[:, 0]) >= 0)
+    # consecutive points are neighbours on the grid
+    assert np.all(np.abs(np.diff(points, axis=0)).sum(axis=1) == 1)
+
+
+def test_grid_points_single_axis():
+    assert grid_points({'rotation': [1.0, 2.0, 3.0]}).tolist() == [[1.0], [2.0], [3.0]]
+
+
+@pytest.fixture
+def tilt_mount(kinesis_lib):
+    kinesis_lib.add_stage('27257180')
+    mount = KDC101_Rotation('27257180', lib=kinesis_lib, timeout=10.0)
+    mount.connect()
+    mount.set_motor_params()
+    yield mount
+    mount.disconnect()
+
+
+def test_grid_scan_visits_every_point(mount, tilt_mount, lockin, tmp_path):
+    mounts = {'tilt': tilt_mount, 'rotation': mount}
+    points = grid_points({'tilt': [0.0, 1.0], 'rotation': [55.0, 56.0, 57.0]})
+    visited = []
+
+    def on_point(point, RA, RB):
+        visited.append((tilt_mount.position, mount.position))
+
+    base = str(tmp_path / 'grid')
+    with SweepWriter(base, columns=('tilt', 'rotation', 'RA', 'RB')) as writer:
+        scan = GridScan(mounts, lockin, points, on_point=on_point, writer=writer, settle_time=0.05)
+        assert scan.run() == 6
+    assert np.allclose(visited, points, atol=1e-3)
+
+    data = read_sweep(base)[1]
+    assert np.array_equal(data[:, :2], points)
+    # the simulated lock-in follows the rotation mount
+    A, B = default_reflectivity(data[:, 1])
+    assert np.allclose(data[:, 2], A, atol=5e-3)
+    assert np.allclose(data[:, 3], B, atol=5e-3)
+
+
+def write_recipe(path, grid):
+    path.write_text("[sweep]\nmode = grid\n\n[stage]\nserial = 27257179\n\n[mounts]\ntilt = 27257180\n\n"
+                    f"[grid]\n{grid}\n")
+    return str(path)
+
+
+def test_load_grid_recipe(tmp_path):
+    recipe = load_recipe(write_recipe(tmp_path / 'grid.ini', "tilt = -1, 1, 0.5\nrotation = 50, 51, 0.5"))
+    assert recipe['mode'] == 'grid'
+    assert recipe['mounts'] == {'rotation': '27257179', 'tilt': '27257180'}
+    assert recipe['axes'] == {'tilt': [-1.0, -0.5, 0.0, 0.5], 'rotation': [50.0, 50.5]}
+    with pytest.raises(ValueError, match='not a mount'):
+        load_recipe(write_recipe(tmp_path / 'bad.ini', "tip = 0, 1, 0.5"))
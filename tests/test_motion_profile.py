@@ -0,0 +1,49 @@
+import time
+
+import numpy as np
+import pytest
+
+from instruments.motion_profile import move_duration, trapezoid_profile
+
+
+def test_move_duration_trapezoid():
+    # 10°/s, 10°/s²: 1 s ramps cover 10° together, the other 10° at full speed
+    assert move_duration(20.0, 10.0, 10.0) == pytest.approx(3.0)
+    assert move_duration(-20.0, 10.0, 10.0) == pytest.approx(3.0)
+
+
+def test_move_duration_triangle():
+    # too short to reach the set velocity
+    assert move_duration(2.5, 10.0, 10.0) == pytest.approx(1.0)
+
+
+def test_move_duration_without_acceleration():
+    assert move_duration(5.0, 10.0, 0.0) == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize('start, stop', [(0.0, 20.0), (20.0, 0.0), (0.0, 2.5), (50.0, 49.0)])
+def test_trapezoid_profile_ends(start, stop):
+    duration = move_duration(stop - start, 10.0, 10.0)
+    t = np.linspace(-0.1, duration + 0.1, 501)
+    positions = trapezoid_profile(t, start, stop, 10.0, 10.0)
+    assert positions[0] == pytest.approx(start)
+    assert positions[-1] == pytest.approx(stop)
+    assert trapezoid_profile(duration, start, stop, 10.0, 10.0) == pytest.approx(stop)
+    # monotonic, symmetric around the midpoint and never faster than the set velocity
+    steps = np.diff(positions) * np.sign(stop - start)
+    assert np.all(steps >= -1e-12)
+    assert trapezoid_profile(duration / 2, start, stop, 10.0, 10.0) == pytest.approx((start + stop) / 2)
+    assert np.max(np.abs(np.diff(positions) / np.diff(t))) <= 10.0 + 1e-9
+
+
+def test_simulated_move_follows_the_profile(kinesis_lib, mount):
+    kinesis_lib.stages['27257179'].velocity = 20.0
+    kinesis_lib.stages['27257179'].acceleration = 40.0
+    expected = move_duration(10.0, 20.0, 40.0)
+    t0 = time.perf_counter()
+    move = mount.move_absolute_async(10.0)
+    time.sleep(expected / 2)
+    assert kinesis_lib.real_position() == pytest.approx(5.0, abs=1.0)
+    move.result()
+    assert time.perf_counter() - t0 == pytest.approx(expected, abs=0.1)
+    assert mount.position == pytest.approx(10.0, abs=1e-3)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from acquisition.stepscan import PipelinedStepScan, StepScan
+from instruments.Simulated.SimSRS865A import default_reflectivity
+from storage.sweep_writer import SweepWriter, read_sweep
+
+
+def test_pipelined_matches_step_scan(mount, lockin, tmp_path):
+    points = {}
+    for name, scan_class in (('step', StepScan), ('pipelined', PipelinedStepScan)):
+        with SweepWriter(str(tmp_path / name)) as writer:
+            scan = scan_class(mount, lockin, 54.0, 58.0, 0.5, writer=writer, settle_time=0.05)
+            assert scan.run() == 8
+        points[name] = read_sweep(str(tmp_path / name))[1]
+
+    step, pipelined = points['step'], points['pipelined']
+    assert np.allclose(pipelined[:, 0], np.arange(54.0, 58.0, 0.5))
+    assert np.allclose(pipelined[:, 0], step[:, 0])
+    # the point is latched before the next move starts, so it is the signal at its own angle
+    A, B = default_reflectivity(pipelined[:, 0])
+    assert np.allclose(pipelined[:, 1], A, atol=5e-3)
+    assert np.allclose(pipelined[:, 2], B, atol=5e-3)
+    assert np.allclose(pipelined[:, 1:], step[:, 1:], atol=5e-3)
+
+
+def test_pipelined_stop_ends_the_sweep(mount, lockin):
+    angles = []
+
+    def on_point(angle, RA, RB):
+        angles.append(angle)
+        if len(angles) == 3:
+            scan.stop()
+
+    scan = PipelinedStepScan(mount, lockin, 50.0, 60.0, 0.5, on_point=on_point, settle_time=0.02)
+    num_points = scan.run()
+    assert 3 <= num_points < 20
+    assert num_points == len(angles)
+    assert mount.position == pytest.approx(angles[-1], abs=1e-3)
@@ -0,0 +1,38 @@
+import time
+
+import numpy as np
+import pytest
+
+
+def test_poller_follows_a_move(kinesis_lib, mount):
+    kinesis_lib.stages['27257179'].velocity = 20.0
+    readings = []
+    poller = mount.start_poller(interval=0.01)
+    assert mount.start_poller() is poller
+    poller.add_callback(lambda t, position, status_bits: readings.append((t, position, status_bits)))
+    t_move = time.perf_counter()
+    mount.move_absolute(10.0)
+    time.sleep(0.05)
+    t_end = time.perf_counter()
+
+    times, positions = poller.history(since=t_move)
+    assert len(times) > 10
+    assert np.all(np.diff(times) > 0)
+    assert np.all(np.diff(positions) >= -1e-3)
+    assert positions[-1] == pytest.approx(10.0, abs=1e-3)
+    assert mount.latest_position == pytest.approx(10.0, abs=1e-3)
+    # moving clockwise while on the way, then only the homed bit
+    assert any(bits & 0x10 for t, position, bits in readings if t > t_move)
+    assert readings[-1][2] == 0x400
+    mount.stop_poller()
+    assert poller.history(since=t_end)[0] == [t for t, position, bits in readings if t >= t_end]
+
+
+def test_stop_poller_ends_the_thread(mount):
+    poller = mount.start_poller(interval=0.01)
+    mount.stop_poller()
+    assert not poller.thread.is_alive()
+    count = len(poller.history()[0])
+    time.sleep(0.05)
+    assert len(poller.history()[0]) == count
+    assert mount.latest_position == pytest.approx(mount.position)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from instruments.KDC101.KDC101Controller import KINESIS_SIGNATURES, KDC101_Rotation, UnitConverter
+from instruments.Simulated.SimKDC101 import SimulatedKinesisLib
+
+
+@pytest.mark.parametrize('unit_type', [0, 1, 2])
+def test_device_units_round_trip(unit_type):
+    converter = UnitConverter()
+    counts = np.arange(-100000, 100000, 997, dtype=np.int32)
+    assert np.array_equal(converter.to_device(converter.to_real(counts, unit_type), unit_type), counts)
+    for count in (-12345, 0, 1, 987654):
+        assert converter.to_device(converter.to_real(count, unit_type), unit_type) == count
+
+
+def test_real_units_round_trip_within_half_a_count():
+    converter = UnitConverter()
+    angles = np.linspace(-360.0, 360.0, 10001)
+    back = converter.to_real(converter.to_device(angles))
+    assert np.max(np.abs(back - angles)) <= 0.5 / 1919.64186 + 1e-12
+
+
+def test_scalars_and_arrays():
+    converter = UnitConverter()
+    assert isinstance(converter.to_device(10.0), int)
+    assert isinstance(converter.to_real(19196), float)
+    table = converter.to_device([0.0, 10.0, 20.0])
+    assert table.dtype == np.int32
+    assert table.tolist() == [0, 19196, 38393]
+
+
+def test_gear_ratio_and_pitch():
+    converter = UnitConverter(steps_per_rev=512, gbox_ratio=67, pitch=2.0)
+    assert converter.to_device(1.0) == round(512 * 67 / 2.0)
+
+
+@pytest.mark.parametrize('unit_type, values', [(0, [-45.5, 0.0, 0.01, 56.3, 359.99]),
+                                               (1, [0.5, 10.0, 25.0]),
+                                               (2, [1.0, 10.0, 20.0])])
+def test_matches_the_dll_conversion(unit_type, values):
+    mount = KDC101_Rotation('27257179', lib=SimulatedKinesisLib(call_latency=0.0))
+    # without motor parameters the conversion goes through the library
+    dll = [mount.to_device_units(v, unit_type) for v in values]
+    mount.set_motor_params()
+    local = [mount.to_device_units(v, unit_type) for v in values]
+    assert local == dll
+    if unit_type == 0:
+        assert mount.device_table(values).tolist() == dll
+    for v, count in zip(values, local):
+        assert mount.to_real_units(count, unit_type) == pytest.approx(v, abs=1.0 / UnitConverter().scale[unit_type])
+
+
+def test_simulated_library_has_every_declared_function():
+    lib = SimulatedKinesisLib()
+    assert [name for name in KINESIS_SIGNATURES if not hasattr(lib, name)] == []